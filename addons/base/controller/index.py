@@ -10,6 +10,7 @@ from fastapi import Request
 
 # Local imports
 from clicx.utils.jinja import render
+from clicx.utils.cache import ResponseCache
 from clicx import NAME,VERSION
 
 router = APIRouter(
@@ -18,11 +19,21 @@ router = APIRouter(
 
 dependency = []
 
+# NOTE: The page only changes on deploy (routes, version) or new year
+_cache = ResponseCache(maxsize=8)
+
 @router.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """
     Root endpoint that renders the index.html template
     """
+    return _cache.respond(
+        request,
+        render=lambda: render_index(request),
+        version=f"{VERSION}-{datetime.now().year}",
+    )
+
+def render_index(request: Request) -> str:
     # Prepare template context
     context = {
         "app_name": NAME,
@@ -37,5 +48,4 @@ async def root(request: Request):
         "company_name": "Egeskov-olsen",
     }
 
-    html_content = render("index.html.jinja", context=context)
-    return HTMLResponse(content=html_content)
\ No newline at end of file
+    return render("index.html.jinja", context=context)
\ No newline at end of file
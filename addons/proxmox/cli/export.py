@@ -0,0 +1,52 @@
+# OS
+import sys
+from typing import List, Optional
+
+# Third party imports
+import typer
+
+# Local imports
+from proxmox.service import proxmox
+from proxmox.service.proxmox import Proxmox
+
+from clicx.utils.streaming import ndjson_lines
+
+app = typer.Typer(help="Export listings as newline delimited JSON")
+
+
+def get_pve_conn() -> Proxmox:
+    return proxmox.get_connection()
+
+def _write(source, output: Optional[str]):
+    stream = open(output, 'wb') if output else sys.stdout.buffer
+    count = 0
+    try:
+        for line in ndjson_lines(source):
+            stream.write(line)
+            count += 1
+    finally:
+        source.close()
+        if output:
+            stream.close()
+    if output:
+        typer.echo(f"Exported {count} records to {output}", err=True)
+
+NodeOption = typer.Option(None, "--node", "-n", help="Node to export, repeat for several nodes. Defaults to all online nodes")
+OutputOption = typer.Option(None, "--output", "-o", help="Output file, defaults to stdout")
+
+@app.command()
+def vms(node: Optional[List[str]] = NodeOption, output: Optional[str] = OutputOption):
+    """Export all VMs."""
+    _write(get_pve_conn().export.export_vms(nodes=node), output)
+
+
+@app.command()
+def tasks(node: Optional[List[str]] = NodeOption, output: Optional[str] = OutputOption):
+    """Export all tasks."""
+    _write(get_pve_conn().export.export_tasks(nodes=node), output)
+
+
+@app.command()
+def storage(node: Optional[List[str]] = NodeOption, output: Optional[str] = OutputOption):
+    """Export all storage volumes."""
+    _write(get_pve_conn().export.export_storage_volumes(nodes=node), output)
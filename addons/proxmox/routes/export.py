@@ -0,0 +1,44 @@
+# export_routes.py
+from typing import List, Optional
+from fastapi import Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRouter
+from proxmox.service.proxmox import Proxmox
+from proxmox import API_VERSION, NAME
+from proxmox.service import proxmox
+
+from clicx.utils.streaming import NDJSON_MEDIA_TYPE, stream_ndjson
+
+def get_pve_conn() -> Proxmox:
+    return proxmox.get_connection()
+
+router = APIRouter(
+    prefix=f"/{NAME}/{API_VERSION}/export",
+    tags=["Export"],
+)
+
+dependency = []
+
+NodeFilter = Query(None, description="Nodes to export, all online nodes by default. Repeat for several nodes.")
+
+def _stream(export, node: Optional[List[str]]) -> StreamingResponse:
+    try:
+        source = export(nodes=node)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to start export: {str(e)}")
+    return StreamingResponse(stream_ndjson(source), media_type=NDJSON_MEDIA_TYPE)
+
+@router.get("/vms", response_class=StreamingResponse)
+def export_vms(node: Optional[List[str]] = NodeFilter, pve: Proxmox = Depends(get_pve_conn)):
+    """Stream every VM as newline delimited JSON."""
+    return _stream(pve.export.export_vms, node)
+
+@router.get("/tasks", response_class=StreamingResponse)
+def export_tasks(node: Optional[List[str]] = NodeFilter, pve: Proxmox = Depends(get_pve_conn)):
+    """Stream every task as newline delimited JSON."""
+    return _stream(pve.export.export_tasks, node)
+
+@router.get("/storage", response_class=StreamingResponse)
+def export_storage_volumes(node: Optional[List[str]] = NodeFilter, pve: Proxmox = Depends(get_pve_conn)):
+    """Stream every storage volume as newline delimited JSON."""
+    return _stream(pve.export.export_storage_volumes, node)
@@ -0,0 +1,56 @@
+# feed_routes.py
+import anyio
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.routing import APIRouter
+from proxmox import API_VERSION, NAME
+from proxmox.service import proxmox
+from proxmox.service.feed import ClusterFeed
+
+from clicx.config import configuration
+
+import logging
+_logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix=f"/{NAME}/{API_VERSION}/feed",
+    tags=["Live Feed"],
+)
+
+dependency = []
+
+def _list_resources():
+    return proxmox.get_connection().cluster.list_resources()
+
+# NOTE: One feed per worker process, every viewer shares its upstream poll
+feed = ClusterFeed(
+    fetch=_list_resources,
+    interval=float(configuration.env.get('FEED_INTERVAL', 2)),
+    queue_size=int(configuration.env.get('FEED_QUEUE_SIZE', 32)),
+)
+
+@router.websocket("/cluster")
+async def cluster_feed(websocket: WebSocket):
+    """
+    Push a snapshot of the cluster resources on connect followed by deltas.
+    """
+    await websocket.accept()
+
+    async def send_updates(subscriber):
+        async for message in subscriber.messages():
+            await websocket.send_text(message)
+
+    try:
+        async with feed.subscribe() as subscriber:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(send_updates, subscriber)
+                # Incoming messages are ignored, receiving only detects the disconnect
+                try:
+                    while True:
+                        await websocket.receive_text()
+                except WebSocketDisconnect:
+                    tg.cancel_scope.cancel()
+    # NOTE: The task group raises the errors of its tasks as an ExceptionGroup
+    except* WebSocketDisconnect:
+        pass
+    except* Exception as group:
+        _logger.error(f"Cluster feed connection failed: {'; '.join(str(e) for e in group.exceptions)}")
@@ -1,11 +1,13 @@
-from typing import Any
-from fastapi import Depends
+from typing import Any, List
+from fastapi import Depends, Response
 from fastapi.routing import APIRouter
 from proxmox.models.auth import TokenAuth
 from proxmox.middleware.auth import pass_through_authentication
 from proxmox.service import proxmox
 from proxmox.service.proxmox import Proxmox
+from proxmox.schema.node import ClusterResource, Node, NodeStatus
 from clicx.config import configuration
+from clicx.utils.listing import ListParams
 
 from proxmox import API_VERSION,NAME
 
@@ -23,7 +25,7 @@ def get_pve_conn():
 @router.get("/")
 def Proxmox_Root(pve: Proxmox = Depends(get_pve_conn)) -> Any:
     return {
-        "get_version": f"{pve.get_version()}",
+        "get_version": pve.get_version(),
     }
 
 @router.get("/list_all_nodes")
@@ -35,18 +37,22 @@ def list_all_nodes(pve: Proxmox = Depends(get_pve_conn)) -> Any:
        
     return nodes
 
-@router.get("/list_nodes")
-def list_nodes(pve: Proxmox = Depends(get_pve_conn)) -> Any:
-    return pve.cluster.list_nodes()
+@router.get("/list_nodes", response_model=List[Node], response_model_exclude_unset=True)
+def list_nodes(
+    response: Response,
+    params: ListParams = Depends(),
+    pve: Proxmox = Depends(get_pve_conn)
+) -> Any:
+    return params.apply(pve.cluster.list_nodes(), response, key=("node",))
    
-@router.get("/get_node_status")
+@router.get("/get_node_status", response_model=NodeStatus, response_model_exclude_unset=True)
 def get_node_status(node: str, pve: Proxmox = Depends(get_pve_conn)) -> Any:
-    return {
-        "node_status": f"{pve.cluster.get_node_status(node=node)}",
-    }
-
-@router.get("/list_resources")
-def list_resources(pve: Proxmox = Depends(get_pve_conn)) -> Any:
-    return {
-        "resources": f"{pve.cluster.list_resources()}",
-    }
\ No newline at end of file
+    return pve.cluster.get_node_status(node=node)
+
+@router.get("/list_resources", response_model=List[ClusterResource], response_model_exclude_unset=True)
+def list_resources(
+    response: Response,
+    params: ListParams = Depends(),
+    pve: Proxmox = Depends(get_pve_conn)
+) -> Any:
+    return params.apply(pve.cluster.list_resources(), response, key=("id",))
\ No newline at end of file
@@ -5,6 +5,10 @@ from proxmox.service.proxmox import Proxmox
 from proxmox import API_VERSION, NAME
 from proxmox.service import proxmox
 
+from clicx.utils.admission import route_class
+from clicx.utils.deadline import Deadline, DeadlineExceeded, request_deadline
+from clicx.utils.executors import LONG_RUNNING_AGENT, executor_class
+
 def get_pve_conn() -> Proxmox:
     return proxmox.get_connection()
 
@@ -55,12 +59,17 @@ def get_qemu_agent_info(
         raise HTTPException(status_code=500, detail=f"Failed to get QEMU agent status: {str(e)}")
     
 @router.get(path="/check_apt_writable")
+@route_class("agent_exec")
+@executor_class(LONG_RUNNING_AGENT)
 def check_apt_writable(
     node: str, 
     vmid: int,
+    deadline: Deadline = Depends(request_deadline),
     pve: Proxmox = Depends(get_pve_conn)
 ):
     try:
-        return pve.qemu.check_apt_writable(node=node, vmid=vmid)
+        return pve.qemu.check_apt_writable(node=node, vmid=vmid, deadline=deadline)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get QEMU memory blocks: {str(e)}")
\ No newline at end of file
@@ -5,6 +5,10 @@ from proxmox.service.proxmox import Proxmox
 from proxmox import API_VERSION, NAME
 from proxmox.service import proxmox
 
+from clicx.utils.admission import route_class
+from clicx.utils.deadline import Deadline, DeadlineExceeded, request_deadline, route_timeout
+from clicx.utils.executors import LONG_RUNNING_AGENT
+
 def get_pve_conn() -> Proxmox:
     return proxmox.get_connection()
 
@@ -15,14 +19,23 @@ router = APIRouter(
 
 dependency = []
 
+# NOTE: Every route runs scripts through the guest agent and can take minutes
+executor = LONG_RUNNING_AGENT
+
 @router.post(path="/install_docker_engine")
-def install_docker_engine(node: str, vmid: int, pve: Proxmox = Depends(get_pve_conn)):
+@route_class("agent_exec")
+@route_timeout(1800)
+def install_docker_engine(node: str, vmid: int, deadline: Deadline = Depends(request_deadline), pve: Proxmox = Depends(get_pve_conn)):
     try:
-        return pve.software.install_docker_engine(node, vmid)
+        return pve.software.install_docker_engine(node, vmid, deadline=deadline)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to install Docker engine: {str(e)}")
 
 @router.post(path="/pull_docker_image")
+@route_class("agent_exec")
+@route_timeout(1800)
 def pull_docker_image(
     node: str, 
     vmid: int, 
@@ -31,6 +44,7 @@ def pull_docker_image(
     port_mapping: str = "", 
     volume_mapping: str = "", 
     env_vars: str = "",
+    deadline: Deadline = Depends(request_deadline),
     pve: Proxmox = Depends(get_pve_conn)
 ):
     try:
@@ -41,57 +55,78 @@ def pull_docker_image(
             container_name=container_name,
             port_mapping=port_mapping,
             volume_mapping=volume_mapping,
-            env_vars=env_vars
+            env_vars=env_vars,
+            deadline=deadline
         )
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to pull Docker image: {str(e)}")
 
 @router.post(path="/stop_docker_image")
+@route_class("agent_exec")
 def stop_docker_image(
     node: str, 
     vmid: int, 
     container_name: str, 
     remove_container: bool,
+    deadline: Deadline = Depends(request_deadline),
     pve: Proxmox = Depends(get_pve_conn)
 ):
     try:
-        return pve.software.stop_docker_image(node, vmid, container_name, remove_container)
+        return pve.software.stop_docker_image(node, vmid, container_name, remove_container, deadline=deadline)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to stop Docker container: {str(e)}")
 
 @router.post(path="/create_proxy_conf")
+@route_class("agent_exec")
 def create_proxy_conf(
     node: str, 
     hostname: str, 
     ip: str, 
     vmid: int = 3000,
+    deadline: Deadline = Depends(request_deadline),
     pve: Proxmox = Depends(get_pve_conn)
 ):
     try:
-        return pve.software.create_proxy_conf(node, vmid, hostname, ip)
+        return pve.software.create_proxy_conf(node, vmid, hostname, ip, deadline=deadline)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create proxy configuration: {str(e)}")
 
 @router.post(path="/configure_vm")
+@route_class("agent_exec")
+@route_timeout(1800)
 def configure_vm(
     node: str, 
     vmid: int, 
     config_name: str,
+    deadline: Deadline = Depends(request_deadline),
     pve: Proxmox = Depends(get_pve_conn)
 ):
     try:
-        return pve.software.configure_vm(node=node, vmid=vmid, script_name=config_name)
+        return pve.software.configure_vm(node=node, vmid=vmid, script_name=config_name, deadline=deadline)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to configure VM: {str(e)}")
 
 @router.post(path="/configure_vm_custom")
+@route_class("agent_exec")
+@route_timeout(1800)
 def configure_vm_custom(
     node: str, 
     vmid: int, 
     config_file: UploadFile = File(...),
+    deadline: Deadline = Depends(request_deadline),
     pve: Proxmox = Depends(get_pve_conn)
 ):
     try:
-        return pve.software.configure_vm_custom(node=node, vmid=vmid, script_file=config_file)
+        return pve.software.configure_vm_custom(node=node, vmid=vmid, script_file=config_file, deadline=deadline)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to configure VM with custom file: {str(e)}")
\ No newline at end of file
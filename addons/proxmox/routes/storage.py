@@ -1,10 +1,14 @@
-# qemu_routes.py
-from fastapi import HTTPException, Depends
+# storage_routes.py
+from typing import List
+from fastapi import HTTPException, Depends, Response
 from fastapi.routing import APIRouter
 from proxmox.service.proxmox import Proxmox
+from proxmox.schema.storage import DiskSize, Storage, StorageContent
 from proxmox import API_VERSION, NAME
 from proxmox.service import proxmox
 
+from clicx.utils.listing import ListParams
+
 def get_pve_conn() -> Proxmox:
     return proxmox.get_connection()
 
@@ -16,7 +20,7 @@ router = APIRouter(
 dependency = []
 
 
-@router.get(path="/get_disk_size")
+@router.get(path="/get_disk_size", response_model=DiskSize)
 def get_disk_size(
     node: str, 
     vmid: int,
@@ -30,3 +34,31 @@ def get_disk_size(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get storage size: {str(e)}")
+
+@router.get(path="/list_storage", response_model=List[Storage], response_model_exclude_unset=True)
+def list_storage(
+    node: str,
+    response: Response,
+    params: ListParams = Depends(),
+    pve: Proxmox = Depends(get_pve_conn)
+):
+    try:
+        return params.apply(pve.storage.get_storage(node=node), response, key=("storage",))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list storage: {str(e)}")
+
+@router.get(path="/get_iso_files", response_model=List[StorageContent], response_model_exclude_unset=True)
+def get_iso_files(
+    node: str,
+    response: Response,
+    params: ListParams = Depends(),
+    pve: Proxmox = Depends(get_pve_conn)
+):
+    try:
+        return params.apply(pve.storage.get_iso_files(node=node), response, key=("volid",))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list ISO files: {str(e)}")
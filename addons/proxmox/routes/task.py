@@ -1,10 +1,14 @@
 # task_routes.py
-from fastapi import HTTPException, Depends
+from typing import List
+from fastapi import HTTPException, Depends, Response
 from fastapi.routing import APIRouter
 from proxmox.service.proxmox import Proxmox
+from proxmox.schema.task import Task, TaskLogLine, TaskStatus
 from proxmox import API_VERSION, NAME
 from proxmox.service import proxmox
 
+from clicx.utils.listing import ListParams
+
 def get_pve_conn() -> Proxmox:
     return proxmox.get_connection()
 
@@ -16,7 +20,7 @@ router = APIRouter(
 dependency = []
 
 
-@router.get("/get_task_status")
+@router.get("/get_task_status", response_model=TaskStatus, response_model_exclude_unset=True)
 def get_task_status(
     node: str, 
     upid: str,
@@ -27,17 +31,22 @@ def get_task_status(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get task status: {str(e)}")
 
-@router.get("/list_tasks")
+@router.get("/list_tasks", response_model=List[Task], response_model_exclude_unset=True)
 def list_tasks(
     node: str,
+    response: Response,
+    params: ListParams = Depends(),
     pve: Proxmox = Depends(get_pve_conn)
 ):
     try:
-        return pve.task.list_tasks(node=node)
+        # NOTE: Newest first, like the upstream listing
+        return params.apply(pve.task.list_tasks(node=node), response, key=("starttime", "upid"), reverse=True)
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list tasks: {str(e)}")
 
-@router.get("/get_task_logs")
+@router.get("/get_task_logs", response_model=List[TaskLogLine])
 def get_task_logs(
     node: str, 
     upid: str,
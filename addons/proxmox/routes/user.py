@@ -0,0 +1,34 @@
+# user_routes.py
+from typing import List
+from fastapi import HTTPException, Depends, Response
+from fastapi.routing import APIRouter
+from proxmox.service.proxmox import Proxmox
+from proxmox.schema.user import User
+from proxmox import API_VERSION, NAME
+from proxmox.service import proxmox
+
+from clicx.utils.listing import ListParams
+
+def get_pve_conn() -> Proxmox:
+    return proxmox.get_connection()
+
+router = APIRouter(
+    prefix=f"/{NAME}/{API_VERSION}/user",
+    tags=["User Management"],
+)
+
+dependency = []
+
+
+@router.get("/list_users", response_model=List[User], response_model_exclude_unset=True)
+def list_users(
+    response: Response,
+    params: ListParams = Depends(),
+    pve: Proxmox = Depends(get_pve_conn)
+):
+    try:
+        return params.apply(pve.user.list_users(), response, key=("userid",))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list users: {str(e)}")
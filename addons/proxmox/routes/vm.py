@@ -1,13 +1,18 @@
 # vm_routes.py
-from typing import Any
+from typing import Any, List
 import validators
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException, Depends, Request, Response
 from fastapi.routing import APIRouter
 from proxmox.service.proxmox import Proxmox
-from proxmox.schema.vm import CloneVM, VirtualMachine
+from proxmox.schema.vm import CloneVM, VirtualMachine, VirtualMachineDetails, VirtualMachineStatus, VirtualMachineSummary
 from proxmox import API_VERSION, NAME
 from proxmox.service import proxmox
 
+from clicx.config import configuration
+from clicx.utils.admission import route_class
+from clicx.utils.cache import ResponseCache
+from clicx.utils.listing import ListParams
+
 def get_pve_conn() -> Proxmox:
     return proxmox.get_connection()
 
@@ -17,6 +22,8 @@ router = APIRouter(
 )
 dependency = []
 
+_cache = ResponseCache()
+
 @router.get(path="/get_vm_ids")
 def get_vm_ids(node: str, pve: Proxmox = Depends(get_pve_conn)) -> Any:
     try:
@@ -25,9 +32,15 @@ def get_vm_ids(node: str, pve: Proxmox = Depends(get_pve_conn)) -> Any:
         raise HTTPException(status_code=500, detail=f"Failed to get VM IDs: {str(e)}")
 
 @router.get(path="/get_all_configurations")
-def get_all_configurations(pve: Proxmox = Depends(get_pve_conn)) -> Any:
+def get_all_configurations(request: Request, pve: Proxmox = Depends(get_pve_conn)) -> Any:
     try:
-        return pve.vm.get_all_configurations()
+        # NOTE: Re-rendered when a new configuration snapshot is loaded
+        return _cache.respond(
+            request,
+            render=pve.vm.get_all_configurations,
+            version=configuration.snapshot.version,
+            media_type="application/json",
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get configurations: {str(e)}")
 
@@ -41,6 +54,7 @@ def get_next_available_vm_id(pve: Proxmox = Depends(get_pve_conn)) -> Any:
         raise HTTPException(status_code=500, detail=f"Failed to get next available VM ID: {str(e)}")
 
 @router.post(path="/clone_vm")
+@route_class("clone")
 def clone_vm(
     node: str, 
     vm_config: CloneVM,
@@ -56,6 +70,7 @@ def clone_vm(
         raise HTTPException(status_code=500, detail=f"Failed to clone VM: {str(e)}")
 
 @router.post(path="/create_vm")
+@route_class("clone")
 def create_vm(
     node: str, 
     vm_config: VirtualMachine,
@@ -81,13 +96,17 @@ def resize_disk(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to resize disk: {str(e)}")
 
-@router.get("/list_vms")
+@router.get("/list_vms", response_model=List[VirtualMachineSummary], response_model_exclude_unset=True)
 def list_vms(
     node: str,
+    response: Response,
+    params: ListParams = Depends(),
     pve: Proxmox = Depends(get_pve_conn)
 ) -> Any:
     try:
-        return pve.vm.list_vms(node=node)
+        return params.apply(pve.vm.list_vms(node=node), response, key=("vmid",))
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list VMs: {str(e)}")
 
@@ -98,7 +117,7 @@ def list_all_vm_ids(pve: Proxmox = Depends(get_pve_conn)) -> Any:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list all VM IDs: {str(e)}")
 
-@router.get("/get_vm_status")
+@router.get("/get_vm_status", response_model=VirtualMachineStatus, response_model_exclude_unset=True)
 def get_vm_status(
     node: str, 
     vmid: str,
@@ -120,6 +139,23 @@ def get_vm_config(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get VM configuration: {str(e)}")
 
+@router.get("/{node}/{vmid}/details", response_model=VirtualMachineDetails, response_model_exclude_unset=True)
+def get_vm_details(
+    node: str,
+    vmid: int,
+    disk_name: str = 'scsi0',
+    pve: Proxmox = Depends(get_pve_conn)
+) -> Any:
+    """
+    Everything needed to render a VM in one call. Fields the upstream could
+    not deliver (e.g. the IP while the guest agent is down) are null and
+    listed in `errors`.
+    """
+    try:
+        return pve.vm.get_vm_details(node=node, vmid=vmid, disk_name=disk_name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get VM details: {str(e)}")
+
 @router.delete("/delete_vm")
 def delete_vm(
     node: str, 
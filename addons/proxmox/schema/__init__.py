@@ -1 +1,5 @@
-from . import vm
\ No newline at end of file
+from . import vm
+from . import node
+from . import task
+from . import storage
+from . import user
\ No newline at end of file
@@ -0,0 +1,54 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class Node(BaseModel):
+    node: str = Field(..., description="Node name.")
+    status: Optional[str] = Field(None, description="Node status, online, offline or unknown.")
+    cpu: Optional[float] = Field(None, description="CPU utilization.")
+    maxcpu: Optional[int] = Field(None, description="Number of available CPUs.")
+    mem: Optional[int] = Field(None, description="Used memory in bytes.")
+    maxmem: Optional[int] = Field(None, description="Number of available memory in bytes.")
+    disk: Optional[int] = Field(None, description="Used root disk space in bytes.")
+    maxdisk: Optional[int] = Field(None, description="Root disk size in bytes.")
+    uptime: Optional[int] = Field(None, description="Node uptime in seconds.")
+
+    class Config:
+        extra = 'allow'
+
+
+class NodeStatus(BaseModel):
+    cpu: Optional[float] = Field(None, description="CPU utilization.")
+    uptime: Optional[int] = Field(None, description="Node uptime in seconds.")
+    loadavg: Optional[List[Any]] = Field(None, description="Load average (1, 5, 15 minutes).")
+    memory: Optional[Dict[str, Any]] = Field(None, description="Memory usage in bytes.")
+    swap: Optional[Dict[str, Any]] = Field(None, description="Swap usage in bytes.")
+    rootfs: Optional[Dict[str, Any]] = Field(None, description="Root filesystem usage in bytes.")
+    cpuinfo: Optional[Dict[str, Any]] = Field(None, description="CPU model and topology.")
+    kversion: Optional[str] = Field(None, description="Kernel version.")
+    pveversion: Optional[str] = Field(None, description="Proxmox VE version.")
+
+    class Config:
+        extra = 'allow'
+
+
+class ClusterResource(BaseModel):
+    id: str = Field(..., description="Resource id, e.g. qemu/100 or node/pve1.")
+    type: Optional[str] = Field(None, description="Resource type, node, qemu, lxc, storage, pool or sdn.")
+    node: Optional[str] = Field(None, description="Node the resource is located on.")
+    status: Optional[str] = Field(None, description="Resource status.")
+    name: Optional[str] = Field(None, description="Name of the VM or container.")
+    vmid: Optional[int] = Field(None, description="VM or container id.")
+    storage: Optional[str] = Field(None, description="Storage id.")
+    pool: Optional[str] = Field(None, description="Resource pool.")
+    tags: Optional[str] = Field(None, description="Semicolon separated list of tags.")
+    cpu: Optional[float] = Field(None, description="CPU utilization.")
+    maxcpu: Optional[float] = Field(None, description="Number of available CPUs.")
+    mem: Optional[int] = Field(None, description="Used memory in bytes.")
+    maxmem: Optional[int] = Field(None, description="Number of available memory in bytes.")
+    disk: Optional[int] = Field(None, description="Used disk space in bytes.")
+    maxdisk: Optional[int] = Field(None, description="Disk size in bytes.")
+    uptime: Optional[int] = Field(None, description="Uptime in seconds.")
+
+    class Config:
+        extra = 'allow'
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class Storage(BaseModel):
+    storage: str = Field(..., description="Storage id.")
+    type: Optional[str] = Field(None, description="Storage type, e.g. dir, lvmthin or nfs.")
+    content: Optional[str] = Field(None, description="Comma separated list of allowed content types.")
+    active: Optional[int] = Field(None, description="Set when the storage is active.")
+    enabled: Optional[int] = Field(None, description="Set when the storage is enabled.")
+    shared: Optional[int] = Field(None, description="Set when the storage is shared between nodes.")
+    total: Optional[int] = Field(None, description="Total storage space in bytes.")
+    used: Optional[int] = Field(None, description="Used storage space in bytes.")
+    avail: Optional[int] = Field(None, description="Available storage space in bytes.")
+
+    class Config:
+        extra = 'allow'
+
+
+class StorageContent(BaseModel):
+    volid: str = Field(..., description="Volume identifier.")
+    content: Optional[str] = Field(None, description="Content type, e.g. iso or images.")
+    format: Optional[str] = Field(None, description="Format identifier, e.g. raw or iso.")
+    size: Optional[int] = Field(None, description="Volume size in bytes.")
+    ctime: Optional[int] = Field(None, description="Creation time as unix timestamp.")
+    storage_name: Optional[str] = Field(None, description="Storage the volume is located on.")
+
+    class Config:
+        extra = 'allow'
+
+
+class DiskSize(BaseModel):
+    space: float = Field(..., description="Disk size in GB.")
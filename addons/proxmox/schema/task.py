@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Union
+
+
+class Task(BaseModel):
+    upid: str = Field(..., description="Unique task id.")
+    node: Optional[str] = Field(None, description="Node the task runs on.")
+    type: Optional[str] = Field(None, description="Task type, e.g. qmclone or qmstart.")
+    id: Optional[str] = Field(None, description="Id of the object the task works on.")
+    user: Optional[str] = Field(None, description="User that started the task.")
+    status: Optional[str] = Field(None, description="Exit status of a finished task.")
+    starttime: Optional[int] = Field(None, description="Start time as unix timestamp.")
+    endtime: Optional[int] = Field(None, description="End time as unix timestamp.")
+
+    class Config:
+        extra = 'allow'
+
+
+class TaskStatus(BaseModel):
+    upid: str = Field(..., description="Unique task id.")
+    node: Optional[str] = Field(None, description="Node the task runs on.")
+    status: str = Field(..., description="running or stopped.")
+    exitstatus: Optional[str] = Field(None, description="Exit status once the task is stopped.")
+    type: Optional[str] = Field(None, description="Task type, e.g. qmclone or qmstart.")
+    id: Optional[str] = Field(None, description="Id of the object the task works on.")
+    user: Optional[str] = Field(None, description="User that started the task.")
+    pid: Optional[int] = Field(None, description="Process id of the task.")
+    starttime: Optional[int] = Field(None, description="Start time as unix timestamp.")
+
+    class Config:
+        extra = 'allow'
+
+
+class TaskLogLine(BaseModel):
+    n: int = Field(..., description="Line number.")
+    t: Union[str, int, float] = Field(..., description="Line content.")
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class User(BaseModel):
+    userid: str = Field(..., description="User id, e.g. root@pam.")
+    enable: Optional[int] = Field(None, description="Set when the account is enabled.")
+    expire: Optional[int] = Field(None, description="Account expiration date as unix timestamp, 0 for never.")
+    firstname: Optional[str] = Field(None, description="First name.")
+    lastname: Optional[str] = Field(None, description="Last name.")
+    email: Optional[str] = Field(None, description="Email address.")
+    comment: Optional[str] = Field(None, description="Comment.")
+
+    class Config:
+        extra = 'allow'
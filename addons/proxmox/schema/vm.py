@@ -44,3 +44,41 @@ class CloneVM(BaseModel):
             }
         }
 
+
+class VirtualMachineSummary(BaseModel):
+    vmid: int = Field(..., description="The VMID of the VM.")
+    name: Optional[str] = Field(None, description="Name of the VM.")
+    status: Optional[str] = Field(None, description="VM status, running or stopped.")
+    tags: Optional[str] = Field(None, description="Semicolon separated list of tags.")
+    template: Optional[int] = Field(None, description="Set when the VM is a template.")
+    cpus: Optional[float] = Field(None, description="Number of available CPUs.")
+    cpu: Optional[float] = Field(None, description="CPU utilization.")
+    maxmem: Optional[int] = Field(None, description="Maximum memory in bytes.")
+    mem: Optional[int] = Field(None, description="Used memory in bytes.")
+    maxdisk: Optional[int] = Field(None, description="Root disk size in bytes.")
+    disk: Optional[int] = Field(None, description="Used root disk space in bytes.")
+    uptime: Optional[int] = Field(None, description="Uptime in seconds.")
+    netin: Optional[int] = Field(None, description="Received network traffic in bytes.")
+    netout: Optional[int] = Field(None, description="Sent network traffic in bytes.")
+    diskread: Optional[int] = Field(None, description="Bytes read from disk.")
+    diskwrite: Optional[int] = Field(None, description="Bytes written to disk.")
+
+    class Config:
+        extra = 'allow'
+
+class VirtualMachineStatus(VirtualMachineSummary):
+    qmpstatus: Optional[str] = Field(None, description="VM run state from the QMP monitor.")
+    agent: Optional[int] = Field(None, description="Set when the QEMU guest agent is enabled.")
+    pid: Optional[int] = Field(None, description="Process id of the VM.")
+    ha: Optional[Dict[str, Any]] = Field(None, description="HA manager state.")
+
+
+class VirtualMachineDetails(BaseModel):
+    node: str = Field(..., description="Node the VM runs on.")
+    vmid: int = Field(..., description="The VMID of the VM.")
+    status: Optional[VirtualMachineStatus] = Field(None, description="Current status of the VM.")
+    config: Optional[Dict[str, Any]] = Field(None, description="VM configuration.")
+    agent: Optional[str] = Field(None, description="QEMU guest agent state, running when it answers a ping.")
+    ip: Optional[str] = Field(None, description="First address of eth0 reported by the guest agent.")
+    disk_size: Optional[str] = Field(None, description="Size of the requested disk, e.g. 32G.")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Fields that could not be fetched and why.")
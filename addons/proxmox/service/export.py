@@ -0,0 +1,91 @@
+import logging
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional
+
+from proxmox.service.task import TaskManagement
+
+from clicx.utils.streaming import ConcurrentIterator
+
+_logger = logging.getLogger(__name__)
+
+class ExportManagement():
+    """
+    Streams listings across all nodes for reporting.
+
+    Every export fetches the nodes concurrently and yields the records as they
+    arrive, so memory use does not grow with the size of the cluster.
+    """
+
+    def __init__(self, connection):
+        self._proxmoxer  = connection
+        self._task = TaskManagement(connection)
+
+    def list_online_nodes(self) -> List[str]:
+        """List the names of all online nodes."""
+        return [
+            node['node'] for node in self._proxmoxer.nodes.get()
+            if node.get('status', 'online') == 'online'
+        ]
+
+    def _export(self, producer, nodes: Optional[List[str]], max_workers: int, buffer_size: int) -> ConcurrentIterator:
+        nodes = nodes or self.list_online_nodes()
+        return ConcurrentIterator(
+            producers=[partial(producer, node) for node in nodes],
+            max_workers=max_workers,
+            buffer_size=buffer_size,
+        )
+
+#######################
+# MARK: Per node producers
+#######################
+
+    def _node_vms(self, node: str) -> Iterator[Dict[str, Any]]:
+        try:
+            for vm in self._proxmoxer.nodes(node).qemu.get():
+                vm['node'] = node
+                yield vm
+        except Exception as e:
+            _logger.error(f"Failed to export VMs of node {node}: {e}")
+            yield {'node': node, 'error': str(e)}
+
+    def _node_tasks(self, node: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        try:
+            yield from self._task.iter_tasks(node=node, **kwargs)
+        except Exception as e:
+            _logger.error(f"Failed to export tasks of node {node}: {e}")
+            yield {'node': node, 'error': str(e)}
+
+    def _node_volumes(self, node: str) -> Iterator[Dict[str, Any]]:
+        try:
+            storages = self._proxmoxer.nodes(node).storage.get(enabled=1)
+        except Exception as e:
+            _logger.error(f"Failed to list storage of node {node}: {e}")
+            yield {'node': node, 'error': str(e)}
+            return
+
+        for storage in storages:
+            storage_id = storage['storage']
+            try:
+                for volume in self._proxmoxer.nodes(node).storage(storage_id).content.get():
+                    volume['node'] = node
+                    volume['storage_name'] = storage_id
+                    yield volume
+            except Exception as e:
+                _logger.warning(f"Could not export volumes from storage '{storage_id}' on node {node}: {e}")
+                yield {'node': node, 'storage_name': storage_id, 'error': str(e)}
+
+#######################
+# MARK: Exports
+#######################
+
+    def export_vms(self, nodes: Optional[List[str]] = None, max_workers: int = 8, buffer_size: int = 256) -> ConcurrentIterator:
+        """Stream all VMs of the given nodes, all online nodes by default."""
+        return self._export(self._node_vms, nodes, max_workers, buffer_size)
+
+    def export_tasks(self, nodes: Optional[List[str]] = None, max_workers: int = 8, buffer_size: int = 256) -> ConcurrentIterator:
+        """Stream all tasks of the given nodes, all online nodes by default."""
+        return self._export(self._node_tasks, nodes, max_workers, buffer_size)
+
+    def export_storage_volumes(self, nodes: Optional[List[str]] = None, max_workers: int = 8, buffer_size: int = 256) -> ConcurrentIterator:
+        """Stream all storage volumes of the given nodes, all online nodes by default."""
+        return self._export(self._node_volumes, nodes, max_workers, buffer_size)
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import anyio
+
+from clicx.utils.responses import dumps
+
+_logger = logging.getLogger(__name__)
+
+# Put in a subscriber queue when it overflowed, the subscriber gets a new snapshot
+_RESYNC = object()
+
+
+class FeedSubscriber:
+    def __init__(self, feed: "ClusterFeed", queue_size: int):
+        self.feed = feed
+        self.queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=queue_size)
+
+    def push(self, message: str):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # The client is too slow, drop its backlog and resync it
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_RESYNC)
+
+    async def messages(self) -> AsyncIterator[str]:
+        """Yield the encoded snapshot followed by the deltas."""
+        await self.feed.ready.wait()
+        yield self.feed.snapshot_message()
+        while True:
+            message = await self.queue.get()
+            yield self.feed.snapshot_message() if message is _RESYNC else message
+
+
+class ClusterFeed:
+    """
+    Shares one upstream poll of the cluster resources between all subscribers.
+
+    The poll only runs while there is at least one subscriber. Each poll is
+    diffed against the previous one and only the changes are pushed:
+
+        {"type": "snapshot", "seq": 1, "resources": {"qemu/100": {...}, "node/pve1": {...}}}
+        {"type": "delta", "seq": 2, "changed": {"qemu/100": {"cpu": 0.12}}, "added": {}, "removed": []}
+
+    Messages are encoded once per poll, no matter how many subscribers there are.
+
+    Args:
+        fetch: Callable returning the cluster resources, runs in a worker thread
+        interval: Seconds between two upstream polls
+        queue_size: Number of undelivered messages before a subscriber is resynced
+    """
+
+    def __init__(self, fetch: Callable[[], list], interval: float = 2.0, queue_size: int = 32):
+        self.fetch = fetch
+        self.interval = interval
+        self.queue_size = queue_size
+        self.ready = asyncio.Event()
+        self._subscribers = set()
+        self._resources: Dict[str, Dict[str, Any]] = {}
+        self._seq = 0
+        self._snapshot: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @staticmethod
+    def diff(previous: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Compute the changes between two resource maps, None when nothing changed."""
+        changed = {}
+        added = {}
+        for resource_id, resource in current.items():
+            old = previous.get(resource_id)
+            if old is None:
+                added[resource_id] = resource
+            elif old != resource:
+                fields = {key: value for key, value in resource.items() if old.get(key) != value}
+                fields.update({key: None for key in old.keys() - resource.keys()})
+                changed[resource_id] = fields
+        removed = [resource_id for resource_id in previous if resource_id not in current]
+
+        if not (changed or added or removed):
+            return None
+        return {"changed": changed, "added": added, "removed": removed}
+
+    def snapshot_message(self) -> str:
+        if self._snapshot is None:
+            self._snapshot = dumps({"type": "snapshot", "seq": self._seq, "resources": self._resources}).decode()
+        return self._snapshot
+
+    def _broadcast(self, message: Dict[str, Any]):
+        encoded = dumps(message).decode()
+        for subscriber in list(self._subscribers):
+            subscriber.push(encoded)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        return {resource['id']: resource for resource in self.fetch()}
+
+    async def _run(self):
+        try:
+            while self._subscribers:
+                try:
+                    current = await anyio.to_thread.run_sync(self._load)
+                except Exception as e:
+                    _logger.error(f"Cluster feed poll failed: {e}")
+                    self._broadcast({"type": "error", "detail": str(e)})
+                else:
+                    delta = self.diff(self._resources, current)
+                    self._resources = current
+                    if delta is not None or not self.ready.is_set():
+                        self._seq += 1
+                        self._snapshot = None
+                    if delta is not None and self.ready.is_set():
+                        self._broadcast({"type": "delta", "seq": self._seq, **delta})
+                # NOTE: Also set after a failed first poll, the empty snapshot is
+                # followed by the error and later by a delta adding everything
+                self.ready.set()
+                await asyncio.sleep(self.interval)
+        finally:
+            # NOTE: Without subscribers the state goes stale, the next subscriber starts fresh
+            self._task = None
+            self._resources = {}
+            self._snapshot = None
+            self.ready.clear()
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[FeedSubscriber]:
+        subscriber = FeedSubscriber(self, self.queue_size)
+        self._subscribers.add(subscriber)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        try:
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
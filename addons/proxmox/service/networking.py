@@ -3,6 +3,15 @@ from typing import Any, Dict, List, Optional
 
 _logger = logging.getLogger(__name__)
 
+
+def parse_vm_ip(interfaces: Dict[str, Any], interface_name: str = "eth0") -> Optional[str]:
+    """Return the first address of an interface from the agent `network-get-interfaces` result."""
+    for interface in interfaces.get("result", []):
+        if interface.get("name") == interface_name:
+            for ip_info in interface.get("ip-addresses", []):
+                return ip_info.get("ip-address")
+    return None
+
 class NetworkManagment():
 
     def __init__(self, connection):
@@ -26,12 +35,11 @@ class NetworkManagment():
         """
         try:
             vm_status = self._proxmoxer.nodes(node).qemu(vmid).agent('network-get-interfaces').get()
-            for interface in vm_status.get("result", []):
-                if interface.get("name") == "eth0":
-                    for ip_info in interface.get("ip-addresses", []):
-                        return {
-                            'ip': ip_info.get("ip-address")
-                        }
+            ip = parse_vm_ip(vm_status)
+            if ip:
+                return {
+                    'ip': ip
+                }
 
             _logger.warning(f"IP address not found for VM {vmid}")
             return None
@@ -8,6 +8,7 @@ from clicx.config import configuration
 
 # Import managers
 from proxmox.service.cluster import ClusterManagement
+from proxmox.service.export import ExportManagement
 from proxmox.service.networking import NetworkManagment
 from proxmox.service.qemu import QemuAgentManagement
 from proxmox.service.software import SoftwareMangement
@@ -70,7 +71,6 @@ class Proxmox:
 
         
         self._host = host
-        self.available_nodes = list(configuration.loaded_config.get("available_nodes"))
         
         self.vm = VirtualMachineManagement(self._proxmoxer)
         self.network = NetworkManagment(self._proxmoxer)
@@ -79,6 +79,7 @@ class Proxmox:
         self.cluster = ClusterManagement(self._proxmoxer)
         self.storage = StorageManagement(self._proxmoxer)
         self.user = UserManagement(self._proxmoxer)
+        self.export = ExportManagement(self._proxmoxer)
         
         # NOTE inherits from QemuAgentManagement
         self.software = SoftwareMangement(self._proxmoxer)
@@ -88,6 +89,11 @@ class Proxmox:
         """Get the host address."""
         return self._host
     
+    @property
+    def available_nodes(self) -> List[str]:
+        """Nodes of the current configuration snapshot."""
+        return list(configuration.loaded_config.get("available_nodes", ()))
+
     @property
     def proxmoxer(self) -> ProxmoxAPI:
         """Get the proxmoxer API instance."""
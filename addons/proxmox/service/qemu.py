@@ -7,6 +7,8 @@ from proxmox.enums.qemu import QemuStatus
 from proxmox.enums.status import StatusCode
 from proxmoxer.core import ResourceException
 
+from clicx.utils.deadline import Deadline, DeadlineExceeded
+
 _logger = logging.getLogger(__name__)
 
 class QemuAgentManagement():
@@ -61,8 +63,14 @@ class QemuAgentManagement():
 # MARK: QEMU Agent Management
 #######################
 
-    def execute_shell_script(self, script_content: str, node: str, vmid: str):
-        """Execute a shell script on the VM using QEMU guest agent"""
+    def execute_shell_script(self, script_content: str, node: str, vmid: str, deadline: Deadline = None):
+        """
+        Execute a shell script on the VM using QEMU guest agent
+
+        Raises:
+            DeadlineExceeded: The deadline passed or the client disconnected before the script ended
+        """
+        deadline = deadline or Deadline.never()
         _logger.info(f"Executing shell script on VM {vmid}")
         # Replace script name with a uuid, to make sure it is uniqe
         script_path = f"/tmp/proxmox_script_{uuid4()}.sh"
@@ -108,7 +116,7 @@ class QemuAgentManagement():
                     break
                 
                 # Wait before polling again
-                time.sleep(1)
+                deadline.sleep(1)
         
             # Parse the execution result
             stdout = exec_result.get('out-data', '')
@@ -136,6 +144,15 @@ class QemuAgentManagement():
             )
         
             return results
+
+        except DeadlineExceeded as e:
+            _logger.warning(f"Stopped waiting for script on VM {vmid}: {str(e)}")
+            try:
+                # Best effort, the script keeps running in the VM
+                self._proxmoxer.nodes(node).qemu(vmid).agent("exec").post(command=["rm", "-f", script_path])
+            except Exception:
+                pass
+            raise
         
         except Exception as e:
             _logger.error(f"Failed to execute script on VM {vmid}: {str(e)}")
@@ -163,7 +180,7 @@ class QemuAgentManagement():
         response = self._proxmoxer.nodes(node).qemu(vmid).agent('exec').post(command=command)
         return response
     
-    def await_qemu_agent_ready(self, node: str, vmid: str, timeout: int = 300, interval: int = 5) -> bool:
+    def await_qemu_agent_ready(self, node: str, vmid: str, timeout: int = 300, interval: int = 5, deadline: Deadline = None) -> bool:
         """
         Waits for the QEMU agent to be ready.
         
@@ -172,10 +189,15 @@ class QemuAgentManagement():
             vmid: Virtual machine ID
             timeout: Maximum time in seconds to wait for the agent to be ready
             interval: Time in seconds between each status check
+            deadline: Deadline of the request, waiting stops early when it is hit
             
         Returns:
             True if the agent is ready, False if it timed out or encountered an error
+
+        Raises:
+            DeadlineExceeded: The deadline passed or the client disconnected
         """
+        deadline = deadline or Deadline.never()
         elapsed_time = 0
 
         while elapsed_time < timeout:
@@ -187,7 +209,7 @@ class QemuAgentManagement():
             if res["status"] == QemuStatus.failure:
                 raise ValueError(res["exception"])
 
-            time.sleep(interval)
+            deadline.sleep(interval)
             elapsed_time += interval
 
         _logger.warning(f"Timeout waiting for QEMU agent on VM {vmid}")
@@ -215,7 +237,8 @@ class QemuAgentManagement():
                 'exception' : e
             }
 
-    def check_apt_writable(self, node, vmid):
+    def check_apt_writable(self, node, vmid, deadline: Deadline = None):
+        deadline = deadline or Deadline.never()
         try:
             try:
                 self._proxmoxer.nodes(node).qemu(vmid).agent.ping.post()
@@ -271,14 +294,18 @@ class QemuAgentManagement():
                             'status': QemuStatus.pending,
                             'message': "System still initializing. Command timed out."
                         }
-                    time.sleep(1)
-                    
+                    deadline.sleep(1)
+
+            except DeadlineExceeded:
+                raise
             except Exception as exec_error:
                 return {
                     'status': QemuStatus.pending,
                     'message': f"VM not ready: {str(exec_error)}"
                 }
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return {
                 'status': QemuStatus.failure,
@@ -5,6 +5,7 @@ from proxmox.enums.qemu import QemuStatus
 from proxmox.service.qemu import QemuAgentManagement
 from proxmoxer.core import ResourceException
 
+from clicx.utils.deadline import Deadline, DeadlineExceeded
 from clicx.utils.jinja import render
 
 _logger = logging.getLogger(__name__)
@@ -15,18 +16,18 @@ class SoftwareMangement(QemuAgentManagement):
 # MARK: VM Configuration
 #######################
 
-    def install_docker_engine(self,node,vmid):
+    def install_docker_engine(self,node,vmid, deadline: Deadline = None):
         script = render('install_docker.sh')
-        return self.execute_shell_script(script, node, vmid)
+        return self.execute_shell_script(script, node, vmid, deadline=deadline)
     
-    def pull_docker_image(self, node, vmid, image_name):
+    def pull_docker_image(self, node, vmid, image_name, deadline: Deadline = None):
         shell_script = render("pull_image.sh", {
             "image_name":image_name
         })
         
-        return self.execute_shell_script(shell_script, node, vmid)
+        return self.execute_shell_script(shell_script, node, vmid, deadline=deadline)
 
-    def start_docker_image(self, node, vmid, image_name, container_name, port_mapping="", volume_mapping="", env_vars=""):
+    def start_docker_image(self, node, vmid, image_name, container_name, port_mapping="", volume_mapping="", env_vars="", deadline: Deadline = None):
         shell_script = render(
             template_name="start_docker_image.sh",
             context = {
@@ -38,27 +39,27 @@ class SoftwareMangement(QemuAgentManagement):
             })
 
 
-        return self.execute_shell_script(shell_script, node, vmid)
+        return self.execute_shell_script(shell_script, node, vmid, deadline=deadline)
 
-    def stop_docker_image(self, node, vmid, container_name, remove_container=False):
+    def stop_docker_image(self, node, vmid, container_name, remove_container=False, deadline: Deadline = None):
         shell_script = render(
             template_name="stop_docker_image.sh",
             context = {
             "container_name": container_name,
             "remove_container": remove_container
         })
-        return self.execute_shell_script(shell_script, node, vmid)
+        return self.execute_shell_script(shell_script, node, vmid, deadline=deadline)
     
-    def create_proxy_conf(self, node, vmid, hostname, ip):
+    def create_proxy_conf(self, node, vmid, hostname, ip, deadline: Deadline = None):
         shell_script = render(
             template_name="simple_create_proxy_conf.sh",
             context = {
             "hostname": hostname,
             "ip": ip
         })
-        return self.execute_shell_script(shell_script, node, vmid)
+        return self.execute_shell_script(shell_script, node, vmid, deadline=deadline)
     
-    def create_proxy_for_docker_conf(self, node, vmid, hostname, ip, port, name):
+    def create_proxy_for_docker_conf(self, node, vmid, hostname, ip, port, name, deadline: Deadline = None):
         shell_script = render(
             template_name="create_proxy_conf.sh",
             context = {
@@ -67,12 +68,12 @@ class SoftwareMangement(QemuAgentManagement):
             "port" : port,
             "name": name,
         })
-        return self.execute_shell_script(shell_script, node, vmid)
+        return self.execute_shell_script(shell_script, node, vmid, deadline=deadline)
 
-    def configure_vm(self, node: str, vmid: str, script_name: str):
+    def configure_vm(self, node: str, vmid: str, script_name: str, deadline: Deadline = None):
         """Execute a predefined shell script template on a VM"""
         # Check Qemu status
-        qemu_available = self.await_qemu_agent_ready(node=node, vm_id=vmid)
+        qemu_available = self.await_qemu_agent_ready(node=node, vmid=vmid, deadline=deadline)
         if qemu_available != QemuStatus.running:
             raise ResourceException(status_code=500, status_message="Qemu agent not running")
     
@@ -81,7 +82,7 @@ class SoftwareMangement(QemuAgentManagement):
             script_content = render(template_name=script_name)
             
             # Execute the shell script
-            result = self.execute_shell_script(script_content=script_content, node=node, vmid=vmid)
+            result = self.execute_shell_script(script_content=script_content, node=node, vmid=vmid, deadline=deadline)
             
             # Return job status
             return {
@@ -92,14 +93,16 @@ class SoftwareMangement(QemuAgentManagement):
                 "result": result
             }
         
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             _logger.error(f"Failed to configure VM {vmid} on node {node}: {str(e)}")
             raise ResourceException(status_code=500, status_message=f"VM configuration failed: {str(e)}")
     
-    def configure_vm_custom(self, node: str, vmid: str, script_file):
+    def configure_vm_custom(self, node: str, vmid: str, script_file, deadline: Deadline = None):
         """Execute a custom shell script uploaded by user on a VM"""
         # Check Qemu status
-        qemu_available = self.await_qemu_agent_ready(node=node, vm_id=vmid)
+        qemu_available = self.await_qemu_agent_ready(node=node, vmid=vmid, deadline=deadline)
         if qemu_available != QemuStatus.running:
             raise ResourceException(status_code=500, status_message="Qemu agent not running")
         
@@ -108,7 +111,7 @@ class SoftwareMangement(QemuAgentManagement):
             script_content = script_file.file.read().decode('utf-8')
             
             # Execute the shell script
-            result = self.execute_shell_script(script_content=script_content, node=node, vmid=vmid)
+            result = self.execute_shell_script(script_content=script_content, node=node, vmid=vmid, deadline=deadline)
             
             # Return job status
             return {
@@ -118,6 +121,8 @@ class SoftwareMangement(QemuAgentManagement):
                 "result": result
             }
         
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             _logger.error(f"Failed to configure VM {vmid} on node {node}: {str(e)}")
             raise ResourceException(status_code=500, status_message=f"VM configuration failed: {str(e)}")
@@ -1,8 +1,32 @@
 
 import logging
+from typing import Any, Dict, Optional
 
 _logger = logging.getLogger(__name__)
 
+
+def parse_disk_size(config: Dict[str, Any], disk_name: str) -> Optional[str]:
+    """
+    Read the size of a disk from a VM configuration.
+
+    Args:
+        config: VM configuration as returned by `qemu/{vmid}/config`
+        disk_name: Disk key (scsi0) or bus (scsi), the first matching disk is used
+
+    Returns:
+        The size as written by Proxmox (e.g. 32G) or None if not found
+    """
+    for key, value in config.items():
+        if key == disk_name or (key.startswith(disk_name) and key[len(disk_name):len(disk_name) + 1].isdigit()):
+            if isinstance(value, str) and "size=" in value:
+                size_part = [part for part in value.split(',') if part.startswith('size=')]
+                if size_part:
+                    return size_part[0].replace('size=', '')
+            elif isinstance(value, dict) and 'size' in value:
+                return value['size']
+
+    return None
+
 class StorageManagement():
 
     def __init__(self, connection):
@@ -42,17 +66,6 @@ class StorageManagement():
     def get_disk_size(self, node, vmid, disk_name):
         try:
             config = self._proxmoxer.nodes(node).qemu(vmid).config.get()
-            
-            for key, value in config.items():
-                if key == disk_name or (key.startswith(disk_name) and key[len(disk_name)].isdigit()):
-                    if isinstance(value, str) and "size=" in value:
-                        size_part = [part for part in value.split(',') if part.startswith('size=')]
-                        if size_part:
-                            return size_part[0].replace('size=', '')
-                    elif isinstance(value, dict) and 'size' in value:
-                        return value['size']
-            
-            return None
-            
+            return parse_disk_size(config, disk_name)
         except Exception as e:
             raise Exception(f"Failed to get disk size: {str(e)}")
\ No newline at end of file
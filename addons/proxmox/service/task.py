@@ -1,6 +1,8 @@
 import logging
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
+
+from clicx.utils.deadline import Deadline
 
 _logger = logging.getLogger(__name__)
 
@@ -13,7 +15,8 @@ class TaskManagement():
 # MARK: Task Management
 #######################
 
-    def blocking_status(self,node, task_id, timeout=300, polling_interval=1):
+    def blocking_status(self,node, task_id, timeout=300, polling_interval=1, deadline: Deadline = None):
+        deadline = deadline or Deadline.never()
         start_time: float = time.monotonic()
         data = {"status": ""}
         while data["status"] != "stopped":
@@ -24,7 +27,7 @@ class TaskManagement():
                 data = None  # type: ignore
                 break
 
-            time.sleep(polling_interval)
+            deadline.sleep(polling_interval)
         return data
 
     def get_task_status(self, node: str, upid: str, **kwargs) -> Dict[str, Any]:
@@ -45,6 +48,26 @@ class TaskManagement():
         """List all tasks on a node."""
         return self._proxmoxer.nodes(node).tasks.get(**kwargs)
 
+    def iter_tasks(self, node: str, page_size: int = 500, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all tasks on a node, fetching them page by page.
+        
+        Args:
+            node: Node name
+            page_size: Number of tasks fetched per upstream call
+            kwargs: Additional filters to pass to the API
+            
+        Returns:
+            Iterator of tasks, newest first
+        """
+        start = 0
+        while True:
+            page = self._proxmoxer.nodes(node).tasks.get(start=start, limit=page_size, **kwargs)
+            yield from page
+            if len(page) < page_size:
+                return
+            start += len(page)
+
     def get_task_logs(self, node: str, upid: str, **kwargs) -> List[Dict[str, Any]]:
         """Get task logs."""
         return self._proxmoxer.nodes(node).tasks(upid).log.get(**kwargs)
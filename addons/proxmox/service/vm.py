@@ -1,4 +1,6 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Any, Dict, List
 from urllib.parse import quote
 
@@ -6,12 +8,27 @@ from proxmox.enums.status import StatusCode
 from proxmox.utils.exceptions import InvalidConfiguration
 from proxmoxer.core import ResourceException
 from proxmox.service.task import TaskManagement
+from proxmox.service.networking import parse_vm_ip
+from proxmox.service.storage import parse_disk_size
 
 from clicx.config import configuration
 from clicx.utils.security import _generate_password
 
 _logger = logging.getLogger(__name__)
 
+# NOTE: Shared by all requests, bounds the number of upstream calls in flight for VM details
+_details_pool = ThreadPoolExecutor(
+    max_workers=int(configuration.env.get('DETAILS_MAX_WORKERS', 16)),
+    thread_name_prefix="clicx-details",
+)
+# NOTE: A hung guest agent holds its thread until the HTTP timeout of proxmoxer, a timed out
+# future can't be cancelled once running. The agent calls get their own pool so they can
+# never starve the status and config calls of the other requests.
+_agent_pool = ThreadPoolExecutor(
+    max_workers=int(configuration.env.get('DETAILS_AGENT_MAX_WORKERS', 4)),
+    thread_name_prefix="clicx-details-agent",
+)
+
 #######################
 # MARK: VM Creation
 #######################
@@ -194,6 +211,66 @@ class VirtualMachineManagement():
         """Get VM configuration."""
         return self._proxmoxer.nodes(node).qemu(vmid).config.get(**kwargs)
     
+    def get_vm_details(self, node: str, vmid: str, disk_name: str = 'scsi0', timeout: float = None) -> Dict[str, Any]:
+        """
+        Get status, configuration, IP, agent state and disk size of a VM.
+
+        The upstream calls run concurrently and the configuration is fetched
+        once. A call that fails or takes longer than `timeout` leaves its
+        fields empty and is reported in `errors`, the others are still returned.
+
+        Args:
+            node: Node name
+            vmid: VM ID
+            disk_name: Disk to report the size of
+            timeout: Seconds to wait for the upstream calls, DETAILS_TIMEOUT by default
+
+        Returns:
+            Dictionary with the VM details and an `errors` map of field to error
+        """
+        if timeout is None:
+            timeout = float(configuration.env.get('DETAILS_TIMEOUT', 5))
+
+        vm = self._proxmoxer.nodes(node).qemu(vmid)
+        futures = {
+            'status': _details_pool.submit(vm.status.current.get),
+            'config': _details_pool.submit(vm.config.get),
+            'agent': _agent_pool.submit(lambda: vm.agent.ping.post()),
+            'ip': _agent_pool.submit(lambda: vm.agent('network-get-interfaces').get()),
+        }
+
+        results = {}
+        errors = {}
+        deadline = time.monotonic() + timeout
+        for field, future in futures.items():
+            try:
+                results[field] = future.result(timeout=max(0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                future.cancel()
+                errors[field] = f"Timed out after {timeout:g}s"
+            except Exception as e:
+                errors[field] = str(e)
+
+        details = {
+            'node': node,
+            'vmid': int(vmid),
+            'status': results.get('status'),
+            'config': results.get('config'),
+            'agent': 'running' if 'agent' in results else None,
+            'ip': parse_vm_ip(results['ip']) if 'ip' in results else None,
+            'disk_size': None,
+            'errors': errors,
+        }
+
+        if 'config' in results:
+            details['disk_size'] = parse_disk_size(results['config'], disk_name)
+            if details['disk_size'] is None:
+                errors['disk_size'] = f"Disk '{disk_name}' not found"
+        else:
+            errors['disk_size'] = "Configuration unavailable"
+
+        return details
+
     def get_next_available_vm_id(self) -> str:
         """
         Get the next available VM ID.
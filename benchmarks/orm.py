@@ -0,0 +1,95 @@
+"""
+Throughput of the ORM write paths.
+
+Creates, writes and unlinks `--records` records one call at a time, each call
+in its own transaction and then all calls in one transaction, and through the
+bulk methods of a `RecordSet`. Then reads them back page by page with
+`offset` and with keyset pagination, and with `search_iter`.
+
+Usage:
+    DB_URL=sqlite:////tmp/bench.db python benchmarks/orm.py --records 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clicx  # noqa: E402,F401
+from clicx.database import fields  # noqa: E402
+from clicx.database.base import Base, BaseModel  # noqa: E402
+from clicx.database.environment import Environment  # noqa: E402
+
+
+class BenchRecord(BaseModel):
+    _name = 'bench.record'
+
+    name = fields.Char(size=64, required=True)
+    value = fields.Integer()
+
+
+def measure(name: str, func, records: int):
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    print(f"{name:<28} {seconds:8.3f} s {records / seconds:12.0f} records/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    env = Environment()
+    env.begin()
+    table = BenchRecord.__table__
+    Base.metadata.drop_all(env.connection.engine, tables=[table])
+    Base.metadata.create_all(env.connection.engine, tables=[table])
+    env.close()
+
+    values = [{'name': f'record {i}', 'value': i} for i in range(args.records)]
+    print(f"{args.records} records on {env.connection.engine.url.get_backend_name()}")
+
+    records = []
+    measure("create per call", lambda: records.extend(BenchRecord.create(row) for row in values), args.records)
+    measure("write per call", lambda: [record.write({'value': 0}) for record in records], args.records)
+    measure("unlink per call", lambda: [record.unlink() for record in records], args.records)
+
+    def in_transaction(func):
+        def run():
+            with env.transaction():
+                func()
+        return run
+
+    records = []
+    measure("create in transaction", in_transaction(
+        lambda: records.extend(BenchRecord.create(row) for row in values)), args.records)
+    measure("write in transaction", in_transaction(
+        lambda: [record.write({'value': 0}) for record in records]), args.records)
+    measure("unlink in transaction", in_transaction(
+        lambda: [record.unlink() for record in records]), args.records)
+
+    recordset = []
+    measure("create bulk", in_transaction(
+        lambda: recordset.append(BenchRecord.create(values))), args.records)
+    measure("write bulk", in_transaction(lambda: recordset[0].write({'value': 0})), args.records)
+
+    def pages_by_offset():
+        for offset in range(0, args.records, args.page_size):
+            BenchRecord.search([], order='id', offset=offset, limit=args.page_size)
+
+    def pages_by_keyset():
+        page = BenchRecord.search([], order='id', limit=args.page_size)
+        while page:
+            page = BenchRecord.search([], order='id', limit=args.page_size, after=page[-1])
+
+    measure("read pages by offset", pages_by_offset, args.records)
+    measure("read pages by keyset", pages_by_keyset, args.records)
+    measure("read search_iter", lambda: sum(1 for _ in BenchRecord.search_iter([])), args.records)
+    measure("unlink bulk", in_transaction(lambda: recordset[0].unlink()), args.records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Serialization cost of VM listings.
+
+Compares the old default path (`jsonable_encoder` + `JSONResponse`) with the
+typed response model path (`VirtualMachineSummary` + `FastJSONResponse`).
+
+Usage:
+    python benchmarks/serialization.py --vms 1000 --rounds 200
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clicx  # noqa: E402  (adds addons/ to sys.path)
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from clicx.utils import responses  # noqa: E402
+from proxmox.schema.vm import VirtualMachineSummary  # noqa: E402
+
+
+def fake_vms(count: int) -> List[dict]:
+    """Build VM dicts shaped like `GET /nodes/{node}/qemu`."""
+    vms = []
+    for vmid in range(100, 100 + count):
+        running = random.random() > 0.3
+        vms.append({
+            "vmid": vmid,
+            "name": f"vm-{vmid}",
+            "status": "running" if running else "stopped",
+            "tags": "customer;prod" if vmid % 3 else "",
+            "cpus": random.choice([1, 2, 4, 8]),
+            "cpu": random.random() if running else 0,
+            "maxmem": 4294967296,
+            "mem": random.randint(0, 4294967296) if running else 0,
+            "maxdisk": 53687091200,
+            "disk": 0,
+            "uptime": random.randint(0, 10**7) if running else 0,
+            "netin": random.randint(0, 10**10),
+            "netout": random.randint(0, 10**10),
+            "diskread": random.randint(0, 10**10),
+            "diskwrite": random.randint(0, 10**10),
+            "pid": random.randint(1000, 99999) if running else None,
+            "qmpstatus": "running" if running else "stopped",
+        })
+    return vms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vms", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    vms = fake_vms(args.vms)
+    adapter = TypeAdapter(List[VirtualMachineSummary])
+
+    def default_path():
+        return JSONResponse(jsonable_encoder(vms)).body
+
+    def typed_path():
+        # Same steps FastAPI takes for a route with response_model
+        content = adapter.dump_python(adapter.validate_python(vms), mode="json", exclude_unset=True)
+        return responses.FastJSONResponse(content).body
+
+    def typed_json_only():
+        return adapter.dump_json(adapter.validate_python(vms), exclude_unset=True)
+
+    backend = "orjson" if responses.orjson is not None else "json (orjson not installed)"
+    print(f"{args.vms} VMs, {args.rounds} rounds, FastJSONResponse backend: {backend}")
+    print(f"payload size: {len(default_path()) / 1024:.1f} KB")
+
+    for name, func in [
+        ("jsonable_encoder + JSONResponse", default_path),
+        ("response model + FastJSONResponse", typed_path),
+        ("response model dump_json", typed_json_only),
+    ]:
+        seconds = min(timeit.repeat(func, number=args.rounds, repeat=3)) / args.rounds
+        per_thousand = seconds * 1000 / args.vms
+        print(f"{name:<36} {seconds * 1000:8.3f} ms/request  {per_thousand * 1000:8.3f} ms per 1,000 VMs")
+
+
+if __name__ == "__main__":
+    main()
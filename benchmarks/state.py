@@ -0,0 +1,66 @@
+"""
+Latency of the shared state backends.
+
+Compares get, set and cas on a plain dict with the memory and SQLite
+backends of `clicx.state`, and the redis backend when `--redis-url` is given.
+
+Usage:
+    python benchmarks/state.py --keys 1000 --rounds 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clicx  # noqa: E402,F401
+from clicx.state import create_backend  # noqa: E402
+
+
+def measure(name: str, func, rounds: int):
+    seconds = min(timeit.repeat(func, number=rounds, repeat=3)) / rounds
+    print(f"{name:<28} {seconds * 1_000_000:10.2f} us/op")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    value = b"x" * 256
+    keys = [f"bench:{i}" for i in range(args.keys)]
+    cycle = iter(range(10**12))
+
+    def next_key():
+        return keys[next(cycle) % len(keys)]
+
+    plain = {}
+    print(f"{args.keys} keys, {args.rounds} rounds, {len(value)} byte values")
+    measure("dict set", lambda: plain.__setitem__(next_key(), value), args.rounds)
+    measure("dict get", lambda: plain.get(next_key()), args.rounds)
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = [
+            create_backend("memory"),
+            create_backend("sqlite", path=Path(directory, "state.sqlite3")),
+        ]
+        if args.redis_url:
+            backends.append(create_backend("redis", url=args.redis_url))
+
+        for backend in backends:
+            for key in keys:
+                backend.set(key, value)
+            measure(f"{backend.name} set", lambda: backend.set(next_key(), value), args.rounds)
+            measure(f"{backend.name} set ttl", lambda: backend.set(next_key(), value, ttl=60), args.rounds)
+            measure(f"{backend.name} get", lambda: backend.get(next_key()), args.rounds)
+            measure(f"{backend.name} cas", lambda: backend.cas(next_key(), value, value), args.rounds)
+            backend.close()
+
+
+if __name__ == "__main__":
+    main()
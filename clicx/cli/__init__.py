@@ -1,3 +1,4 @@
 from . import command
 from . import server
 from . import database
+from . import profile
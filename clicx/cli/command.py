@@ -11,10 +11,12 @@ from clicx.config import configuration
 from clicx import addons
 from clicx.cli.server import cli as server
 from clicx.cli.database import cli as db
+from clicx.cli.profile import cli as profile
 
 cli = typer.Typer(help="Clicx CLI application")
 cli.add_typer(server)
 cli.add_typer(db)
+cli.add_typer(profile)
 
 def discover_commands(commands_dir: Path):
     """Discover and register commands from CLI directories"""
@@ -1,6 +1,7 @@
 import typer
 from typing import Optional, Annotated
-from clicx.database.connection import DatabaseConnection
+from clicx.database.connection import DatabaseConnection, database_settings
+from clicx.database import schema
 from clicx.database.base import Base
 from clicx.database.registry import ModelRegistry
 from sqlalchemy import text
@@ -12,9 +13,10 @@ cli = typer.Typer(name="database")
     help="Create database tables and admin user",
 )
 def create(
-    db_name: Annotated[str, typer.Argument(help="Database name")],
+    db_name: Annotated[Optional[str], typer.Argument(help="Database name, defaults to DB_NAME")] = None,
 ):
     """Init database schema and admin user"""
+    db_name = db_name or database_settings()["dbname"]
     try:
         typer.echo(f"Initializing database '{db_name}'...")
         
@@ -89,10 +91,11 @@ def create(
     help="Drop all database tables",
 )
 def drop(
-    db_name: Annotated[str, typer.Argument(help="Database name")],
+    db_name: Annotated[Optional[str], typer.Argument(help="Database name, defaults to DB_NAME")] = None,
     force: Annotated[bool, typer.Option("--force", "-f", help="Skip confirmation")] = False,
 ):
     """Drop all database tables"""
+    db_name = db_name or database_settings()["dbname"]
     if not force:
         confirm = typer.confirm(f"Are you sure you want to drop all tables in '{db_name}'?")
         if not confirm:
@@ -118,13 +121,62 @@ def drop(
         typer.echo(f"Error dropping tables: {str(e)}", err=True)
         raise typer.Exit(code=1)
 
+@cli.command(
+    help="Add the missing tables, columns, indexes and constraints to the database",
+)
+def upgrade(
+    db_name: Annotated[Optional[str], typer.Argument(help="Database name, defaults to DB_NAME")] = None,
+    dry_run: Annotated[bool, typer.Option("--dry-run", help="Print the SQL without running it")] = False,
+    lock_timeout: Annotated[int, typer.Option("--lock-timeout", help="Milliseconds an ALTER TABLE waits for its table lock, 0 waits forever")] = 5000,
+):
+    """Diff the models against the live schema and apply the DDL"""
+    db_name = db_name or database_settings()["dbname"]
+    try:
+        typer.echo(f"Upgrading database '{db_name}'...")
+
+        # Import models to register them
+        try:
+            from clicx.database import models
+            from clicx import _models
+        except ImportError as e:
+            typer.echo(f"Warning: Some models couldn't be imported: {e}")
+
+        ModelRegistry.resolve_relationships()
+        db = DatabaseConnection(dbname=db_name)
+        operations, unmanaged = schema.diff(db.engine)
+
+        for item in unmanaged:
+            typer.echo(f"Not declared by any model: {item}")
+        if not operations:
+            typer.echo("The schema is up to date.")
+            return
+
+        def echo(operation):
+            typer.echo(f"- {operation.description}")
+            for statement in operation.statements:
+                typer.echo(f"    {statement};")
+
+        if dry_run:
+            for operation in operations:
+                echo(operation)
+            typer.echo(f"{len(operations)} operations, none applied (dry run).")
+            return
+
+        schema.apply(db.engine, operations, echo=echo, lock_timeout=lock_timeout)
+        typer.echo(f"Applied {len(operations)} operations.")
+
+    except Exception as e:
+        typer.echo(f"Error upgrading the database: {str(e)}", err=True)
+        raise typer.Exit(code=1)
+
 @cli.command(
     help="Show database schema information",
 )
 def info(
-    db_name: Annotated[str, typer.Argument(help="Database name")],
+    db_name: Annotated[Optional[str], typer.Argument(help="Database name, defaults to DB_NAME")] = None,
 ):
     """Show database schema and model information"""
+    db_name = db_name or database_settings()["dbname"]
     try:
         typer.echo(f"Database info for '{db_name}':")
         
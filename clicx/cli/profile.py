@@ -0,0 +1,72 @@
+import typer
+from pathlib import Path
+from typing import Annotated
+from rich.console import Console
+from rich.table import Table
+
+from clicx.utils import profiler
+
+cli = typer.Typer(name="profile", help="Inspect captured request profiles")
+console = Console()
+
+def _resolve(profile: str) -> Path:
+    path = Path(profile)
+    if not path.exists():
+        path = Path(profiler.profiles_dir, profile)
+    if not path.exists():
+        typer.echo(f"Profile not found: {profile}", err=True)
+        raise typer.Exit(code=1)
+    return path
+
+@cli.command(
+    name="list",
+    help="List captured profiles, newest first",
+)
+def list_profiles(
+    limit: Annotated[int, typer.Option("--limit", "-l", help="Maximum number of profiles to show")] = 20,
+):
+    """List captured profiles"""
+    profiles = profiler.list_profiles()
+    if not profiles:
+        typer.echo(f"No profiles found in {profiler.profiles_dir}")
+        return
+
+    table = Table(title=f"Profiles in {profiler.profiles_dir}")
+    table.add_column("File")
+    table.add_column("Samples", justify="right")
+    table.add_column("Size", justify="right")
+
+    for path in profiles[:limit]:
+        samples = sum(profiler.read_profile(path).values())
+        table.add_row(path.name, str(samples), f"{path.stat().st_size / 1024:.1f} KB")
+
+    console.print(table)
+
+@cli.command(
+    help="Show the hottest functions of a profile",
+)
+def summary(
+    profile: Annotated[str, typer.Argument(help="Profile file name or path")],
+    top: Annotated[int, typer.Option("--top", "-t", help="Number of functions to show")] = 20,
+):
+    """Summarize a profile by self and inclusive samples"""
+    path = _resolve(profile)
+    total, rows = profiler.summarize(profiler.read_profile(path), top=top)
+
+    table = Table(title=f"{path.name} ({total} samples)")
+    table.add_column("Function")
+    table.add_column("Self", justify="right")
+    table.add_column("Self %", justify="right")
+    table.add_column("Total", justify="right")
+    table.add_column("Total %", justify="right")
+
+    for frame, own, inclusive in rows:
+        table.add_row(
+            frame,
+            str(own),
+            f"{own / total * 100:.1f}",
+            str(inclusive),
+            f"{inclusive / total * 100:.1f}",
+        )
+
+    console.print(table)
@@ -1,15 +1,89 @@
 import glob
+import hashlib
 import json
 import logging
 import logging.config
 import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
 
 import rich
-from dotenv import load_dotenv
+from dotenv import dotenv_values
 
 from clicx import NAME
 from clicx import addons as addons_dir
 from clicx import project_root
+from clicx.utils.exceptions import ConfigurationError
+from clicx.utils.log import QueueLogging, build_handlers
+from clicx.utils.python import FrozenDict, deep_merge, freeze
+from clicx.utils.watcher import FileWatcher
+
+_logger = logging.getLogger(__name__)
+
+
+class ConfigSnapshot:
+    """
+    Immutable, validated configuration loaded from the addon files.
+
+    Args:
+        data: Merged content of the json files
+        env: The OS environment of the process start overridden by the env files
+        files: Files the snapshot was loaded from
+        generation: Number of snapshots loaded before this one in this process
+    """
+
+    __slots__ = ('data', 'env', 'files', 'version', 'generation', 'loaded_at')
+
+    def __init__(self, data: dict, env: dict, files: Tuple[str, ...], generation: int = 0):
+        self.data: FrozenDict = freeze(data)
+        self.env: FrozenDict = freeze(env)
+        self.files = files
+        self.generation = generation
+        self.loaded_at = time.time()
+        # NOTE: Derived from the content, every worker computes the same version for the same files
+        content = json.dumps([data, env], sort_keys=True, default=str).encode()
+        self.version = hashlib.sha256(content).hexdigest()[:16]
+
+
+def validate_config(data: dict) -> List[str]:
+    """
+    Check the type of the known configuration keys, returns the errors found.
+
+    Keys are not required, a missing key is reported where it is used.
+    """
+    errors = []
+
+    def expect(key, value, types, name):
+        if not isinstance(value, types):
+            errors.append(f"'{key}' must be {name}, got {type(value).__name__}")
+            return False
+        return True
+
+    for key in ('host', 'user', 'token_name'):
+        if key in data:
+            expect(key, data[key], str, "a string")
+
+    if 'available_nodes' in data and expect('available_nodes', data['available_nodes'], list, "a list"):
+        for node in data['available_nodes']:
+            expect('available_nodes', node, str, "a list of strings")
+
+    for key in ('admission', 'executors'):
+        if key in data:
+            expect(key, data[key], dict, "an object")
+
+    if 'vm_configurations' in data and expect('vm_configurations', data['vm_configurations'], dict, "an object"):
+        for vmid, vm_config in data['vm_configurations'].items():
+            key = f"vm_configurations.{vmid}"
+            if not expect(key, vm_config, dict, "an object"):
+                continue
+            hardware = vm_config.get('hardware')
+            if not expect(f"{key}.hardware", hardware, dict, "an object"):
+                continue
+            expect(f"{key}.hardware.disk", hardware.get('disk'), str, "a string")
+            expect(f"{key}.hardware.disksize", hardware.get('disksize'), (int, float), "a number")
+
+    return errors
 
 
 class Configuration:
@@ -17,16 +91,23 @@ class Configuration:
         """
         Initialize configuration by loading environment variables from all env,json files in addons
         and from the OS environment
-        
+
+        The loaded configuration is an immutable snapshot, `reload` swaps it
+        for a new one when the files change, see `watch`.
+
         Args:
             addons: Directory containing command modules and their environment files
         """
-        self.env = {}
-        self.loaded_config = {}
         self.addons = addons
+        self.watcher = None
+        self._listeners: List[Callable[[ConfigSnapshot, ConfigSnapshot], None]] = []
+        self._lock = threading.Lock()
+        # NOTE: Captured before the env files are exported, a key removed from a file is dropped on reload
+        self._process_env = dict(os.environ)
 
-        self.load_env_from_directory(directory=addons)
-        self.load_config_files_from_directory(directory=addons)
+        self._snapshot = self.load()
+        # NOTE: Exported once at startup for the settings read with os.getenv and the libraries
+        os.environ.update(self._snapshot.env)
 
         debug = os.getenv('CLICX_DEBUG', 0)
         log_level = os.getenv('LOG_LEVEL', 0)
@@ -37,40 +118,130 @@ class Configuration:
 
 
         self._logger = self.setup_logging(app_name=NAME,log_level=log_level,log_to_file=self.log_to_file)
-   
-    def load_env_from_directory(self, directory):
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """The current configuration snapshot, read it once per operation for a consistent view."""
+        return self._snapshot
+
+    @property
+    def loaded_config(self) -> FrozenDict:
+        return self._snapshot.data
+
+    @property
+    def env(self) -> FrozenDict:
+        return self._snapshot.env
+
+    def load(self, generation: int = 0) -> ConfigSnapshot:
+        """
+        Read the env and json files of the addons into a new snapshot.
+
+        Raises:
+            ConfigurationError: A file is not valid json or a known key has the wrong type
+        """
+        env_files, env = self.load_env_from_directory(directory=self.addons)
+        config_files, config = self.load_config_files_from_directory(directory=self.addons)
+        errors = validate_config(config)
+        if errors:
+            raise ConfigurationError(f"Invalid configuration: {'; '.join(errors)}")
+        return ConfigSnapshot(data=config, env=env, files=tuple(env_files + config_files), generation=generation)
+
+    def reload(self) -> bool:
+        """
+        Load the files again and swap the snapshot if they changed.
+
+        An invalid configuration is logged and the current snapshot is kept.
+        Returns whether the snapshot was swapped.
+        """
+        with self._lock:
+            previous = self._snapshot
+            try:
+                snapshot = self.load(generation=previous.generation + 1)
+            except (OSError, ValueError) as e:
+                _logger.error(f"Failed to reload configuration, keeping version {previous.version}: {e}")
+                return False
+
+            if snapshot.version == previous.version:
+                return False
+
+            self._snapshot = snapshot
+
+        _logger.info(f"Configuration reloaded, version {previous.version} -> {snapshot.version}")
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot, previous)
+            except Exception as e:
+                _logger.error(f"Configuration listener {listener} failed: {e}")
+        return True
+
+    def subscribe(self, listener: Callable[[ConfigSnapshot, ConfigSnapshot], None]):
+        """
+        Call `listener(snapshot, previous)` after every reload.
+        """
+        self._listeners.append(listener)
+
+    def watch(self) -> FileWatcher:
+        """
+        Reload the configuration when an env or json file of the addons changes.
+
+        Disabled with `CONFIG_WATCH=0`, `CONFIG_POLL_INTERVAL` sets the poll
+        interval when `watchfiles` is not installed.
+        """
+        if self.watcher is None:
+            self.watcher = FileWatcher(
+                directory=self.addons,
+                suffixes=(".json", ".env"),
+                callback=self.reload,
+                files=lambda: self._snapshot.files,
+                interval=float(self.env.get('CONFIG_POLL_INTERVAL', 2)),
+            )
+        if bool(int(self.env.get('CONFIG_WATCH', 1))):
+            self.watcher.start()
+        return self.watcher
+
+    def load_env_from_directory(self, directory) -> Tuple[List[str], Dict[str, str]]:
         """
         Load all environment files found in the specified directory
-        
+
         Args:
             directory: Directory to scan for environment files
+
+        Returns:
+            The files loaded and the OS environment of the process start
+            overridden by their values
         """
+        env = dict(self._process_env)
         if not os.path.exists(directory):
-            return
-            
-        env_files = glob.glob(os.path.join(directory, "**/*.env"),include_hidden=True, recursive=True)
+            return [], env
+
+        env_files = sorted(glob.glob(os.path.join(directory, "**/*.env"),include_hidden=True, recursive=True))
         for env_file in env_files:
-            load_dotenv(env_file, override=True)
-        for key, value in os.environ.items():
-            self.env[key] = value
+            env.update((key, value) for key, value in dotenv_values(env_file).items() if value is not None)
+        return env_files, env
 
-    def load_config_files_from_directory(self, directory):
+    def load_config_files_from_directory(self, directory) -> Tuple[List[str], dict]:
         """
         Load all configuration files found in the specified directory
-        
+
         Args:
-            directory: Directory to scan for environment files
+            directory: Directory to scan for configuration files
+
+        Returns:
+            The files loaded and their content, merged in file name order
         """
         if not os.path.exists(directory):
-            return
-        
+            return [], {}
 
-        configuration_files = glob.glob(os.path.join(directory, "**/*.json"),include_hidden=True, recursive=True)
+        config = {}
+        configuration_files = sorted(glob.glob(os.path.join(directory, "**/*.json"),include_hidden=True, recursive=True))
         for config_file in configuration_files:
             with open(config_file, 'r') as f:
-                data = json.load(f)
-                self.loaded_config.update(data)
-                f.close()
+                try:
+                    data = json.load(f)
+                except ValueError as e:
+                    raise ConfigurationError(f"Invalid json in {config_file}: {e}")
+            config = deep_merge(config, data)
+        return configuration_files, config
 
 
     def setup_logging(
@@ -83,6 +254,24 @@ class Configuration:
 
         log_dir = os.path.join(project_root, 'logs')
         log_path = os.path.join(log_dir, log_filename)
+        logger_names = ['uvicorn', 'uvicorn.access', 'uvicorn.error', app_name]
+
+        if os.getenv('LOG_MODE', '') == 'queue':
+            handlers = build_handlers(
+                log_level=log_level,
+                log_path=log_path if log_to_file else None,
+                json_format=os.getenv('LOG_FORMAT', 'text') == 'json',
+                max_bytes=int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+                backup_count=int(os.getenv('LOG_BACKUP_COUNT', 5)),
+                rotate_when=os.getenv('LOG_ROTATE_WHEN') or None,
+            )
+            self.queue_logging = QueueLogging(
+                handlers=handlers,
+                queue_size=int(os.getenv('LOG_QUEUE_SIZE', 10000)),
+                sample_rate=int(os.getenv('LOG_DEBUG_SAMPLE', 1)),
+                sampled_loggers=os.getenv('LOG_SAMPLED_LOGGERS', 'clicx.utils.middleware').split(','),
+            ).install(log_level=log_level, logger_names=logger_names)
+            return logging.getLogger(app_name)
 
         if log_to_file:
             os.makedirs(log_dir, exist_ok=True)
@@ -124,7 +313,7 @@ class Configuration:
                     'handlers': list(handlers.keys()),
                     'level': log_level,
                     'propagate': False
-                } for name in ['uvicorn', 'uvicorn.access', 'uvicorn.error', app_name]
+                } for name in logger_names
             }
         }
 
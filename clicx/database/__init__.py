@@ -1,4 +1,5 @@
 from . import connection
+from . import environment
 from . import base
 from . import fields
 from . import registry
\ No newline at end of file
@@ -1,7 +1,17 @@
-from sqlalchemy.orm import DeclarativeBase, DeclarativeMeta
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import CheckConstraint, Column, ForeignKey, Index, Integer, UniqueConstraint, select
 from sqlalchemy.exc import InvalidRequestError
-from typing import Dict, Any, List, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Union, Optional, AsyncIterator, Iterator
+
+from .cache import cache_of
+from .domain import compile_domain
+from .environment import Environment, environment
+from .grouping import GroupQuery
+from .ordering import cursor_values, keyset, order_clauses, parse_order
+from .registry import ModelRegistry
+from .recordset import RecordSet, bulk_create, group_loaded, prefetch_options
 import re
 import weakref
 
@@ -12,7 +22,9 @@ class Base(DeclarativeBase):
 _class_cache = weakref.WeakValueDictionary()
 
 # Combine metaclasses properly
-class CombinedMeta(DeclarativeMeta):
+# NOTE: Extends the metaclass of DeclarativeBase, which maps the class in __init_subclass__.
+# DeclarativeMeta would map it a second time.
+class CombinedMeta(type(DeclarativeBase)):
     def __new__(mcs, name, bases, namespace, **kwargs):
         # Skip processing for abstract classes and Base itself
         if namespace.get('__abstract__', False) or name in ('Base', 'BaseModel'):
@@ -93,7 +105,7 @@ class CombinedMeta(DeclarativeMeta):
                 # Create foreign key column
                 fk_column = Column(f"{field_name}_id", Integer, 
                                  ForeignKey(f"{comodel_table}.id", ondelete=field_obj.ondelete), 
-                                 nullable=not field_obj.required)
+                                 **field_obj.column_options())
                 namespace[f"{field_name}_id"] = fk_column
                 
                 # Store for later relationship creation
@@ -113,6 +125,14 @@ class CombinedMeta(DeclarativeMeta):
                 if column is not None:
                     namespace[field_name] = column
         
+        # Composite indexes and SQL constraints of the model
+        table_args = mcs._table_args(namespace['__tablename__'], fields, namespace)
+        if table_args:
+            existing = namespace.get('__table_args__', ())
+            # NOTE: A trailing dict holds the table keyword arguments
+            existing = (existing,) if isinstance(existing, dict) else tuple(existing)
+            namespace['__table_args__'] = (*table_args, *existing)
+
         # Add id column if not present
         if 'id' not in namespace and not any(hasattr(base, 'id') for base in bases):
             namespace['id'] = Column('id', Integer, primary_key=True, autoincrement=True)
@@ -143,6 +163,37 @@ class CombinedMeta(DeclarativeMeta):
         
         return cls
     
+    @staticmethod
+    def _table_args(table_name, fields, namespace):
+        """
+        Indexes of `_indexes` and constraints of `_sql_constraints`
+
+        `_indexes` lists tuples of field names, `_sql_constraints` lists
+        `(name, definition, message)` with a `UNIQUE(...)` or `CHECK(...)` definition.
+        """
+        from .fields import Many2one
+
+        def column_name(name):
+            return f"{name}_id" if isinstance(fields.get(name), Many2one) else name
+
+        args = []
+        for index in namespace.get('_indexes', ()):
+            names = [index] if isinstance(index, str) else list(index)
+            columns = [column_name(name) for name in names]
+            args.append(Index(f"ix_{table_name}_{'_'.join(columns)}", *columns))
+
+        for name, definition, _message in namespace.get('_sql_constraints', ()):
+            match = re.fullmatch(r'\s*(unique|check)\s*\((.*)\)\s*', definition, re.IGNORECASE | re.DOTALL)
+            if match is None:
+                raise ValueError(f"Unsupported constraint '{definition}' of {table_name}, expected UNIQUE(...) or CHECK(...)")
+            kind, body = match.group(1).lower(), match.group(2)
+            if kind == 'unique':
+                columns = [column_name(column.strip()) for column in body.split(',')]
+                args.append(UniqueConstraint(*columns, name=f"{table_name}_{name}"))
+            else:
+                args.append(CheckConstraint(body, name=f"{table_name}_{name}"))
+        return args
+
     @staticmethod
     def _camel_to_snake(name):
         """Convert CamelCase to snake_case"""
@@ -164,99 +215,210 @@ class BaseModel(Base, metaclass=CombinedMeta):
     # The metaclass handles everything we need
     
     @classmethod
-    def create(cls, values: Dict[str, Any]):
-        """Create a new record"""
-        from .connection import DatabaseConnection
-        
-        instance = cls(**values)
-        db = DatabaseConnection('your_db_name')  # Configure as needed
-        with db.get_session() as session:
-            session.add(instance)
-            session.flush()  # To get the ID
-            session.refresh(instance)
+    def create(cls, values: Union[Dict[str, Any], List[Dict[str, Any]]]):
+        """
+        Create a new record, or a `RecordSet` of records from a list of values
+
+        In a transaction the record is inserted with the other pending records
+        at the next flush, its id is set from then on. A list is inserted right
+        away in batches, see `clicx.database.recordset`.
+        """
+        if isinstance(values, (list, tuple)):
+            return bulk_create(cls, values)
+
+        with environment() as env:
+            instance = cls(**values)
+            env.session.add(instance)
             return instance
     
     @classmethod
-    def search(cls, domain: List = None, limit: int = None, offset: int = None):
-        """Search for records"""
-        from .connection import DatabaseConnection
-        
-        db = DatabaseConnection('your_db_name')  # Configure as needed
-        with db.get_session() as session:
-            query = session.query(cls)
-            
-            # Apply domain filters (simplified - you'd want to implement a proper domain parser)
-            if domain:
-                for condition in domain:
-                    if len(condition) == 3:
-                        field, operator, value = condition
-                        if hasattr(cls, field):
-                            if operator == '=':
-                                query = query.filter(getattr(cls, field) == value)
-                            elif operator == '!=':
-                                query = query.filter(getattr(cls, field) != value)
-                            elif operator == 'in':
-                                query = query.filter(getattr(cls, field).in_(value))
-                            # Add more operators as needed
-            
-            if offset:
-                query = query.offset(offset)
-            if limit:
-                query = query.limit(limit)
-            
-            return query.all()
+    def _search_query(cls, domain: List = None, limit: int = None, offset: int = None, order: str = None,
+                      after: Any = None, prefetch: List[str] = ()):
+        """The statement of a search and the values of its parameters"""
+        compiled, params = compile_domain(cls, domain)
+        query = compiled.statement
+        if order or after is not None:
+            keys = parse_order(cls, order)
+            if after is not None:
+                query = query.where(keyset(keys, cursor_values(keys, after)))
+            query = query.order_by(*order_clauses(keys))
+        if offset:
+            query = query.offset(offset)
+        if limit:
+            query = query.limit(limit)
+        if prefetch:
+            ModelRegistry.resolve_relationships()
+            query = query.options(*prefetch_options(cls, prefetch))
+        return query, params
+
+    @classmethod
+    def search(cls, domain: List = None, limit: int = None, offset: int = None, prefetch: List[str] = (),
+               order: str = None, after: Any = None):
+        """
+        Search for records matching `domain`, see `clicx.database.domain` for the syntax
+
+        The relational fields in `prefetch`, e.g. `['partner.country']`, are
+        loaded with the search, the others on first access for all the records.
+
+        `order` sorts the records, e.g. `'name desc'`. `after` continues after a
+        record of the previous page (keyset pagination), see `clicx.database.ordering`.
+        """
+        query, params = cls._search_query(domain, limit, offset, order, after, prefetch)
+        with environment() as env:
+            return group_loaded(RecordSet(cls, env.session.execute(query, params).scalars().all()), prefetch)
+
+    @classmethod
+    def search_iter(cls, domain: List = None, order: str = None, batch_size: int = 1000,
+                    prefetch: List[str] = ()) -> Iterator['BaseModel']:
+        """
+        Iterate over the records matching `domain` with constant memory
+
+        The rows are streamed from a server side cursor `batch_size` at a time,
+        relational fields are prefetched per batch. Outside of a transaction the
+        records are detached like the ones of `search`, and the session of the
+        iteration is closed when the iterator is exhausted or garbage collected.
+        """
+        query, params = cls._search_query(domain, order=order or 'id', prefetch=prefetch)
+        query = query.execution_options(yield_per=batch_size)
+
+        env = Environment.current()
+        if env is not None and env.in_transaction:
+            for batch in env.session.execute(query, params).scalars().partitions():
+                yield from group_loaded(RecordSet(cls, batch), prefetch)
+            return
+
+        # NOTE: Not activated, the context of the caller would be in the transaction between two records
+        env = Environment()
+        session = env.begin()
+        try:
+            for batch in session.execute(query, params).scalars().partitions():
+                # NOTE: With the records prefetched along, one by one, expunge_all breaks yield_per
+                for record in list(session.identity_map.values()):
+                    session.expunge(record)
+                yield from group_loaded(RecordSet(cls, batch), prefetch)
+        finally:
+            env.close()
     
+    @classmethod
+    def read_group(cls, domain: List, fields: List[str], groupby: Union[str, List[str]], orderby: str = None,
+                   limit: int = None, offset: int = None) -> List[Dict[str, Any]]:
+        """
+        Aggregate the records matching `domain` per group, in the database
+
+        Returns one dict per group with the `groupby` values, the `fields`
+        aggregates and `__count`, see `clicx.database.grouping` for the syntax.
+        """
+        with environment() as env:
+            query = GroupQuery(cls, domain, fields, groupby, orderby, limit, offset, env.session.get_bind().dialect.name)
+            return query.rows(env.session.execute(query.statement, query.params))
+
     @classmethod
     def browse(cls, ids: Union[int, List[int]]):
-        """Browse records by IDs"""
-        from .connection import DatabaseConnection
-        
+        """Browse records by IDs, from the record cache for models with `_cache = True`"""
         if isinstance(ids, int):
             ids = [ids]
         
-        db = DatabaseConnection('your_db_name')  # Configure as needed
-        with db.get_session() as session:
-            return session.query(cls).filter(cls.id.in_(ids)).all()
+        cache = cache_of(cls)
+        with environment() as env:
+            if cache is not None:
+                return RecordSet(cls, cache.fetch(env.session, ids, attach=Environment.current() is env))
+            return RecordSet(cls, env.session.query(cls).filter(cls.id.in_(ids)).all())
     
     def write(self, values: Dict[str, Any]):
         """Update record"""
-        from .connection import DatabaseConnection
-        
-        db = DatabaseConnection('your_db_name')  # Configure as needed
-        with db.get_session() as session:
-            # Merge current instance into session
-            session.merge(self)
-            
-            # Update values
+        RecordSet(type(self), [self]).write(values)
+
+    def unlink(self):
+        """Delete record"""
+        RecordSet(type(self), [self]).unlink()
+
+    # Async counterparts, for async routes. They run in `session` when given,
+    # e.g. the one of the `get_async_session` dependency, otherwise in their own.
+
+    @staticmethod
+    @asynccontextmanager
+    async def _async_session(session: Optional[AsyncSession] = None) -> AsyncIterator[AsyncSession]:
+        if session is not None:
+            yield session
+            return
+
+        from .connection import AsyncDatabaseConnection
+
+        async with AsyncDatabaseConnection().get_session() as session:
+            yield session
+
+    @classmethod
+    async def acreate(cls, values: Dict[str, Any], session: Optional[AsyncSession] = None):
+        """Create a new record"""
+        async with cls._async_session(session) as session:
+            instance = cls(**values)
+            session.add(instance)
+            await session.flush()  # To get the ID
+            await session.refresh(instance)
+            return instance
+
+    @classmethod
+    async def asearch(cls, domain: List = None, limit: int = None, offset: int = None, prefetch: List[str] = (),
+                      order: str = None, after: Any = None, session: Optional[AsyncSession] = None):
+        """
+        Search for records matching `domain`, see `clicx.database.domain` for the syntax
+
+        Relational fields can't be loaded on access in an async session, load
+        them with the search by listing them in `prefetch`.
+        """
+        query, params = cls._search_query(domain, limit, offset, order, after, prefetch)
+        async with cls._async_session(session) as session:
+            result = await session.execute(query, params)
+            return group_loaded(RecordSet(cls, result.scalars().all()), prefetch)
+
+    @classmethod
+    async def asearch_iter(cls, domain: List = None, order: str = None, batch_size: int = 1000,
+                           prefetch: List[str] = (), session: Optional[AsyncSession] = None) -> AsyncIterator['BaseModel']:
+        """Iterate over the records matching `domain` with constant memory, see `search_iter`"""
+        query, params = cls._search_query(domain, order=order or 'id', prefetch=prefetch)
+        query = query.execution_options(yield_per=batch_size)
+        async with cls._async_session(session) as session:
+            result = await session.stream_scalars(query, params)
+            async for batch in result.partitions():
+                for record in group_loaded(RecordSet(cls, batch), prefetch):
+                    yield record
+
+    @classmethod
+    async def aread_group(cls, domain: List, fields: List[str], groupby: Union[str, List[str]], orderby: str = None,
+                          limit: int = None, offset: int = None, session: Optional[AsyncSession] = None) -> List[Dict[str, Any]]:
+        """Aggregate the records matching `domain` per group, see `read_group`"""
+        async with cls._async_session(session) as session:
+            query = GroupQuery(cls, domain, fields, groupby, orderby, limit, offset, session.get_bind().dialect.name)
+            return query.rows(await session.execute(query.statement, query.params))
+
+    @classmethod
+    async def abrowse(cls, ids: Union[int, List[int]], session: Optional[AsyncSession] = None):
+        """Browse records by IDs"""
+        if isinstance(ids, int):
+            ids = [ids]
+
+        async with cls._async_session(session) as session:
+            result = await session.execute(select(cls).where(cls.id.in_(ids)))
+            return RecordSet(cls, result.scalars().all())
+
+    async def awrite(self, values: Dict[str, Any], session: Optional[AsyncSession] = None):
+        """Update record"""
+        async with self._async_session(session) as session:
+            record = await session.merge(self)
             for key, value in values.items():
                 if hasattr(self, key):
+                    setattr(record, key, value)
                     setattr(self, key, value)
-            
-            session.commit()
-    
-    def unlink(self):
+            await session.flush()
+
+    async def aunlink(self, session: Optional[AsyncSession] = None):
         """Delete record"""
-        from .connection import DatabaseConnection
-        
-        db = DatabaseConnection('your_db_name')  # Configure as needed
-        with db.get_session() as session:
-            session.merge(self)
-            session.delete(self)
-            session.commit()
-    
-    @property
-    def env(self):
-        """Access to environment (simplified)"""
-        return Environment()
+        async with self._async_session(session) as session:
+            record = await session.merge(self)
+            await session.delete(record)
+            await session.flush()
 
-class Environment:
-    """Simplified environment class"""
-    def __init__(self):
-        from .registry import ModelRegistry
-        self.registry = ModelRegistry
-        # Ensure relationships are resolved
-        ModelRegistry.resolve_relationships()
-    
-    def __getitem__(self, model_name: str):
-        """Get model class by name (supports dot notation)"""
-        return self.registry.get(model_name)
\ No newline at end of file
+    @property
+    def env(self) -> Environment:
+        """The current environment, or a new one without a transaction"""
+        return Environment.current() or Environment()
@@ -0,0 +1,319 @@
+"""
+Record cache of the models marked with `_cache = True`.
+
+`browse` serves the records of these models from a per-process LRU cache of
+their column values. It suits small, rarely written models read on every
+request, such as partners or VM plans:
+
+    ```python
+    class VmPlan(models.Model):
+        _name = 'vm.plan'
+        _cache = True
+        _cache_ttl = 3600  # Optional, seconds, overrides DB_CACHE_TTL
+        _cache_size = 500  # Optional, records, overrides DB_CACHE_SIZE
+    ```
+
+Writes through `write`, `unlink`, `RecordSet` bulk operations and flushed
+ORM changes invalidate the records in this process right away. Once the
+transaction commits, the ids are published on the `clicx:cache` channel of
+`clicx.state` so the other workers drop them as well.
+
+Settings (`configuration.env`):
+
+    DB_CACHE_SIZE   Records cached per model (10000)
+    DB_CACHE_TTL    Seconds a record is served from the cache (300)
+    DB_CACHE_SYNC   Invalidate the caches of the other workers, 1 or 0 (1)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.attributes import set_committed_value
+
+from clicx.config import configuration
+from clicx.utils.metrics import registry
+
+_logger = logging.getLogger(__name__)
+
+CHANNEL = "clicx:cache"
+
+_lookups = registry.counter(
+    "clicx_db_cache_total",
+    "Record cache lookups by model and result (hit, miss).",
+)
+_invalidations = registry.counter(
+    "clicx_db_cache_invalidations_total",
+    "Records dropped from the record cache by model and origin (local, remote).",
+)
+
+
+class RecordCache:
+    """
+    LRU cache with a TTL of the column values of one model's records.
+
+    Args:
+        model: The model class of the records
+        maxsize: Maximum number of records kept
+        ttl: Seconds a record is served after it was read
+    """
+
+    def __init__(self, model, maxsize: int = 10000, ttl: float = 300):
+        self.model = model
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.columns = [attribute.key for attribute in inspect(model).column_attrs]
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, ids: Iterable[int]) -> Tuple[Dict[int, Any], List[int]]:
+        """The cached records by id as new detached instances, and the ids missing."""
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for record_id in ids:
+                entry = self._entries.get(record_id)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(record_id)
+                    found[record_id] = entry[1]
+                else:
+                    if entry is not None:
+                        del self._entries[record_id]
+                    missing.append(record_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if found:
+            _lookups.inc(len(found), model=self.model._name, result="hit")
+        if missing:
+            _lookups.inc(len(missing), model=self.model._name, result="miss")
+        return {record_id: self._instance(values) for record_id, values in found.items()}, missing
+
+    def put(self, records: Iterable):
+        """Cache the column values of records whose columns are all loaded."""
+        expires = time.monotonic() + self.ttl
+        entries = []
+        for record in records:
+            values = record.__dict__
+            if all(column in values for column in self.columns):
+                entries.append((values['id'], (expires, {column: values[column] for column in self.columns})))
+
+        with self._lock:
+            for record_id, entry in entries:
+                self._entries[record_id] = entry
+                self._entries.move_to_end(record_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, ids: Optional[Iterable[int]] = None) -> int:
+        """Drop the records `ids`, or every record when None, returns how many were cached."""
+        with self._lock:
+            if ids is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            return sum(self._entries.pop(record_id, None) is not None for record_id in ids)
+
+    def fetch(self, session: Session, ids: Iterable[int], attach: bool = False) -> List:
+        """
+        The records `ids` in that order, from the session, the cache or the database.
+
+        Args:
+            session: Session querying the records missing from the cache
+            ids: Ids of the records
+            attach: Add the cached records to `session`, e.g. the one of a transaction
+        """
+        ids = list(dict.fromkeys(ids))
+        records = {}
+        for record_id in ids:
+            record = session.identity_map.get(identity_key(self.model, record_id))
+            if record is not None:
+                records[record_id] = record
+
+        found, missing = self.get([record_id for record_id in ids if record_id not in records])
+        for record_id, record in found.items():
+            records[record_id] = session.merge(record, load=False) if attach else record
+
+        if missing:
+            loaded = session.scalars(select(self.model).where(self.model.id.in_(missing))).all()
+            # NOTE: Records written in this transaction are cached once it committed
+            touched = session.info.get('clicx_cache_invalidations', {})
+            if self.model._name not in touched:
+                self.put(loaded)
+            elif touched[self.model._name] is not None:
+                self.put([record for record in loaded if record.id not in touched[self.model._name]])
+            records.update((record.id, record) for record in loaded)
+
+        return [records[record_id] for record_id in ids if record_id in records]
+
+    def _instance(self, values: Dict[str, Any]):
+        # NOTE: A new instance per lookup, a record can only belong to one session
+        instance = self.model.__mapper__.class_manager.new_instance()
+        for key, value in values.items():
+            set_committed_value(instance, key, value)
+        make_transient_to_detached(instance)
+        return instance
+
+
+_caches: Dict[str, RecordCache] = {}
+_caches_lock = threading.Lock()
+
+
+def cache_of(model) -> Optional[RecordCache]:
+    """The record cache of `model`, None when the model is not cached."""
+    if not getattr(model, '_cache', False):
+        return None
+
+    cache = _caches.get(model._name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(model._name)
+            if cache is None:
+                cache = _caches[model._name] = RecordCache(
+                    model,
+                    maxsize=int(getattr(model, '_cache_size', None) or configuration.env.get('DB_CACHE_SIZE', 10000)),
+                    ttl=float(getattr(model, '_cache_ttl', None) or configuration.env.get('DB_CACHE_TTL', 300)),
+                )
+        _synchronizer.start()
+    return cache
+
+
+def invalidate(model, ids: Optional[Iterable[int]] = None, session: Optional[Session] = None):
+    """
+    Drop records of `model` from the cache of this process.
+
+    With `session`, the ids are also dropped again when its transaction ends,
+    and published to the other workers when it commits.
+    """
+    cache = cache_of(model)
+    if cache is None:
+        return
+
+    ids = None if ids is None else list(ids)
+    _invalidations.inc(cache.invalidate(ids), model=model._name, origin="local")
+    if session is not None:
+        pending = session.info.setdefault('clicx_cache_invalidations', {})
+        if ids is None or pending.get(model._name, ()) is None:
+            pending[model._name] = None
+        else:
+            pending.setdefault(model._name, set()).update(ids)
+
+
+def _pending(session: Session) -> Dict[str, Optional[set]]:
+    return session.info.pop('clicx_cache_invalidations', {})
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session: Session, flush_context):
+    for record in (*session.dirty, *session.deleted):
+        if getattr(record, '_cache', False) and record.id is not None:
+            invalidate(type(record), [record.id], session=session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session: Session):
+    pending = _pending(session)
+    for model_name, ids in pending.items():
+        cache = _caches.get(model_name)
+        if cache is not None:
+            # NOTE: Drops what was read within the transaction before it committed
+            cache.invalidate(ids)
+    if pending:
+        _synchronizer.publish(pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session: Session):
+    for model_name, ids in _pending(session).items():
+        cache = _caches.get(model_name)
+        if cache is not None:
+            cache.invalidate(ids)
+
+
+class Synchronizer:
+    """Publish and receive the invalidations of the other workers through `clicx.state`."""
+
+    def __init__(self):
+        self.pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return str(configuration.env.get('DB_CACHE_SYNC', 1)).lower() not in ('0', 'false', 'no')
+
+    def start(self):
+        """Listen for invalidations in a thread of this process, once per process."""
+        if self.pid == os.getpid() or not self.enabled:
+            return
+        with self._lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            threading.Thread(target=self._listen, name="clicx-cache-sync", daemon=True).start()
+
+    def publish(self, pending: Dict[str, Optional[set]]):
+        if not self.enabled:
+            return
+
+        from clicx.state import get_backend
+
+        message = {
+            "pid": os.getpid(),
+            "models": {name: None if ids is None else sorted(ids) for name, ids in pending.items()},
+        }
+        try:
+            get_backend().publish(CHANNEL, json.dumps(message))
+        except Exception as e:
+            _logger.error(f"Failed to publish the record cache invalidation: {e}")
+
+    def _listen(self):
+        from clicx.state import get_backend
+
+        try:
+            subscription = get_backend().subscribe(CHANNEL)
+        except Exception as e:
+            _logger.error(f"Failed to subscribe to the record cache invalidations: {e}")
+            return
+
+        with subscription:
+            for raw in subscription:
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                # NOTE: A forked worker inherits the thread's pid in the message, not the thread itself
+                if message.get("pid") == os.getpid():
+                    continue
+                for model_name, ids in message.get("models", {}).items():
+                    cache = _caches.get(model_name)
+                    if cache is not None:
+                        _invalidations.inc(cache.invalidate(ids), model=model_name, origin="remote")
+
+
+_synchronizer = Synchronizer()
+
+
+def _entries() -> Dict[Tuple, float]:
+    return {(("model", name),): len(cache) for name, cache in list(_caches.items())}
+
+
+def _hit_ratios() -> Dict[Tuple, float]:
+    return {
+        (("model", name),): cache.hits / (cache.hits + cache.misses)
+        for name, cache in list(_caches.items()) if cache.hits + cache.misses
+    }
+
+
+registry.gauge("clicx_db_cache_entries", "Records held by the record cache of each model.", collect=_entries)
+registry.gauge("clicx_db_cache_hit_ratio", "Share of the record cache lookups served from the cache.", collect=_hit_ratios)
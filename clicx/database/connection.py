@@ -1,39 +1,278 @@
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import Session, sessionmaker
-from typing import Generator, Any, Dict
-from contextlib import contextmanager
+"""
+Database engine and sessions.
+
+The connection is configured from the environment (`configuration.env`):
+
+    DB_NAME               Database name, defaults to the OS user like `createdb $USER`
+    DB_USER               Role, defaults to the OS user (peer authentication)
+    DB_PASSWORD           Password of the role
+    DB_HOST               Host name for TCP, or the directory of the Unix socket
+                          when it starts with `/`. Empty connects over the default socket.
+    DB_PORT               TCP port (5432)
+    DB_DRIVER             `psycopg2` (default) or `psycopg`
+    DB_POOL_SIZE          Connections kept open per worker (5)
+    DB_MAX_OVERFLOW       Extra connections opened under load (10)
+    DB_POOL_TIMEOUT       Seconds to wait for a free connection (30)
+    DB_POOL_PRE_PING      Test connections before use, 1 or 0 (1)
+    DB_POOL_RECYCLE       Seconds after which a connection is replaced (1800)
+    DB_STATEMENT_TIMEOUT  Server side statement timeout in ms, 0 disables it (30000)
+    DB_PREPARE_THRESHOLD  Executions before a query is prepared on the server,
+                          psycopg driver only, empty disables it (5)
+    DB_ECHO               Log every statement and the debug messages of the pool, 1 or 0 (0)
+    DB_ASYNC_DRIVER       Driver of `AsyncDatabaseConnection`, `asyncpg` (default) or `psycopg`
+    DB_URL                Complete SQLAlchemy URL used instead of the settings above,
+                          e.g. `sqlite:////tmp/bench.db` for benchmarks
+    DB_COPY_THRESHOLD     Records from which a bulk create uses COPY instead of
+                          INSERT, PostgreSQL only (5000)
+
+Every worker process gets its own pool, a pool inherited through `fork` is
+discarded on first use in the child without closing the parent's connections.
+
+Async routes use `AsyncDatabaseConnection` through the `get_async_session`
+dependency, it needs the `asyncpg` package (or psycopg 3):
+
+    ```python
+    @router.get("/partners")
+    async def list_partners(session: AsyncSession = Depends(get_async_session)):
+        return await ResPartner.asearch([("is_company", "=", True)], session=session)
+    ```
+"""
+import getpass
+import logging
+import os
 import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Generator, Optional, Tuple
+
+from sqlalchemy import MetaData, create_engine, exc
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from clicx.config import configuration
+from clicx.utils.metrics import registry
+
+_checkout_seconds = registry.histogram(
+    "clicx_db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the database pool.",
+)
+_checkout_timeouts = registry.counter(
+    "clicx_db_pool_checkout_timeouts_total",
+    "Connection checkouts that timed out because the database pool was exhausted.",
+)
+
+
+def _checked_out() -> Dict[tuple, float]:
+    connections = [
+        *(("sync", connection) for connection in list(DatabaseConnection._instances.values())),
+        *(("async", connection) for connection in list(AsyncDatabaseConnection._instances.values())),
+    ]
+    return {
+        (("database", connection.dbname), ("mode", mode)): connection._engine.pool.checkedout()
+        for mode, connection in connections
+        if getattr(connection, '_engine', None) is not None
+    }
+
+
+registry.gauge(
+    "clicx_db_pool_checked_out",
+    "Connections of the database pool currently in use.",
+    collect=_checked_out,
+)
+
+
+class _MeteredPool:
+    """Pool mixin recording the time a checkout waits for a connection."""
+
+    dbname = ""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            _checkout_timeouts.inc(database=self.dbname)
+            raise
+        finally:
+            _checkout_seconds.observe(time.perf_counter() - start, database=self.dbname)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.dbname = self.dbname
+        return pool
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_logging(poolclass, echo: bool):
+    """Keep the logger of `poolclass` at WARNING unless `echo`."""
+    # NOTE: SQLAlchemy names the pool logger after its class, out of the `sqlalchemy` logger kept at WARNING
+    logger = logging.getLogger(f"{poolclass.__module__}.{poolclass.__name__}")
+    logger.setLevel(logging.NOTSET if echo else logging.WARNING)
+
+
+def database_settings(env=None) -> Dict[str, Any]:
+    """Database settings from the environment, see the module documentation."""
+    env = env if env is not None else configuration.env
+    return {
+        "dbname": env.get('DB_NAME') or getpass.getuser(),
+        "user": env.get('DB_USER') or None,
+        "password": env.get('DB_PASSWORD') or None,
+        "host": env.get('DB_HOST') or None,
+        "port": int(env.get('DB_PORT', 5432)),
+        "driver": env.get('DB_DRIVER', 'psycopg2'),
+        "pool_size": int(env.get('DB_POOL_SIZE', 5)),
+        "max_overflow": int(env.get('DB_MAX_OVERFLOW', 10)),
+        "pool_timeout": float(env.get('DB_POOL_TIMEOUT', 30)),
+        "pool_pre_ping": bool(int(env.get('DB_POOL_PRE_PING', 1))),
+        "pool_recycle": int(env.get('DB_POOL_RECYCLE', 1800)),
+        "statement_timeout": int(env.get('DB_STATEMENT_TIMEOUT', 30000)),
+        "prepare_threshold": env.get('DB_PREPARE_THRESHOLD', '5'),
+        "echo": bool(int(env.get('DB_ECHO', 0))),
+        "async_driver": env.get('DB_ASYNC_DRIVER', 'asyncpg'),
+        "url": env.get('DB_URL') or None,
+        "copy_threshold": int(env.get('DB_COPY_THRESHOLD', 5000)),
+    }
+
+
+# Async drivers of the other backends a `DB_URL` may point to
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "mysql": "aiomysql"}
+
+
+def build_url(settings: Dict[str, Any], driver: Optional[str] = None) -> URL:
+    """URL of the database, over TCP or over the Unix socket depending on `host`."""
+    if settings.get("url"):
+        url = make_url(settings["url"])
+        if driver and url.get_backend_name() != "postgresql":
+            # NOTE: The async driver setting names a PostgreSQL driver
+            driver = ASYNC_DRIVERS.get(url.get_backend_name())
+        return url.set(drivername=f"{url.get_backend_name()}+{driver}") if driver else url
+
+    host = settings["host"]
+    query = {}
+    if host and host.startswith("/"):
+        # NOTE: libpq takes the socket directory as the host parameter
+        query["host"] = host
+        host = None
+
+    return URL.create(
+        drivername=f"postgresql+{driver or settings['driver']}",
+        username=settings["user"],
+        password=settings["password"],
+        host=host,
+        port=settings["port"] if host else None,
+        database=settings["dbname"],
+        query=query,
+    )
+
+
+def connect_args(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Driver arguments applying the statement timeout and prepared statements."""
+    args = {}
+    if settings.get("url") and make_url(settings["url"]).get_backend_name() != "postgresql":
+        return args
+    if settings["statement_timeout"]:
+        args["options"] = f"-c statement_timeout={settings['statement_timeout']}"
+    if settings["driver"] == "psycopg" and settings["prepare_threshold"] not in ("", None):
+        args["prepare_threshold"] = int(settings["prepare_threshold"])
+    return args
+
+
+def async_connect_args(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Driver arguments of the async engine, asyncpg takes the same settings under other names."""
+    if settings.get("url") and make_url(settings["url"]).get_backend_name() != "postgresql":
+        return {}
+    if settings["async_driver"] != "asyncpg":
+        return connect_args({**settings, "driver": settings["async_driver"]})
+
+    args = {}
+    if settings["statement_timeout"]:
+        args["server_settings"] = {"statement_timeout": str(settings["statement_timeout"])}
+    if settings["prepare_threshold"] in ("", None):
+        # NOTE: asyncpg prepares every statement, a cache size of 0 turns that off (e.g. behind pgbouncer)
+        args["statement_cache_size"] = 0
+    return args
+
 
 class DatabaseConnection:
     _instances: Dict[str, 'DatabaseConnection'] = {}
     _lock = threading.Lock()
-    
-    def __new__(cls, dbname: str, user: str = 'egeskov'):
-        key = f"{dbname}_{user}"
+
+    def __new__(cls, dbname: Optional[str] = None, user: Optional[str] = None):
+        key = cls._key(dbname, user)
         if key not in cls._instances:
             with cls._lock:
                 if key not in cls._instances:
                     cls._instances[key] = super().__new__(cls)
         return cls._instances[key]
-    
-    def __init__(self, dbname: str, user: str = 'egeskov') -> None:
+
+    def __init__(self, dbname: Optional[str] = None, user: Optional[str] = None) -> None:
         if hasattr(self, '_initialized'):
             return
-        self.dbname = dbname
-        self.user = user
-        self.engine = self._get_engine()
+        self.settings = database_settings()
+        self.settings["dbname"] = dbname or self.settings["dbname"]
+        self.settings["user"] = user or self.settings["user"]
+        self.dbname = self.settings["dbname"]
+        self.user = self.settings["user"]
+        self._pid = os.getpid()
+        self._engine = self._get_engine()
         self.metadata = MetaData()
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.SessionLocal = sessionmaker(bind=self._engine)
         self._initialized = True
-    
-    def _get_engine(self):
-        # NOTE: Connection via Unix socket
-        # TODO: Rewrite to support TCP
-        url = f'postgresql+psycopg2://{self.user}@/{self.dbname}'
-        return create_engine(url, echo=False)
-    
+
+    @staticmethod
+    def _key(dbname: Optional[str], user: Optional[str]) -> str:
+        settings = database_settings()
+        return f"{dbname or settings['dbname']}_{user or settings['user']}"
+
+    @property
+    def engine(self) -> Engine:
+        if self._pid != os.getpid():
+            self._after_fork()
+        return self._engine
+
+    def _after_fork(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # NOTE: Drops the inherited connections without closing them, they belong to the parent
+            self._engine.dispose(close=False)
+            self._pid = os.getpid()
+
+    def _get_engine(self) -> Engine:
+        settings = self.settings
+        _pool_logging(MeteredQueuePool, settings["echo"])
+        engine = create_engine(
+            build_url(settings),
+            echo=settings["echo"],
+            poolclass=MeteredQueuePool,
+            pool_size=settings["pool_size"],
+            max_overflow=settings["max_overflow"],
+            pool_timeout=settings["pool_timeout"],
+            pool_pre_ping=settings["pool_pre_ping"],
+            pool_recycle=settings["pool_recycle"],
+            connect_args=connect_args(settings),
+        )
+        engine.pool.dbname = self.dbname
+        return engine
+
+    def pool_status(self) -> Tuple[int, int]:
+        """Connections in use and the size of the pool."""
+        pool = self.engine.pool
+        return pool.checkedout(), pool.size()
+
     @contextmanager
     def get_session(self) -> Generator[Session, None, None]:
+        # NOTE: Resolves the fork check before the session checks out a connection
+        self.engine
         session = self.SessionLocal()
         try:
             yield session
@@ -42,4 +281,96 @@ class DatabaseConnection:
             session.rollback()
             raise
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+
+class AsyncDatabaseConnection:
+    """
+    Async engine and sessions of a database, for async routes.
+
+    The engine is created on first use in every worker process, its
+    connections belong to the event loop of that worker.
+    """
+    _instances: Dict[str, 'AsyncDatabaseConnection'] = {}
+    _lock = threading.Lock()
+
+    def __new__(cls, dbname: Optional[str] = None, user: Optional[str] = None):
+        key = DatabaseConnection._key(dbname, user)
+        if key not in cls._instances:
+            with cls._lock:
+                if key not in cls._instances:
+                    cls._instances[key] = super().__new__(cls)
+        return cls._instances[key]
+
+    def __init__(self, dbname: Optional[str] = None, user: Optional[str] = None) -> None:
+        if hasattr(self, '_initialized'):
+            return
+        self.settings = database_settings()
+        self.settings["dbname"] = dbname or self.settings["dbname"]
+        self.settings["user"] = user or self.settings["user"]
+        self.dbname = self.settings["dbname"]
+        self.user = self.settings["user"]
+        self._pid = None
+        self._engine: Optional[AsyncEngine] = None
+        self.SessionLocal: Optional[async_sessionmaker] = None
+        self._initialized = True
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._pid != os.getpid():
+            self._create_engine()
+        return self._engine
+
+    def _create_engine(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._engine is not None:
+                # NOTE: Inherited through fork, drop the parent's connections without closing them
+                self._engine.sync_engine.dispose(close=False)
+
+            settings = self.settings
+            _pool_logging(MeteredAsyncQueuePool, settings["echo"])
+            self._engine = create_async_engine(
+                build_url(settings, driver=settings["async_driver"]),
+                echo=settings["echo"],
+                poolclass=MeteredAsyncQueuePool,
+                pool_size=settings["pool_size"],
+                max_overflow=settings["max_overflow"],
+                pool_timeout=settings["pool_timeout"],
+                pool_pre_ping=settings["pool_pre_ping"],
+                pool_recycle=settings["pool_recycle"],
+                connect_args=async_connect_args(settings),
+            )
+            self._engine.pool.dbname = self.dbname
+            # NOTE: Loading expired attributes after the commit would need IO outside of an await
+            self.SessionLocal = async_sessionmaker(bind=self._engine, expire_on_commit=False)
+            self._pid = os.getpid()
+
+    @asynccontextmanager
+    async def get_session(self) -> AsyncIterator[AsyncSession]:
+        # NOTE: Creates the engine and the session factory on first use in the process
+        self.engine
+        session = self.SessionLocal()
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def dispose(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency yielding a session of the configured database.
+
+    The session is committed when the route returns and rolled back when it raises.
+    """
+    async with AsyncDatabaseConnection().get_session() as session:
+        yield session
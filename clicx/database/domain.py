@@ -0,0 +1,302 @@
+"""
+Domain to SQL compiler.
+
+A domain is a list of conditions `(field, operator, value)` in prefix
+notation, the conditions are combined with `&` (and) unless preceded by
+`|` (or) or `!` (not):
+
+    ```python
+    ['|', ('name', 'ilike', 'web'), '!', ('status', 'in', ['stopped', 'paused'])]
+    ```
+
+Operators:
+    =, !=, <, <=, >, >=   Comparison, `= None` and `!= None` test for NULL
+    in, not in            Membership in a list
+    like, ilike           Substring match, case sensitive or not (`%` are added)
+    not like, not ilike   Negated substring match
+    =like, =ilike         Match against the value as a raw SQL pattern
+    child_of              The record or one of its descendants, through the
+                          `_parent_name` Many2one of the model (`parent`)
+
+A field may be a dotted path through `Many2one` and `One2many` fields, e.g.
+`('partner.country.code', '=', 'DK')`, compiled to `IN` subqueries.
+
+Compiled domains are cached by their shape, the fields and operators without
+the values, so repeated searches only bind new values to a cached statement.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, and_, bindparam, not_, or_, select, true
+from sqlalchemy.sql.elements import ColumnElement
+
+from clicx.utils.metrics import registry
+
+from .fields import One2many
+from .registry import ModelRegistry
+
+AND, OR, NOT = '&', '|', '!'
+_ARITY = {AND: 2, OR: 2, NOT: 1}
+
+COMPARISON = {
+    '=': lambda column, value: column == value,
+    '!=': lambda column, value: column != value,
+    '<': lambda column, value: column < value,
+    '<=': lambda column, value: column <= value,
+    '>': lambda column, value: column > value,
+    '>=': lambda column, value: column >= value,
+}
+PATTERN = {
+    'like': lambda column, value: column.like(value),
+    'ilike': lambda column, value: column.ilike(value),
+    'not like': lambda column, value: column.not_like(value),
+    'not ilike': lambda column, value: column.not_ilike(value),
+    '=like': lambda column, value: column.like(value),
+    '=ilike': lambda column, value: column.ilike(value),
+}
+OPERATORS = (*COMPARISON, *PATTERN, 'in', 'not in', 'child_of')
+
+_cache_lookups = registry.counter(
+    "clicx_domain_cache_total",
+    "Compiled domain lookups by result (hit, miss).",
+)
+
+
+class InvalidDomain(ValueError):
+    pass
+
+
+def normalize(domain: Optional[Sequence]) -> List:
+    """Add the implicit `&` operators, so every operator has all its operands."""
+    if not domain:
+        return []
+
+    result = []
+    expected = 1
+    for token in domain:
+        if expected == 0:
+            result.insert(0, AND)
+            expected = 1
+        if isinstance(token, (list, tuple)):
+            if len(token) != 3:
+                raise InvalidDomain(f"Invalid condition {token!r}, expected (field, operator, value)")
+            expected -= 1
+        elif token in _ARITY:
+            expected += _ARITY[token] - 1
+        else:
+            raise InvalidDomain(f"Invalid domain operator {token!r}")
+        result.append(tuple(token) if isinstance(token, list) else token)
+
+    if expected != 0:
+        raise InvalidDomain(f"Missing operands in domain {domain!r}")
+    return result
+
+
+def _kind(operator: str, value: Any) -> str:
+    if value is None and operator in ('=', '!='):
+        return 'null'
+    return 'value'
+
+
+def shape(domain: List) -> Tuple:
+    """The structure of a normalized domain, without its values."""
+    return tuple(
+        token if isinstance(token, str) else (token[0], token[1].lower(), _kind(token[1].lower(), token[2]))
+        for token in domain
+    )
+
+
+def parameters(domain: List) -> Dict[str, Any]:
+    """The values of a normalized domain, keyed by the bind parameters of its compiled shape."""
+    params = {}
+    for index, token in enumerate(domain):
+        if isinstance(token, str):
+            continue
+        _, operator, value = token
+        operator = operator.lower()
+        if _kind(operator, value) == 'null':
+            continue
+        if operator in ('like', 'ilike', 'not like', 'not ilike'):
+            value = f"%{value}%"
+        elif operator in ('in', 'not in', 'child_of'):
+            value = list(value) if isinstance(value, (list, tuple, set, frozenset)) else [value]
+        params[f"d{index}"] = value
+    return params
+
+
+class DomainCompiler:
+    """
+    Compile the normalized domains of a model into SQLAlchemy criteria.
+
+    Args:
+        model: The model class searched
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def compile(self, domain: List) -> ColumnElement:
+        if not domain:
+            return true()
+
+        stack = []
+        for index in range(len(domain) - 1, -1, -1):
+            token = domain[index]
+            if token == NOT:
+                stack.append(not_(stack.pop()))
+            elif token in (AND, OR):
+                first, second = stack.pop(), stack.pop()
+                stack.append(and_(first, second) if token == AND else or_(first, second))
+            else:
+                stack.append(self.leaf(self.model, token[0].split('.'), token[1].lower(), token[2], f"d{index}"))
+        return stack.pop()
+
+    def leaf(self, model, path: List[str], operator: str, value: Any, name: str) -> ColumnElement:
+        if operator not in OPERATORS:
+            raise InvalidDomain(f"Unsupported operator '{operator}' in domain of {model._name}")
+
+        if len(path) > 1:
+            return self.subquery(model, path, operator, value, name)
+
+        column = resolve_column(model, path[0])
+
+        if _kind(operator, value) == 'null':
+            return column.is_(None) if operator == '=' else column.is_not(None)
+
+        if operator in ('in', 'not in'):
+            param = bindparam(name, expanding=True, type_=column.type)
+            return column.in_(param) if operator == 'in' else column.not_in(param)
+
+        if operator == 'child_of':
+            return column.in_(self.descendants(target_of(model, path[0]), name))
+
+        if operator in PATTERN:
+            return PATTERN[operator](column, bindparam(name))
+
+        return COMPARISON[operator](column, bindparam(name, type_=column.type))
+
+    def subquery(self, model, path: List[str], operator: str, value: Any, name: str) -> ColumnElement:
+        """Condition on a related model, `field IN (SELECT id FROM comodel WHERE ...)`."""
+        field_name, field = resolve_field(model, path[0])
+        comodel = target_of(model, path[0])
+        condition = self.leaf(comodel, path[1:], operator, value, name)
+
+        if isinstance(field, One2many):
+            inverse = resolve_column(comodel, field.inverse_name)
+            return model.id.in_(select(inverse).where(condition))
+        return resolve_column(model, field_name).in_(select(comodel.id).where(condition))
+
+    def descendants(self, model, name: str):
+        """Ids of the records with the ids bound to `name` and all their descendants."""
+        parent = resolve_column(model, getattr(model, '_parent_name', 'parent'))
+        tree = select(model.id).where(model.id.in_(bindparam(name, expanding=True))).cte(
+            name=f"{model.__tablename__}_{name}_tree", recursive=True,
+        )
+        tree = tree.union(select(model.id).join(tree, parent == tree.c.id))
+        return select(tree.c.id)
+
+
+def resolve_field(model, name: str):
+    """The field of `model` called `name`, a Many2one may also be named by its column (`partner_id`)."""
+    fields = getattr(model, '_fields', {})
+    if name in fields:
+        return name, fields[name]
+    if name.endswith('_id') and name[:-3] in fields:
+        return name[:-3], fields[name[:-3]]
+    raise InvalidDomain(f"Unknown field '{name}' on {model._name}")
+
+
+def resolve_column(model, name: str):
+    """The mapped column of a field, the foreign key column of a Many2one."""
+    table_columns = model.__table__.columns
+    if name in table_columns:
+        return getattr(model, name)
+    field_name, field = resolve_field(model, name)
+    if f"{field_name}_id" in table_columns:
+        return getattr(model, f"{field_name}_id")
+    raise InvalidDomain(f"Field '{name}' of {model._name} has no column")
+
+
+def target_of(model, name: str):
+    """The model a field points to, `model` itself for the id."""
+    if name == 'id':
+        return model
+    _, field = resolve_field(model, name)
+    comodel_name = getattr(field, 'comodel_name', None)
+    if comodel_name is None:
+        raise InvalidDomain(f"Field '{name}' of {model._name} is not a relation")
+    comodel = ModelRegistry.get(comodel_name)
+    if comodel is None:
+        raise InvalidDomain(f"Unknown model '{comodel_name}' of field '{name}'")
+    return comodel
+
+
+class CompiledDomain:
+    """The criterion of a domain shape and the statement selecting its records."""
+
+    __slots__ = ('model', 'criterion', '_statement')
+
+    def __init__(self, model, criterion: ColumnElement):
+        self.model = model
+        self.criterion = criterion
+        self._statement: Optional[Select] = None
+
+    @property
+    def statement(self) -> Select:
+        if self._statement is None:
+            self._statement = select(self.model).where(self.criterion)
+        return self._statement
+
+
+class CompiledDomains:
+    """
+    LRU cache of compiled domains keyed by model and domain shape.
+
+    Args:
+        maxsize: Maximum number of compiled shapes kept
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple, CompiledDomain]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model, domain: Optional[Sequence]) -> Tuple[CompiledDomain, Dict[str, Any]]:
+        """The compiled domain and the values of its bind parameters."""
+        domain = normalize(domain)
+        key = (model, shape(domain))
+
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+        if compiled is not None:
+            _cache_lookups.inc(result="hit")
+            return compiled, parameters(domain)
+
+        _cache_lookups.inc(result="miss")
+        compiled = CompiledDomain(model, DomainCompiler(model).compile(domain))
+        with self._lock:
+            self._entries[key] = compiled
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled, parameters(domain)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+compiled_domains = CompiledDomains()
+
+
+def compile_domain(model, domain: Optional[Sequence]) -> Tuple[CompiledDomain, Dict[str, Any]]:
+    """
+    Compile a domain of `model`.
+
+    Returns:
+        The compiled domain, its `criterion` goes in a `where`, and the values
+        of its bind parameters to execute it with
+    """
+    return compiled_domains.get(model, domain)
@@ -0,0 +1,157 @@
+"""
+Unit of work of the ORM.
+
+An `Environment` binds the model methods to one session and one transaction.
+Inside `env.transaction()` every `create`, `search`, `browse`, `write` and
+`unlink` runs on the same connection. New records are flushed together,
+before the next query or at the commit, instead of one transaction per call.
+
+Example:
+    ```python
+    env = Environment()
+    with env.transaction():
+        for values in rows:
+            env['res.partner'].create(values)
+        env.flush()  # Assigns the ids now instead of at the commit
+    ```
+
+Routes get an environment with the `get_env` dependency. The transaction is
+committed when the route returns and rolled back when it raises:
+
+    ```python
+    @router.post("/partners")
+    def create_partner(values: dict, env: Environment = Depends(get_env)):
+        return env['res.partner'].create(values).id
+    ```
+
+Outside of a transaction every model method still runs in a transaction of its own.
+"""
+import contextvars
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+import anyio
+from sqlalchemy.orm import Session
+
+from .connection import DatabaseConnection
+from .registry import ModelRegistry
+
+_current: contextvars.ContextVar[Optional['Environment']] = contextvars.ContextVar("clicx_environment", default=None)
+
+
+class Environment:
+    """
+    Args:
+        connection: Database of the environment, defaults to the configured one
+    """
+
+    def __init__(self, connection: Optional[DatabaseConnection] = None):
+        self.connection = connection
+        self.session: Optional[Session] = None
+        self.registry = ModelRegistry
+        # Ensure relationships are resolved
+        ModelRegistry.resolve_relationships()
+
+    @classmethod
+    def current(cls) -> Optional['Environment']:
+        """The environment whose transaction is active in this context, if any."""
+        return _current.get()
+
+    def __getitem__(self, model_name: str):
+        """Get model class by name (supports dot notation)"""
+        return self.registry.get(model_name)
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.session is not None
+
+    def begin(self) -> Session:
+        """Open the session of the environment, the connection is checked out on the first query."""
+        if self.session is None:
+            self.connection = self.connection or DatabaseConnection()
+            # NOTE: Records stay readable after the commit, the session is closed right after it
+            self.session = self.connection.SessionLocal(bind=self.connection.engine, expire_on_commit=False)
+        return self.session
+
+    def flush(self):
+        """Send the pending changes, e.g. to get the ids of the created records."""
+        if self.session is not None:
+            self.session.flush()
+
+    def commit(self):
+        if self.session is not None:
+            self.session.commit()
+
+    def rollback(self):
+        if self.session is not None:
+            self.session.rollback()
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    @contextmanager
+    def activate(self) -> Iterator['Environment']:
+        """Make this the current environment of the block, without starting a transaction."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    @contextmanager
+    def transaction(self) -> Iterator['Environment']:
+        """
+        Run the block in one transaction, committed at the end and rolled back on error.
+
+        A nested block runs in a savepoint, an error only rolls back the changes of that block.
+        """
+        if self.session is not None:
+            with self.session.begin_nested(), self.activate():
+                yield self
+            return
+
+        self.begin()
+        try:
+            with self.activate():
+                yield self
+            self.commit()
+        except BaseException:
+            self.rollback()
+            raise
+        finally:
+            self.close()
+
+
+@contextmanager
+def environment() -> Iterator[Environment]:
+    """The current environment, or a new one for the duration of the block."""
+    env = Environment.current()
+    if env is not None and env.in_transaction:
+        yield env
+        return
+    with Environment().transaction() as env:
+        yield env
+
+
+async def get_env() -> AsyncIterator[Environment]:
+    """
+    Dependency yielding an environment whose transaction spans the request.
+
+    The session is opened in the request context so sync and async routes see it as
+    the current environment, the blocking commit and rollback run in a worker thread.
+    """
+    env = Environment()
+    env.begin()
+    try:
+        with env.activate():
+            yield env
+        await anyio.to_thread.run_sync(env.commit)
+    except BaseException:
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(env.rollback)
+        raise
+    finally:
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(env.close)
@@ -1,37 +1,55 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey
 from sqlalchemy import Boolean as SQLBoolean  # Rename to avoid conflict
+from sqlalchemy import Integer as SQLInteger, Text as SQLText, Float as SQLFloat  # Shadowed by the fields below
 from typing import Any
 
 class Field:
-    """Base field class"""
+    """
+    Base field class
+
+    `prefetch` applies to relational fields: reading one on a record loads it
+    for its whole record set, set it to False for large One2many fields.
+
+    `index` and `unique` create an index or a unique constraint on the column,
+    `clicx database upgrade` adds them to existing tables.
+    """
     def __init__(self, string: str = None, required: bool = False, readonly: bool = False, 
-                 default: Any = None, help: str = None, **kwargs):
+                 default: Any = None, help: str = None, prefetch: bool = True,
+                 index: bool = False, unique: bool = False, **kwargs):
         self.string = string
         self.required = required
         self.readonly = readonly
         self.default = default
         self.help = help
+        self.prefetch = prefetch
+        self.index = index
+        self.unique = unique
         self.kwargs = kwargs
     
     def get_column(self, name: str) -> Column:
         """Override in subclasses to return appropriate SQLAlchemy column"""
         raise NotImplementedError
 
+    def column_options(self) -> dict:
+        """Options of the column shared by every field type"""
+        # NOTE: None instead of False, so SQLAlchemy neither creates nor drops anything for them
+        return {"nullable": not self.required, "index": self.index or None, "unique": self.unique or None}
+
 class Char(Field):
     def __init__(self, size: int = 255, **kwargs):
         super().__init__(**kwargs)
         self.size = size
     
     def get_column(self, name: str) -> Column:
-        return Column(name, String(self.size), nullable=not self.required, default=self.default)
+        return Column(name, String(self.size), default=self.default, **self.column_options())
 
 class Text(Field):
     def get_column(self, name: str) -> Column:
-        return Column(name, Text, nullable=not self.required, default=self.default)
+        return Column(name, SQLText, default=self.default, **self.column_options())
 
 class Integer(Field):
     def get_column(self, name: str) -> Column:
-        return Column(name, Integer, nullable=not self.required, default=self.default)
+        return Column(name, SQLInteger, default=self.default, **self.column_options())
 
 class Float(Field):
     def __init__(self, digits: tuple = None, **kwargs):
@@ -39,15 +57,15 @@ class Float(Field):
         self.digits = digits
     
     def get_column(self, name: str) -> Column:
-        return Column(name, Float, nullable=not self.required, default=self.default)
+        return Column(name, SQLFloat, default=self.default, **self.column_options())
 
 class Boolean(Field):
     def get_column(self, name: str) -> Column:
-        return Column(name, SQLBoolean, nullable=not self.required, default=self.default or False)
+        return Column(name, SQLBoolean, default=self.default or False, **self.column_options())
 
 class Datetime(Field):
     def get_column(self, name: str) -> Column:
-        return Column(name, DateTime, nullable=not self.required, default=self.default)
+        return Column(name, DateTime, default=self.default, **self.column_options())
 
 class Many2one(Field):
     def __init__(self, comodel_name: str, ondelete: str = 'set null', **kwargs):
@@ -57,8 +75,8 @@ class Many2one(Field):
     
     def get_column(self, name: str) -> Column:
         # Foreign key column will be created dynamically
-        return Column(f"{name}_id", Integer, ForeignKey(f"{self.comodel_name.replace('.', '_')}.id", 
-                     ondelete=self.ondelete), nullable=not self.required)
+        return Column(f"{name}_id", SQLInteger, ForeignKey(f"{self.comodel_name.replace('.', '_')}.id", 
+                     ondelete=self.ondelete), **self.column_options())
 
 class One2many(Field):
     def __init__(self, comodel_name: str, inverse_name: str, **kwargs):
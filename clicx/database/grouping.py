@@ -0,0 +1,193 @@
+"""
+Aggregations of records grouped by fields, computed by the database.
+
+`read_group` compiles to one `SELECT ... GROUP BY` instead of loading the
+records into Python:
+
+    ```python
+    Vm.read_group(
+        [('status', '=', 'running')],
+        ['disk:sum', 'memory:avg', 'largest:max(disk)'],
+        ['node', 'create_date:month'],
+        orderby='disk desc',
+    )
+    # [{'node': 1, 'create_date:month': datetime(2026, 10, 1), 'disk': 480, 'memory': 4096.0, 'largest': 120, '__count': 6}, ...]
+    ```
+
+Fields:
+    field:agg         The aggregate of the field under its name
+    name:agg(field)   The aggregate of the field under another name
+    field             The sum of a numeric field
+
+    where agg is one of sum, avg, min, max, count, count_distinct. Every
+    group also has its number of records in `__count`. The names must be
+    distinct from each other, the group bys and `__count`.
+
+Group by:
+    field             The value of the field, the id for a Many2one
+    field:granularity A date bucket of a Datetime field, one of hour, day,
+                      week (starting on Monday), month, quarter, year. The
+                      value is the start of the bucket.
+
+`orderby` sorts the groups by group by names, field names or `__count`,
+each optionally followed by `asc` or `desc`, by default the groups are
+sorted by their group by values.
+"""
+import re
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, Integer, Select, cast, distinct, func, select
+
+from .domain import InvalidDomain, compile_domain, resolve_column
+
+AGGREGATES = {
+    'sum': func.sum,
+    'avg': func.avg,
+    'min': func.min,
+    'max': func.max,
+    'count': func.count,
+    'count_distinct': lambda column: func.count(distinct(column)),
+}
+GRANULARITIES = ('hour', 'day', 'week', 'month', 'quarter', 'year')
+
+_FIELD = re.compile(r'(\w+)(?::(\w+)(?:\((\w+)\))?)?')
+
+
+class InvalidGroupBy(InvalidDomain):
+    pass
+
+
+def parse_field(model, spec: str) -> Tuple[str, str, str]:
+    """The name, aggregate and field of a field spec."""
+    match = _FIELD.fullmatch(spec.strip())
+    if match is None:
+        raise InvalidGroupBy(f"Invalid field '{spec}', expected 'field:agg' or 'name:agg(field)'")
+    name, aggregate, field = match.group(1), match.group(2), match.group(3) or match.group(1)
+
+    if aggregate is None:
+        try:
+            python_type = resolve_column(model, field).type.python_type
+        except NotImplementedError:
+            python_type = None
+        if python_type not in (int, float, Decimal) or field == 'id':
+            raise InvalidGroupBy(f"Field '{field}' of {model._name} is not numeric, give its aggregate as '{field}:agg'")
+        aggregate = 'sum'
+    if aggregate not in AGGREGATES:
+        raise InvalidGroupBy(f"Unsupported aggregate '{aggregate}', expected one of {', '.join(AGGREGATES)}")
+    return name, aggregate, field
+
+
+def bucket(column, granularity: str, dialect: str):
+    """The start of the date bucket of `column`."""
+    if granularity not in GRANULARITIES:
+        raise InvalidGroupBy(f"Unsupported granularity '{granularity}', expected one of {', '.join(GRANULARITIES)}")
+    if dialect == 'postgresql':
+        return func.date_trunc(granularity, column)
+    if dialect != 'sqlite':
+        raise InvalidGroupBy(f"Date buckets are not supported on {dialect}")
+
+    # NOTE: SQLite stores datetimes as ISO text, the buckets are ISO text parsed back in `_value`
+    if granularity == 'hour':
+        return func.strftime('%Y-%m-%d %H:00:00', column)
+    if granularity == 'day':
+        return func.strftime('%Y-%m-%d', column)
+    if granularity == 'week':
+        return func.date(column, '-6 days', 'weekday 1')
+    if granularity == 'month':
+        return func.strftime('%Y-%m-01', column)
+    if granularity == 'quarter':
+        month = (cast(func.strftime('%m', column), Integer) - 1) // 3 * 3 + 1
+        return func.printf('%s-%02d-01', func.strftime('%Y', column), month)
+    return func.strftime('%Y-01-01', column)
+
+
+class GroupQuery:
+    """
+    The statement of a `read_group` of `model`.
+
+    Args:
+        model: The model grouped
+        domain: The records grouped
+        fields: The aggregates of each group
+        groupby: The fields the records are grouped by
+        orderby: The order of the groups
+        limit: Maximum number of groups
+        offset: Number of groups skipped
+        dialect: Name of the database dialect, for the date buckets
+    """
+
+    def __init__(self, model, domain: Optional[Sequence], fields: Sequence[str], groupby: Sequence[str],
+                 orderby: Optional[str] = None, limit: Optional[int] = None, offset: Optional[int] = None,
+                 dialect: str = 'postgresql'):
+        self.model = model
+        self.groupby = [groupby] if isinstance(groupby, str) else list(groupby)
+        self.dates = set()
+        compiled, self.params = compile_domain(model, domain)
+
+        groups = []
+        for spec in self.groupby:
+            field, _, granularity = spec.partition(':')
+            column = resolve_column(model, field)
+            if granularity:
+                if not isinstance(column.type, DateTime):
+                    raise InvalidGroupBy(f"Field '{field}' of {model._name} is not a Datetime, it has no '{granularity}' buckets")
+                column = bucket(column, granularity, dialect)
+                self.dates.add(spec)
+            groups.append(column)
+
+        # NOTE: Positional labels, the names may contain ':' and are mapped back in `rows`
+        self.labels: Dict[str, Any] = {}
+        columns = []
+        for index, (spec, column) in enumerate(zip(self.groupby, groups)):
+            if spec in self.labels:
+                raise InvalidGroupBy(f"Duplicate group by '{spec}'")
+            labeled = column.label(f"g{index}")
+            self.labels[spec] = labeled
+            columns.append(labeled)
+        for index, spec in enumerate(fields):
+            name, aggregate, field = parse_field(model, spec)
+            if name in self.labels or name == '__count':
+                raise InvalidGroupBy(f"Duplicate name '{name}' of field '{spec}', give it another name as 'name:{aggregate}({field})'")
+            labeled = AGGREGATES[aggregate](resolve_column(model, field)).label(f"a{index}")
+            self.labels[name] = labeled
+            columns.append(labeled)
+        count = func.count().label("c")
+        self.labels['__count'] = count
+        columns.append(count)
+
+        statement = select(*columns).select_from(model).where(compiled.criterion).group_by(*groups)
+        statement = statement.order_by(*self._order(orderby, groups))
+        if offset:
+            statement = statement.offset(offset)
+        if limit:
+            statement = statement.limit(limit)
+        self.statement: Select = statement
+
+    def _order(self, orderby: Optional[str], groups: List) -> List:
+        if not orderby:
+            return groups
+        clauses = []
+        for part in orderby.split(','):
+            tokens = part.split()
+            if not tokens:
+                continue
+            if len(tokens) > 2 or (len(tokens) == 2 and tokens[1].lower() not in ('asc', 'desc')):
+                raise InvalidGroupBy(f"Invalid order '{part.strip()}', expected 'name [asc|desc]'")
+            if tokens[0] not in self.labels:
+                raise InvalidGroupBy(f"Cannot order groups by '{tokens[0]}', expected one of {', '.join(self.labels)}")
+            label = self.labels[tokens[0]]
+            clauses.append(label.desc() if len(tokens) == 2 and tokens[1].lower() == 'desc' else label.asc())
+        return clauses
+
+    def rows(self, result) -> List[Dict[str, Any]]:
+        """The groups of the executed statement as dicts keyed by the requested names."""
+        names = list(self.labels)
+        return [{name: self._value(name, value) for name, value in zip(names, row)} for row in result]
+
+    def _value(self, name: str, value: Any) -> Any:
+        if name in self.dates and isinstance(value, str):
+            return datetime.fromisoformat(value)
+        return value
+
@@ -0,0 +1,119 @@
+"""
+Order of search results and keyset pagination.
+
+An order is a comma separated list of fields, each optionally followed by
+`asc` or `desc`, e.g. `'status, create_date desc'`. The id is appended as
+the last key when missing, so the order is total and a page boundary falls
+between two distinct records.
+
+Keyset pagination continues after the last record of the previous page
+instead of skipping `offset` rows, so every page costs the same with an
+index on the order keys:
+
+    ```python
+    page = Vm.search([('status', '=', 'running')], order='name, id', limit=100)
+    while page:
+        ...
+        page = Vm.search([('status', '=', 'running')], order='name, id', limit=100, after=page[-1])
+    ```
+
+NULL is the largest value of a nullable order field: NULLs come last in
+ascending order and first in descending order, PostgreSQL's default, on
+every database. A cursor value may be NULL.
+"""
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, false, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+from .domain import InvalidDomain, resolve_column
+
+
+class InvalidOrder(InvalidDomain):
+    pass
+
+
+def parse_order(model, order: Optional[str]) -> List[Tuple[Any, bool]]:
+    """The columns of `order` with whether they are descending, ending with the id."""
+    keys = []
+    for part in (order or '').split(','):
+        tokens = part.split()
+        if not tokens:
+            continue
+        if len(tokens) > 2 or (len(tokens) == 2 and tokens[1].lower() not in ('asc', 'desc')):
+            raise InvalidOrder(f"Invalid order '{part.strip()}' on {model._name}, expected 'field [asc|desc]'")
+        try:
+            column = resolve_column(model, tokens[0])
+        except InvalidDomain as e:
+            raise InvalidOrder(str(e)) from e
+        keys.append((column, len(tokens) == 2 and tokens[1].lower() == 'desc'))
+
+    if not any(column.key == 'id' for column, _ in keys):
+        keys.append((model.id, keys[-1][1] if keys else False))
+    return keys
+
+
+def _nullable(column) -> bool:
+    return getattr(column.expression, 'nullable', True)
+
+
+def order_clauses(keys: List[Tuple[Any, bool]]) -> List:
+    clauses = []
+    for column, descending in keys:
+        clause = column.desc() if descending else column.asc()
+        if _nullable(column):
+            # NOTE: Explicit, as SQLite and MySQL sort NULL first; a no-op on PostgreSQL's indexes
+            clause = clause.nulls_first() if descending else clause.nulls_last()
+        clauses.append(clause)
+    return clauses
+
+
+def cursor_values(keys: List[Tuple[Any, bool]], after: Any) -> List:
+    """The values of the order keys of `after`, a record, its id or a tuple of the values."""
+    if isinstance(after, (list, tuple)):
+        values = list(after)
+    elif isinstance(after, int) and len(keys) == 1:
+        values = [after]
+    elif hasattr(after, '__table__'):
+        values = [getattr(after, column.key) for column, _ in keys]
+    else:
+        raise InvalidOrder(f"Invalid cursor {after!r}, expected a record or the values of {[column.key for column, _ in keys]}")
+
+    if len(values) != len(keys):
+        raise InvalidOrder(f"Cursor {after!r} has {len(values)} values, the order has {len(keys)} keys")
+    return values
+
+
+def _after(column, descending: bool, value: Any) -> ColumnElement:
+    """Condition selecting the values of `column` after `value`, NULL being the largest value."""
+    if value is None:
+        return column.is_not(None) if descending else false()
+    if descending:
+        return column < value
+    if _nullable(column):
+        return or_(column > value, column.is_(None))
+    return column > value
+
+
+def _equal(column, value: Any) -> ColumnElement:
+    return column.is_(None) if value is None else column == value
+
+
+def keyset(keys: List[Tuple[Any, bool]], values: Sequence) -> ColumnElement:
+    """Condition selecting the records after `values` in the order of `keys`."""
+    if len(keys) == 1:
+        column, descending = keys[0]
+        return _after(column, descending, values[0])
+
+    if all(descending == keys[0][1] for _, descending in keys) and not any(_nullable(column) for column, _ in keys):
+        # NOTE: A row comparison, matched against a composite index on the keys
+        columns = tuple_(*(column for column, _ in keys))
+        bound = tuple_(*values)
+        return columns < bound if keys[0][1] else columns > bound
+
+    # Mixed directions or nullable keys: (a > x) OR (a = x AND b < y) OR ...
+    conditions = []
+    for index, (column, descending) in enumerate(keys):
+        equal = [_equal(previous, value) for (previous, _), value in zip(keys[:index], values)]
+        conditions.append(and_(*equal, _after(column, descending, values[index])))
+    return or_(*conditions)
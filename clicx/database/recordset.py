@@ -0,0 +1,371 @@
+"""
+Sets of records of one model.
+
+`search` and `browse` return a `RecordSet`, a list of records whose `write`
+and `unlink` act on all of them in one statement, and `create` takes a list
+of values to insert many records at once:
+
+    ```python
+    partners = env['res.partner'].create([{'name': name} for name in names])  # INSERT ... RETURNING
+    partners.write({'is_company': True})  # One UPDATE ... WHERE id IN (...)
+    partners.unlink()                     # One DELETE ... WHERE id IN (...)
+    ```
+
+On PostgreSQL a create of at least `DB_COPY_THRESHOLD` records streams the
+rows with `COPY`, the ids are taken from the sequence of the table beforehand.
+
+Relational fields are prefetched: reading `partner` on one record of a record
+set loads it for every record of the set in one `IN` query, also after the
+session of the search is closed. Fields declared with `prefetch=False` are
+loaded one record at a time. `search(..., prefetch=['partner.country'])`
+loads the given paths with the search itself.
+"""
+import io
+import weakref
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import delete, insert, inspect, select, text, update
+from sqlalchemy.orm import make_transient_to_detached, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.interfaces import MANYTOONE
+
+from .cache import invalidate
+from .environment import Environment, environment
+from .fields import Many2one
+
+# NOTE: Below the bind parameter limit of SQLite, PostgreSQL has none for a list of ids
+ID_CHUNK_SIZE = 30000
+
+
+def column_values(model, values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The column values of `values`, a Many2one is stored in its `<name>_id` column.
+
+    Keys that are not a column of the model are ignored.
+    """
+    columns = model.__table__.columns
+    fields = getattr(model, '_fields', {})
+    result = {}
+    for key, value in values.items():
+        if key in columns:
+            result[key] = value
+        elif isinstance(fields.get(key), Many2one) and f"{key}_id" in columns:
+            result[f"{key}_id"] = getattr(value, 'id', value)
+    return result
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
+
+
+class RecordSet(list):
+    """
+    Records of `model`, in the order they were read or created.
+
+    Args:
+        model: The model class of the records
+        records: The records
+    """
+
+    def __init__(self, model, records: Iterable = ()):
+        super().__init__(records)
+        self.model = model
+        # NOTE: The records keep their set alive for the prefetching, the set only refers to them weakly
+        group = weakref.WeakSet(self)
+        for record in self:
+            record._prefetch_group = group
+
+    def __repr__(self) -> str:
+        return f"{self.model._name}{tuple(self.ids)}"
+
+    @property
+    def ids(self) -> List[int]:
+        return [record.id for record in self]
+
+    def write(self, values: Dict[str, Any]) -> 'RecordSet':
+        """Update every record with one UPDATE statement"""
+        values = column_values(self.model, values)
+        if not self or not values:
+            return self
+
+        with environment() as env:
+            # NOTE: Records created in this transaction get their id from the flush
+            env.flush()
+            for ids in _chunks(self.ids):
+                env.session.execute(update(self.model).where(self.model.id.in_(ids)).values(**values))
+            invalidate(self.model, self.ids, session=env.session)
+
+        # NOTE: Records of the session are synchronized by the UPDATE, the others are set without marking them dirty
+        fields = getattr(self.model, '_fields', {})
+        relations = [key[:-3] for key in values if isinstance(fields.get(key[:-3]), Many2one)]
+        for record in self:
+            for key, value in values.items():
+                set_committed_value(record, key, value)
+            state = inspect(record)
+            if relations and state.session is not None:
+                state.session.expire(record, relations)
+            elif relations:
+                # NOTE: Unloaded, the relation is prefetched again on the next access
+                for name in relations:
+                    record.__dict__.pop(name, None)
+        return self
+
+    def prefetch(self, *paths: str) -> 'RecordSet':
+        """
+        Load the relational fields `paths` of the records that miss them, one query per field.
+
+        A path may go through several relations, e.g. `partner.country`.
+        """
+        records = [record for record in self if record.id is not None]
+        if not records:
+            return self
+
+        with environment() as env:
+            for path in paths:
+                name, _, rest = path.partition('.')
+                missing = [record for record in records if name not in record.__dict__]
+                if missing:
+                    load_relation(env.session, self.model, missing, name)
+                targets = RecordSet(relation_of(self.model, name).mapper.class_, _targets(records, name))
+                if rest:
+                    targets.prefetch(rest)
+        return self
+
+    def unlink(self):
+        """Delete every record with one DELETE statement"""
+        if not self:
+            return
+
+        with environment() as env:
+            env.flush()
+            for ids in _chunks(self.ids):
+                env.session.execute(delete(self.model).where(self.model.id.in_(ids)))
+            invalidate(self.model, self.ids, session=env.session)
+
+
+def _targets(records: List, name: str) -> List:
+    """The distinct records the relation `name` of `records` points to"""
+    targets = {}
+    for record in records:
+        value = record.__dict__.get(name)
+        for target in (value if isinstance(value, list) else [value]):
+            if target is not None:
+                targets[id(target)] = target
+    return list(targets.values())
+
+
+def relation_of(model, name: str):
+    """The relationship of the relational field `name`"""
+    relation = inspect(model).relationships.get(name)
+    if relation is None:
+        raise ValueError(f"Field '{name}' of {model._name} is not a relation")
+    return relation
+
+
+def load_relation(session, model, records: List, name: str):
+    """
+    Load the relation `name` of `records` with one query per chunk of ids.
+
+    The value is set as committed on each record, so it also works on records
+    whose session is closed.
+    """
+    relation = relation_of(model, name)
+    comodel = relation.mapper.class_
+
+    if relation.direction is MANYTOONE:
+        (column, remote), = relation.local_remote_pairs
+        key = relation.parent.get_property_by_column(column).key
+        values = {id(record): getattr(record, key) for record in records}
+        targets = {}
+        for ids in _chunks(sorted({value for value in values.values() if value is not None})):
+            for target in session.scalars(select(comodel).where(remote.in_(ids))):
+                targets[target.id] = target
+        for record in records:
+            set_committed_value(record, name, targets.get(values[id(record)]))
+        return
+
+    groups = defaultdict(list)
+    ids = sorted({record.id for record in records})
+    if relation.secondary is None:
+        (_, remote), = relation.local_remote_pairs
+        key = relation.mapper.get_property_by_column(remote).key
+        for chunk in _chunks(ids):
+            for target in session.scalars(select(comodel).where(remote.in_(chunk)).order_by(comodel.id)):
+                groups[getattr(target, key)].append(target)
+    else:
+        (_, secondary_local), = relation.synchronize_pairs
+        (remote, secondary_remote), = relation.secondary_synchronize_pairs
+        for chunk in _chunks(ids):
+            statement = (
+                select(secondary_local, comodel)
+                .join(relation.secondary, secondary_remote == remote)
+                .where(secondary_local.in_(chunk))
+                .order_by(comodel.id)
+            )
+            for record_id, target in session.execute(statement):
+                groups[record_id].append(target)
+
+    for record in records:
+        set_committed_value(record, name, groups.get(record.id, []))
+
+
+def prefetch_options(model, paths: Sequence[str]) -> List:
+    """The `selectinload` options of a query loading the relational `paths` with its records."""
+    options = []
+    for path in paths:
+        current, loader = model, None
+        for name in path.split('.'):
+            relation = relation_of(current, name)
+            attribute = relation.class_attribute
+            loader = selectinload(attribute) if loader is None else loader.selectinload(attribute)
+            current = relation.mapper.class_
+        options.append(loader)
+    return options
+
+
+def group_loaded(records: RecordSet, paths: Sequence[str]) -> RecordSet:
+    """
+    Group the records loaded along `paths` with `records`, e.g. by `prefetch_options`,
+    in record sets, so the relations they don't have loaded are prefetched for all of them.
+    """
+    for path in paths:
+        current, loaded = records.model, list(records)
+        for name in path.split('.'):
+            current = relation_of(current, name).mapper.class_
+            loaded = _targets(loaded, name)
+            RecordSet(current, loaded)
+    return records
+
+
+class Prefetched:
+    """
+    Class attribute of a relational field, loads it for the whole record set on first access.
+
+    Records of another session than the one of the current environment, e.g.
+    an async one, are loaded as usual.
+
+    Args:
+        attribute: The instrumented attribute of the relationship
+    """
+
+    def __init__(self, attribute):
+        self.attribute = attribute
+        self.key = attribute.key
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self.attribute
+        if self.key not in instance.__dict__:
+            self._prefetch(instance)
+        return self.attribute.__get__(instance, owner)
+
+    def __set__(self, instance, value):
+        self.attribute.__set__(instance, value)
+
+    def __delete__(self, instance):
+        self.attribute.__delete__(instance)
+
+    def _prefetch(self, instance):
+        state = inspect(instance)
+        if state.key is None:
+            return
+        env = Environment.current()
+        current = env.session if env is not None and env.in_transaction else None
+        if state.session is not None and state.session is not current:
+            return
+
+        group = instance.__dict__.get('_prefetch_group') or (instance,)
+        records = [
+            record for record in group
+            if self.key not in record.__dict__ and inspect(record).session is state.session and record.id is not None
+        ]
+        if instance not in records:
+            records.append(instance)
+        with environment() as env:
+            load_relation(env.session, type(instance), records, self.key)
+        # NOTE: The records loaded are prefetched together in turn, e.g. for `partner.country`
+        RecordSet(self.attribute.property.mapper.class_, _targets(records, self.key))
+
+
+def bulk_create(model, values_list: List[Dict[str, Any]]) -> RecordSet:
+    """
+    Insert many records at once, returns them in the order of `values_list`.
+
+    The records are inserted with INSERT ... RETURNING in batches, or with COPY
+    on PostgreSQL from `DB_COPY_THRESHOLD` records.
+    """
+    rows = [column_values(model, values) for values in values_list]
+    if not rows:
+        return RecordSet(model)
+
+    with environment() as env:
+        bind = env.session.get_bind()
+        if bind.dialect.name == 'postgresql' and len(rows) >= env.connection.settings['copy_threshold']:
+            return RecordSet(model, _copy(env, model, rows))
+
+        statement = insert(model).returning(model, sort_by_parameter_order=True)
+        return RecordSet(model, env.session.scalars(statement, rows).all())
+
+
+def _copy_value(value: Any) -> str:
+    """A value in the text format of COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _copy(env, model, rows: List[Dict[str, Any]]) -> List:
+    table = model.__table__
+    names = {key for row in rows for key in row}
+    # NOTE: Python side defaults are applied here, COPY only knows the server defaults
+    defaults = {
+        column.name: column.default for column in table.columns
+        if column.default is not None and not column.default.is_sequence and column.name != 'id'
+    }
+    columns = ['id', *sorted(names | set(defaults))]
+
+    ids = env.session.execute(
+        text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+        {"table": table.name, "count": len(rows)},
+    ).scalars().all()
+
+    buffer = io.StringIO()
+    records = []
+    for record_id, row in zip(ids, rows):
+        row = dict(row, id=record_id)
+        for name, default in defaults.items():
+            if name not in row:
+                row[name] = default.arg(None) if default.is_callable else default.arg
+        buffer.write('\t'.join(_copy_value(row.get(name)) for name in columns))
+        buffer.write('\n')
+        records.append(row)
+
+    column_list = ', '.join(f'"{name}"' for name in columns)
+    statement = f'COPY "{table.name}" ({column_list}) FROM STDIN'
+    cursor = env.session.connection().connection.cursor()
+    try:
+        if env.session.get_bind().dialect.driver == 'psycopg2':
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+        else:
+            with cursor.copy(statement) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+    instances = []
+    for row in records:
+        instance = model(**row)
+        instance.id = row['id']
+        # NOTE: Known to exist in the database, added to the session without an INSERT
+        make_transient_to_detached(instance)
+        env.session.add(instance)
+        instances.append(instance)
+    return instances
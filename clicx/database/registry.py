@@ -70,9 +70,12 @@ class ModelRegistry:
                 # Find the target model class
                 target_model = cls.get(field_obj.comodel_name)
                 if target_model:
+                    # A Many2one to its own model (e.g. parent) needs the remote side to tell it from a One2many
+                    remote_side = [target_model.__table__.c.id] if target_model is model_class else ()
                     rel = relationship(
                         target_model.__name__,
-                        foreign_keys=[field_obj._fk_column]
+                        foreign_keys=[field_obj._fk_column],
+                        remote_side=remote_side,
                     )
                     setattr(model_class, field_name, rel)
                     
@@ -80,9 +83,12 @@ class ModelRegistry:
                 # Find the target model class
                 target_model = cls.get(field_obj.comodel_name)
                 if target_model:
+                    # The inverse Many2one column, the comodel may have several foreign keys to this model
+                    inverse_column = target_model.__table__.c.get(f"{field_obj.inverse_name}_id")
                     rel = relationship(
                         target_model.__name__,
-                        back_populates=field_obj.inverse_name
+                        back_populates=field_obj.inverse_name,
+                        foreign_keys=[inverse_column] if inverse_column is not None else None,
                     )
                     setattr(model_class, field_name, rel)
                     
@@ -101,6 +107,16 @@ class ModelRegistry:
                     )
                     setattr(model_class, field_name, rel)
         
+        # Relational fields are loaded for the whole record set on first access
+        from sqlalchemy.orm import InstrumentedAttribute
+        from .recordset import Prefetched
+
+        for field_name, field_obj in model_class._pending_relationships.items():
+            attribute = model_class.__dict__.get(field_name)
+            if field_obj.prefetch and isinstance(attribute, InstrumentedAttribute):
+                # NOTE: Bypasses the declarative __setattr__, the relationship stays mapped
+                type.__setattr__(model_class, field_name, Prefetched(attribute))
+
         # Clean up pending relationships
         if hasattr(model_class, '_pending_relationships'):
             delattr(model_class, '_pending_relationships')
\ No newline at end of file
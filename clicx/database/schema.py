@@ -0,0 +1,254 @@
+"""
+Schema upgrades of an existing database.
+
+`create_all` only creates missing tables. `diff` compares the models with the
+live schema and returns the operations bringing it up to date: missing
+tables, columns, indexes and constraints. `clicx database upgrade` prints
+and applies them.
+
+On PostgreSQL indexes are built with `CREATE INDEX CONCURRENTLY`, which does
+not block writes to the table. Unique constraints are added on top of such an
+index with `ADD CONSTRAINT ... USING INDEX`, check constraints are added
+`NOT VALID` and validated afterwards. An index left invalid by a failed
+concurrent build is dropped and built again.
+
+The DDL runs without the statement timeout of the engine
+(`DB_STATEMENT_TIMEOUT`), an index build or a validation on a large table
+would otherwise be cancelled half way. The steps taking an exclusive lock on
+a table (`ALTER TABLE`, `CREATE TABLE`) wait at most `lock_timeout` for it,
+so a long running transaction fails the upgrade instead of queueing every
+other query on the table behind it.
+
+Nothing is ever dropped or altered: removed fields and indexes are reported
+as unmanaged, changed column types are not detected.
+"""
+from typing import List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import CheckConstraint, MetaData, Table, UniqueConstraint, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+
+
+class Operation:
+    """
+    A change of the schema.
+
+    Args:
+        description: What the operation does
+        statements: SQL statements run in order
+        concurrent: Run outside of a transaction, as `CREATE INDEX CONCURRENTLY` requires
+    """
+
+    __slots__ = ('description', 'statements', 'concurrent')
+
+    def __init__(self, description: str, statements: Sequence[str], concurrent: bool = False):
+        self.description = description
+        self.statements = list(statements)
+        self.concurrent = concurrent
+
+    def __repr__(self) -> str:
+        return f"Operation({self.description!r})"
+
+
+class SchemaDiff:
+    """
+    Difference between the tables of `metadata` and the schema of the database of `engine`.
+
+    Args:
+        engine: Engine of the database
+        metadata: Tables of the models, `Base.metadata` by default
+    """
+
+    def __init__(self, engine: Engine, metadata: Optional[MetaData] = None):
+        if metadata is None:
+            from .base import Base
+            metadata = Base.metadata
+        self.engine = engine
+        self.metadata = metadata
+        self.dialect = engine.dialect
+        self.postgresql = self.dialect.name == 'postgresql'
+        self.quote = self.dialect.identifier_preparer.quote
+        self.operations: List[Operation] = []
+        self.unmanaged: List[str] = []
+
+    def compute(self) -> List[Operation]:
+        inspector = inspect(self.engine)
+        tables = set(inspector.get_table_names())
+        invalid = self._invalid_indexes()
+
+        for table in self.metadata.sorted_tables:
+            if table.name not in tables:
+                self._create_table(table)
+                continue
+
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    self._add_column(table, column)
+
+            indexes = [index for index in inspector.get_indexes(table.name) if index['name'] not in invalid]
+            existing = {(tuple(index['column_names']), bool(index['unique'])) for index in indexes}
+            existing |= {
+                (tuple(constraint['column_names']), True)
+                for constraint in inspector.get_unique_constraints(table.name)
+            }
+            wanted = set()
+            for index in sorted(table.indexes, key=lambda index: index.name or ''):
+                key = (tuple(column.name for column in index.columns), bool(index.unique))
+                wanted.add(key)
+                # NOTE: A unique index also serves the lookups of a plain one
+                if key not in existing and (key[0], True) not in existing:
+                    self._create_index(table, index, invalid)
+
+            for constraint in sorted(table.constraints, key=lambda constraint: constraint.name or ''):
+                if isinstance(constraint, UniqueConstraint):
+                    key = (tuple(column.name for column in constraint.columns), True)
+                    wanted.add(key)
+                    if key not in existing:
+                        self._add_unique(table, constraint, invalid)
+                elif isinstance(constraint, CheckConstraint) and isinstance(constraint.name, str):
+                    self._add_check(table, constraint, inspector)
+
+            for index in indexes:
+                key = (tuple(index['column_names']), bool(index['unique']))
+                if key not in wanted and (key[0], False) not in wanted:
+                    self.unmanaged.append(f"index {index['name']} on {table.name}")
+            for column in sorted(columns - {column.name for column in table.columns}):
+                self.unmanaged.append(f"column {table.name}.{column}")
+
+        return self.operations
+
+    def _table(self, table: Table) -> str:
+        return self.dialect.identifier_preparer.format_table(table)
+
+    def _columns(self, names: Sequence[str]) -> str:
+        return ", ".join(self.quote(name) for name in names)
+
+    def _invalid_indexes(self) -> Set[str]:
+        """Indexes left invalid by a failed concurrent build, PostgreSQL only"""
+        if not self.postgresql:
+            return set()
+        with self.engine.connect() as connection:
+            return set(connection.execute(text(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+            )).scalars())
+
+    def _drop_invalid(self, name: str, invalid: Set[str]) -> List[str]:
+        return [f"DROP INDEX CONCURRENTLY IF EXISTS {self.quote(name)}"] if name in invalid else []
+
+    def _create_table(self, table: Table):
+        statements = [str(CreateTable(table).compile(dialect=self.dialect)).strip()]
+        statements += [str(CreateIndex(index).compile(dialect=self.dialect)) for index in table.indexes]
+        self.operations.append(Operation(f"Create table {table.name}", statements))
+
+    def _add_column(self, table: Table, column):
+        definition = CreateColumn(column).compile(dialect=self.dialect)
+        description = f"Add column {table.name}.{column.name}"
+        if not column.nullable and column.server_default is None:
+            description += " (NOT NULL without a server default, fails when the table has rows)"
+        statements = [f"ALTER TABLE {self._table(table)} ADD COLUMN {definition}"]
+        for foreign_key in column.foreign_keys:
+            # NOTE: CreateColumn leaves out the foreign keys, they are table constraints
+            target = foreign_key.column
+            statement = (
+                f"ALTER TABLE {self._table(table)} ADD FOREIGN KEY ({self.quote(column.name)}) "
+                f"REFERENCES {self._table(target.table)} ({self.quote(target.name)})"
+            )
+            if foreign_key.ondelete:
+                statement += f" ON DELETE {foreign_key.ondelete.upper()}"
+            # NOTE: SQLite can't add a foreign key to a table
+            if self.dialect.name != 'sqlite':
+                statements.append(statement)
+        self.operations.append(Operation(description, statements))
+
+    def _create_index(self, table: Table, index, invalid: Set[str]):
+        statement = str(CreateIndex(index).compile(dialect=self.dialect))
+        if self.postgresql:
+            statement = statement.replace(" INDEX ", " INDEX CONCURRENTLY ", 1)
+        self.operations.append(Operation(
+            f"Create index {index.name} on {table.name}",
+            [*self._drop_invalid(index.name, invalid), statement],
+            concurrent=self.postgresql,
+        ))
+
+    def _add_unique(self, table: Table, constraint: UniqueConstraint, invalid: Set[str]):
+        names = [column.name for column in constraint.columns]
+        name = constraint.name if isinstance(constraint.name, str) else f"{table.name}_{'_'.join(names)}_key"
+        description = f"Add unique constraint {name} on {table.name} ({', '.join(names)})"
+        if not self.postgresql:
+            # NOTE: SQLite can't add constraints to a table, a unique index enforces the same
+            self.operations.append(Operation(description, [
+                f"CREATE UNIQUE INDEX {self.quote(name)} ON {self._table(table)} ({self._columns(names)})",
+            ]))
+            return
+
+        self.operations.append(Operation(description, [
+            *self._drop_invalid(name, invalid),
+            f"CREATE UNIQUE INDEX CONCURRENTLY {self.quote(name)} ON {self._table(table)} ({self._columns(names)})",
+        ], concurrent=True))
+        self.operations.append(Operation(f"Attach {name} to {table.name}", [
+            f"ALTER TABLE {self._table(table)} ADD CONSTRAINT {self.quote(name)} UNIQUE USING INDEX {self.quote(name)}",
+        ]))
+
+    def _add_check(self, table: Table, constraint: CheckConstraint, inspector):
+        try:
+            existing = {check['name'] for check in inspector.get_check_constraints(table.name)}
+        except NotImplementedError:
+            existing = set()
+        if constraint.name in existing:
+            return
+        if not self.postgresql:
+            self.unmanaged.append(f"check constraint {constraint.name} on {table.name}, requires recreating the table")
+            return
+
+        sqltext = constraint.sqltext.compile(dialect=self.dialect, compile_kwargs={"literal_binds": True})
+        name = self.quote(constraint.name)
+        # NOTE: NOT VALID skips the scan under the exclusive lock, the validation only locks out schema changes
+        self.operations.append(Operation(f"Add check constraint {constraint.name} on {table.name}", [
+            f"ALTER TABLE {self._table(table)} ADD CONSTRAINT {name} CHECK ({sqltext}) NOT VALID",
+            f"ALTER TABLE {self._table(table)} VALIDATE CONSTRAINT {name}",
+        ]))
+
+
+def diff(engine: Engine, metadata: Optional[MetaData] = None) -> Tuple[List[Operation], List[str]]:
+    """The operations upgrading the schema of `engine`, and what the models no longer declare."""
+    schema = SchemaDiff(engine, metadata)
+    return schema.compute(), schema.unmanaged
+
+
+def apply(engine: Engine, operations: Sequence[Operation], echo=None, lock_timeout: Optional[int] = None):
+    """
+    Run `operations` in order.
+
+    Each operation runs in a transaction of its own, concurrent ones in autocommit mode.
+
+    Args:
+        engine: Engine of the database
+        operations: The operations of `diff`
+        echo: Called with each operation before it runs
+        lock_timeout: Milliseconds the transactional operations wait for their
+            locks on PostgreSQL, no limit when None or 0
+    """
+    postgresql = engine.dialect.name == 'postgresql'
+    for operation in operations:
+        if echo is not None:
+            echo(operation)
+        if operation.concurrent:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                if postgresql:
+                    connection.execute(text("SET statement_timeout = 0"))
+                try:
+                    for statement in operation.statements:
+                        connection.execute(text(statement))
+                finally:
+                    # NOTE: Back to the timeout of the engine before the connection returns to the pool
+                    if postgresql:
+                        connection.execute(text("RESET statement_timeout"))
+        else:
+            with engine.begin() as connection:
+                if postgresql:
+                    connection.execute(text("SET LOCAL statement_timeout = 0"))
+                    if lock_timeout:
+                        connection.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout)}"))
+                for statement in operation.statements:
+                    connection.execute(text(statement))
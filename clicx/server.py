@@ -12,7 +12,12 @@ import uvicorn
 
 # Local application imports
 from clicx.config import configuration
-from clicx.utils.middleware import log_request_info
+from clicx.utils.middleware import log_request_info, CompressionMiddleware, IdempotencyMiddleware, SamplingProfilerMiddleware
+from clicx.utils.idempotency import IdempotencyStore
+from clicx.utils.responses import FastJSONResponse
+from clicx.utils import batch, metrics
+from clicx.utils.admission import AdmissionController, admission_control
+from clicx.utils.executors import ExecutorPools
 from clicx import VERSION, project_root
 
 import logging
@@ -52,20 +57,53 @@ class API(FastAPI):
             version=version,
             license_info=license_info,
             contact=contact,
+            default_response_class=FastJSONResponse,
         )
 
     def configure(self):
         """
         Configure the application - only called when server command is executed.
         """
+        self.setup_config_watcher()
+        self.setup_admission()
+        self.setup_executors()
         self.setup_base_routes()
         self.setup_addon_routers()
         self.use_route_names_as_operation_ids()
         self.setup_middleware()
         return self
 
+    def setup_config_watcher(self) -> None:
+        """
+        Reload the addon configuration when its files change, every worker watches on its own.
+        """
+        configuration.watch()
+
+    def setup_admission(self) -> None:
+        """
+        Rate limits, node concurrency caps and load shedding for the addon routes,
+        configured by the `admission` section of the configuration.
+        """
+        self.state.admission = AdmissionController.from_config(configuration.loaded_config.get('admission'))
+
+        def reload_admission(snapshot, previous):
+            # NOTE: Requests admitted by the previous controller release their node slot on it
+            if snapshot.data.get('admission') != previous.data.get('admission'):
+                self.state.admission = AdmissionController.from_config(snapshot.data.get('admission'))
+
+        configuration.subscribe(reload_admission)
+
+    def setup_executors(self) -> None:
+        """
+        Thread pools the sync addon routes run in, one per executor class,
+        sized by the `executors` section of the configuration. Changes to the
+        section need a restart, the routes keep the pools they were wrapped with.
+        """
+        self.executors = ExecutorPools.from_config(configuration.loaded_config.get('executors'))
+
     def setup_base_routes(self) -> None:
-        pass
+        self.include_router(router=batch.router)
+        self.include_router(router=metrics.router)
 
     def setup_addon_routers(self) -> None:
         """
@@ -80,12 +118,35 @@ class API(FastAPI):
             "http://localhost:8080",
         ]
 
+        # NOTE:: Added first so it stores the plain response, before compression and CORS
+        self.add_middleware(
+            middleware_class=IdempotencyMiddleware,
+            store=IdempotencyStore(
+                ttl=configuration.env.get('IDEMPOTENCY_TTL', 86400),
+                lock_timeout=configuration.env.get('IDEMPOTENCY_LOCK_TIMEOUT', 300),
+            ),
+        )
+
         self.add_middleware(
             middleware_class=CORSMiddleware,
             allow_credentials=True,
             allow_origins=origins,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["X-Next-Cursor", "X-Total-Count", "Idempotent-Replayed"],
+        )
+
+        self.add_middleware(
+            middleware_class=CompressionMiddleware,
+            minimum_size=configuration.env.get('COMPRESSION_MIN_SIZE', 1024),
+        )
+
+        # NOTE:: Added last so the profiler wraps every other middleware
+        self.add_middleware(
+            middleware_class=SamplingProfilerMiddleware,
+            token=configuration.env.get('PROFILE_TOKEN', ''),
+            threshold_ms=configuration.env.get('PROFILE_THRESHOLD_MS', 0),
+            interval_ms=configuration.env.get('PROFILE_INTERVAL_MS', 5),
         )
 
         # NOTE:: Enable this if it need to be exposed to the WAN
@@ -126,7 +187,8 @@ class API(FastAPI):
                     _logger.debug(f"Failed to registre router from module: {module_name}")
                     return
 
-                dependencies = [Depends(dependency=log_request_info)]
+                dependencies = [Depends(dependency=log_request_info), Depends(dependency=admission_control)]
+                self.executors.wrap_router(module.router, module)
                 self.include_router(
                     router=module.router,
                     dependencies=dependencies
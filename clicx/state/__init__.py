@@ -0,0 +1,63 @@
+"""
+State shared between the worker processes.
+
+The backend is picked with the `STATE_BACKEND` setting:
+
+    sqlite  (default) SQLite database in WAL mode at `STATE_PATH`, single host, no extra service
+    memory  In-process dict, not shared, for tests and single worker runs
+    redis   Redis server at `STATE_URL`, requires the `redis` package
+
+Example:
+    ```python
+    from clicx.state import get_backend
+
+    state = get_backend()
+    if state.add(f"vmid:{vmid}", worker_id, ttl=60):
+        ...  # the VMID is reserved for this worker
+    ```
+"""
+import threading
+from typing import Optional
+
+from clicx.state.base import StateBackend, Subscription
+from clicx.state.memory import MemoryBackend
+from clicx.state.sqlite import SQLiteBackend, state_dir
+
+_backend: Optional[StateBackend] = None
+_lock = threading.Lock()
+
+
+def create_backend(name: str = "sqlite", **options) -> StateBackend:
+    """Create a backend by name, options are passed to its constructor."""
+    if name == "sqlite":
+        return SQLiteBackend(**options)
+    if name == "memory":
+        return MemoryBackend(**options)
+    if name == "redis":
+        from clicx.state.redis import RedisBackend
+        return RedisBackend(**options)
+    raise ValueError(f"Unknown state backend '{name}', expected sqlite, memory or redis")
+
+
+def get_backend() -> StateBackend:
+    """Return the backend of this process, created from the configuration on first use."""
+    # NOTE: Imported here, clicx.utils imports this package before clicx.config can be loaded
+    from clicx.config import configuration
+
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                name = configuration.env.get('STATE_BACKEND', 'sqlite')
+                options = {}
+                if name == "sqlite":
+                    options = {
+                        "path": configuration.env.get('STATE_PATH', state_dir / 'state.sqlite3'),
+                        "max_keys": configuration.env.get('STATE_MAX_KEYS', 100000),
+                    }
+                elif name == "memory":
+                    options = {"max_keys": configuration.env.get('STATE_MAX_KEYS', 100000)}
+                elif name == "redis":
+                    options = {"url": configuration.env.get('STATE_URL', 'redis://localhost:6379/0')}
+                _backend = create_backend(name, **options)
+    return _backend
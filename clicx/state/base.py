@@ -0,0 +1,107 @@
+import abc
+import time
+from typing import Iterator, Optional, Union
+
+Value = Union[bytes, str]
+
+
+def to_bytes(value: Value) -> bytes:
+    return value.encode("utf-8") if isinstance(value, str) else bytes(value)
+
+
+class Subscription(abc.ABC):
+    """
+    Messages published on a channel after the subscription was made.
+
+    Iterating blocks until the next message arrives, use `get` with a timeout
+    to wait for a bounded time.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.closed = False
+
+    @abc.abstractmethod
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Wait for the next message, None when `timeout` seconds passed without one."""
+
+    def close(self):
+        self.closed = True
+
+    def __iter__(self) -> Iterator[bytes]:
+        while not self.closed:
+            message = self.get(timeout=1)
+            if message is not None:
+                yield message
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StateBackend(abc.ABC):
+    """
+    Key value store shared between the worker processes.
+
+    Keys are strings and values are bytes, str values are stored as UTF-8.
+    Callers namespace their keys, e.g. `idempotency:<key>`.
+
+    A `ttl` is in seconds, keys without a ttl never expire. Backends may
+    still evict the least recently written keys when they are full, except
+    the keys written with `evictable=False`, which should have a ttl.
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value of a key, None if it does not exist or expired."""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Value, ttl: Optional[float] = None, evictable: bool = True):
+        """Set a key, replacing its value and ttl."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> bool:
+        """Delete a key, returns whether it existed."""
+
+    @abc.abstractmethod
+    def cas(self, key: str, expected: Optional[Value], value: Optional[Value], ttl: Optional[float] = None, evictable: bool = True) -> bool:
+        """
+        Compare and swap.
+
+        Args:
+            key: Key to update
+            expected: Current value required for the swap, None requires the key to be absent
+            value: New value, None deletes the key
+            ttl: Seconds until the new value expires
+            evictable: Whether the new value may be evicted when the backend is full
+
+        Returns:
+            True if the swap happened
+        """
+
+    @abc.abstractmethod
+    def ttl(self, key: str) -> Optional[float]:
+        """Seconds until a key expires, None if it does not exist or never expires."""
+
+    @abc.abstractmethod
+    def publish(self, channel: str, message: Value):
+        """Send a message to the current subscribers of a channel, in every worker."""
+
+    @abc.abstractmethod
+    def subscribe(self, channel: str) -> Subscription:
+        """Subscribe to the messages published on a channel from now on."""
+
+    def add(self, key: str, value: Value, ttl: Optional[float] = None, evictable: bool = True) -> bool:
+        """Set a key only if it does not exist, returns whether it was set."""
+        return self.cas(key, None, value, ttl=ttl, evictable=evictable)
+
+    def close(self):
+        """Release the resources of the backend."""
+
+    @staticmethod
+    def expires_at(ttl: Optional[float]) -> Optional[float]:
+        return time.time() + float(ttl) if ttl is not None else None
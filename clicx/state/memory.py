@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from clicx.state.base import StateBackend, Subscription, Value, to_bytes
+
+
+class MemorySubscription(Subscription):
+    def __init__(self, backend: "MemoryBackend", channel: str):
+        super().__init__(channel)
+        self.backend = backend
+        self.queue: "queue.Queue[bytes]" = queue.Queue()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        super().close()
+        self.backend._unsubscribe(self)
+
+
+class MemoryBackend(StateBackend):
+    """
+    In-process backend, state is not shared between workers.
+
+    Meant for tests, the CLI and single worker deployments.
+
+    Args:
+        max_keys: Maximum number of keys, the least recently written evictable keys are evicted
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = int(max_keys)
+        self._data: "OrderedDict[str, Tuple[bytes, Optional[float], bool]]" = OrderedDict()
+        self._subscribers: Dict[str, Set[MemorySubscription]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires, _ = entry
+        if expires is not None and expires <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def _store(self, key: str, value: Optional[bytes], ttl: Optional[float], evictable: bool = True):
+        if value is None:
+            self._data.pop(key, None)
+            return
+        self._data[key] = (value, self.expires_at(ttl), evictable)
+        self._data.move_to_end(key)
+
+        excess = len(self._data) - self.max_keys
+        if excess > 0:
+            evicted = []
+            for old_key, (_, _, old_evictable) in self._data.items():
+                if old_evictable:
+                    evicted.append(old_key)
+                    if len(evicted) == excess:
+                        break
+            for old_key in evicted:
+                del self._data[old_key]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._load(key)
+
+    def set(self, key: str, value: Value, ttl: Optional[float] = None, evictable: bool = True):
+        with self._lock:
+            self._store(key, to_bytes(value), ttl, evictable)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            existed = self._load(key) is not None
+            self._data.pop(key, None)
+            return existed
+
+    def cas(self, key: str, expected: Optional[Value], value: Optional[Value], ttl: Optional[float] = None, evictable: bool = True) -> bool:
+        expected = to_bytes(expected) if expected is not None else None
+        with self._lock:
+            if self._load(key) != expected:
+                return False
+            self._store(key, to_bytes(value) if value is not None else None, ttl, evictable)
+            return True
+
+    def ttl(self, key: str) -> Optional[float]:
+        with self._lock:
+            if self._load(key) is None:
+                return None
+            expires = self._data[key][1]
+            return max(0.0, expires - time.time()) if expires is not None else None
+
+    def publish(self, channel: str, message: Value):
+        message = to_bytes(message)
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber.queue.put(message)
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = MemorySubscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: MemorySubscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
@@ -0,0 +1,100 @@
+from typing import Optional
+
+from clicx.state.base import StateBackend, Subscription, Value, to_bytes
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# KEYS[1] key, ARGV: has_expected, expected, has_value, value, ttl_ms
+_CAS_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if ARGV[1] == '1' then
+    if current ~= ARGV[2] then return 0 end
+elseif current then
+    return 0
+end
+if ARGV[3] == '1' then
+    if tonumber(ARGV[5]) > 0 then
+        redis.call('SET', KEYS[1], ARGV[4], 'PX', ARGV[5])
+    else
+        redis.call('SET', KEYS[1], ARGV[4])
+    end
+else
+    redis.call('DEL', KEYS[1])
+end
+return 1
+"""
+
+
+class RedisSubscription(Subscription):
+    def __init__(self, pubsub, channel: str):
+        super().__init__(channel)
+        self.pubsub = pubsub
+
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return message["data"] if message else None
+
+    def close(self):
+        super().close()
+        self.pubsub.close()
+
+
+class RedisBackend(StateBackend):
+    """
+    Backend for a Redis (or Valkey, KeyDB) server, shared by several hosts.
+
+    Requires the `redis` package. Eviction follows the `maxmemory-policy` of
+    the server, `evictable` is ignored.
+
+    Args:
+        url: Server URL, e.g. redis://localhost:6379/0
+        prefix: Prefix added to every key and channel
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "clicx:"):
+        if redis is None:
+            raise ImportError("The redis state backend requires the 'redis' package")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._cas = self._client.register_script(_CAS_SCRIPT)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.prefix + key)
+
+    def set(self, key: str, value: Value, ttl: Optional[float] = None, evictable: bool = True):
+        self._client.set(self.prefix + key, to_bytes(value), px=max(1, int(ttl * 1000)) if ttl is not None else None)
+
+    def delete(self, key: str) -> bool:
+        return bool(self._client.delete(self.prefix + key))
+
+    def cas(self, key: str, expected: Optional[Value], value: Optional[Value], ttl: Optional[float] = None, evictable: bool = True) -> bool:
+        return bool(self._cas(
+            keys=[self.prefix + key],
+            args=[
+                '1' if expected is not None else '0',
+                to_bytes(expected) if expected is not None else b'',
+                '1' if value is not None else '0',
+                to_bytes(value) if value is not None else b'',
+                max(1, int(ttl * 1000)) if ttl is not None else 0,
+            ],
+        ))
+
+    def ttl(self, key: str) -> Optional[float]:
+        milliseconds = self._client.pttl(self.prefix + key)
+        return milliseconds / 1000 if milliseconds >= 0 else None
+
+    def publish(self, channel: str, message: Value):
+        self._client.publish(self.prefix + channel, to_bytes(message))
+
+    def subscribe(self, channel: str) -> Subscription:
+        pubsub = self._client.pubsub()
+        pubsub.subscribe(self.prefix + channel)
+        return RedisSubscription(pubsub, channel)
+
+    def close(self):
+        self._client.close()
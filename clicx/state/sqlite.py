@@ -0,0 +1,207 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Optional
+
+from clicx import project_root
+from clicx.state.base import StateBackend, Subscription, Value, to_bytes
+
+_logger = logging.getLogger(__name__)
+
+state_dir: Path = Path(project_root, 'var')
+
+
+class SQLiteSubscription(Subscription):
+    def __init__(self, backend: "SQLiteBackend", channel: str, last_id: int):
+        super().__init__(channel)
+        self.backend = backend
+        self.last_id = last_id
+        self._pending: Deque[bytes] = deque()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self.closed:
+            if not self._pending:
+                for message_id, payload in self.backend._messages_after(self.channel, self.last_id):
+                    self.last_id = message_id
+                    self._pending.append(payload)
+            if self._pending:
+                return self._pending.popleft()
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            wait = self.backend.poll_interval
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.monotonic()))
+            time.sleep(wait)
+        return None
+
+
+class SQLiteBackend(StateBackend):
+    """
+    Backend storing the state in a SQLite database in WAL mode.
+
+    Every worker on the host opens the same file, so no extra service is
+    needed. Writes are serialized by SQLite, reads run concurrently. Pub/sub
+    is a message table that subscribers poll every `poll_interval` seconds.
+
+    Args:
+        path: Database file, created if it does not exist
+        max_keys: Maximum number of keys, the least recently written evictable keys are evicted
+        poll_interval: Seconds between two polls of a subscription
+        message_retention: Seconds published messages are kept for slow subscribers
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: Path = Path(state_dir, 'state.sqlite3'),
+        max_keys: int = 100000,
+        poll_interval: float = 0.05,
+        message_retention: float = 60,
+    ):
+        self.path = Path(path)
+        self.max_keys = int(max_keys)
+        self.poll_interval = float(poll_interval)
+        self.message_retention = float(message_retention)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._writes = 0
+        self._published = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # NOTE: A connection must not be shared with a forked worker, reopen it in the child
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " expires REAL,"
+                " updated REAL NOT NULL,"
+                " pinned INTEGER NOT NULL DEFAULT 0)"
+            )
+            # NOTE: Databases created before keys could be pinned
+            if "pinned" not in {row[1] for row in conn.execute("PRAGMA table_info(state)")}:
+                conn.execute("ALTER TABLE state ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS state_updated ON state (updated)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " channel TEXT NOT NULL,"
+                " payload BLOB NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS messages_channel ON messages (channel, id)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _load(self, key: str, now: float) -> Optional[bytes]:
+        row = self.conn.execute("SELECT value, expires FROM state WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        return row[0]
+
+    def _store(self, key: str, value: Optional[bytes], ttl: Optional[float], now: float, evictable: bool = True):
+        if value is None:
+            self.conn.execute("DELETE FROM state WHERE key = ?", (key,))
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO state (key, value, expires, updated, pinned) VALUES (?, ?, ?, ?, ?)",
+            (key, value, now + float(ttl) if ttl is not None else None, now, 0 if evictable else 1),
+        )
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self._prune(now)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._load(key, time.time())
+
+    def set(self, key: str, value: Value, ttl: Optional[float] = None, evictable: bool = True):
+        with self._lock:
+            self._store(key, to_bytes(value), ttl, time.time(), evictable)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            cursor = self.conn.execute(
+                "DELETE FROM state WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (key, time.time()),
+            )
+            return cursor.rowcount > 0
+
+    def cas(self, key: str, expected: Optional[Value], value: Optional[Value], ttl: Optional[float] = None, evictable: bool = True) -> bool:
+        expected = to_bytes(expected) if expected is not None else None
+        now = time.time()
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._load(key, now) != expected:
+                    conn.execute("COMMIT")
+                    return False
+                self._store(key, to_bytes(value) if value is not None else None, ttl, now, evictable)
+                conn.execute("COMMIT")
+                return True
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def ttl(self, key: str) -> Optional[float]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT expires FROM state WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] is None or row[0] <= now:
+            return None
+        return row[0] - now
+
+    def publish(self, channel: str, message: Value):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO messages (channel, payload, created) VALUES (?, ?, ?)",
+                (channel, to_bytes(message), now),
+            )
+            self._published += 1
+            if self._published % 100 == 0:
+                self.conn.execute("DELETE FROM messages WHERE created < ?", (now - self.message_retention,))
+
+    def subscribe(self, channel: str) -> Subscription:
+        with self._lock:
+            last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+        return SQLiteSubscription(self, channel, last_id)
+
+    def _messages_after(self, channel: str, last_id: int):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT id, payload FROM messages WHERE channel = ? AND id > ? ORDER BY id LIMIT 100",
+                (channel, last_id),
+            ).fetchall()
+
+    def _prune(self, now: float):
+        try:
+            self.conn.execute("DELETE FROM state WHERE expires IS NOT NULL AND expires <= ?", (now,))
+            self.conn.execute(
+                "DELETE FROM state WHERE key IN ("
+                " SELECT key FROM state WHERE pinned = 0 ORDER BY updated DESC LIMIT -1"
+                " OFFSET MAX(0, ? - (SELECT COUNT(*) FROM state WHERE pinned = 1)))",
+                (self.max_keys,),
+            )
+        except sqlite3.Error as e:
+            _logger.error(f"Failed to prune the state database: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
@@ -0,0 +1,248 @@
+"""
+Admission control for the API routes.
+
+Every request passes three checks before its route runs:
+
+    1. Load shedding: when more requests are waiting for a thread of the
+       executor pool of the route (`clicx.utils.executors`, anyio's default
+       threadpool for the routes outside of the pools) than
+       `shed_tasks_waiting`, new requests get a 429 straight away.
+    2. Rate limiting: a token bucket per client token and route class.
+    3. Node concurrency: at most `node_concurrency` requests per upstream node
+       (the `node` path or query parameter) run at once, the others wait up to
+       `node_wait_timeout` seconds.
+
+Rejected requests get a `429 Too Many Requests` with a `Retry-After` header.
+
+Routes are grouped in classes with their own limits. The class is set with
+the `route_class` decorator, otherwise GET and HEAD routes are `read` and
+the other methods are `write`:
+
+    ```python
+    @router.post(path="/clone_vm")
+    @route_class("clone")
+    def clone_vm(...):
+    ```
+
+The limits are read from the `admission` section of the configuration:
+
+    ```json
+    "admission": {
+        "classes": {"read": {"rate": 50, "burst": 100}, "clone": {"rate": 0.2, "burst": 2}},
+        "node_concurrency": 4,
+        "node_wait_timeout": 5,
+        "shed_tasks_waiting": 64,
+        "retry_after": 1
+    }
+    ```
+
+Limits apply per worker process.
+"""
+import hashlib
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException
+from fastapi.requests import HTTPConnection
+
+from clicx.utils.executors import default_tasks_waiting
+from clicx.utils.metrics import registry
+
+DEFAULT_CLASSES = {
+    "read": {"rate": 50, "burst": 100},
+    "write": {"rate": 5, "burst": 10},
+}
+
+_decisions = registry.counter(
+    "clicx_admission_decisions_total",
+    "Admission decisions by route class and decision (admitted, rate_limited, shed, node_busy).",
+)
+_node_inflight = registry.gauge(
+    "clicx_admission_node_inflight",
+    "Requests currently holding a concurrency slot of an upstream node.",
+)
+
+
+# NOTE: The executor pools of the app replace the collector to report their queues as well
+registry.gauge(
+    "clicx_threadpool_tasks_waiting",
+    "Calls waiting for a thread, per executor pool and for the default threadpool.",
+    collect=lambda: {(("pool", "default"),): default_tasks_waiting()},
+)
+
+
+def route_class(name: str) -> Callable:
+    """Decorator setting the admission class of a route endpoint."""
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__route_class__ = name
+        return endpoint
+    return decorator
+
+
+def get_route_class(scope: Dict[str, Any]) -> str:
+    endpoint = scope.get("endpoint")
+    name = getattr(endpoint, "__route_class__", None)
+    if name:
+        return name
+    return "read" if scope.get("method", "GET") in ("GET", "HEAD") else "write"
+
+
+class TokenBucket:
+    """
+    Token bucket refilled with `rate` tokens per second up to `burst` tokens.
+
+    Args:
+        rate: Tokens added per second
+        burst: Maximum number of tokens
+        now: Monotonic time the bucket is full at, the current time by default
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic() if now is None else now
+
+    def take(self, now: float) -> float:
+        """Take a token, returns 0 on success or the seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+
+class AdmissionController:
+    """
+    Args:
+        classes: Rate and burst of every route class, `{name: {"rate": .., "burst": ..}}`
+        node_concurrency: Maximum concurrent requests per upstream node, 0 disables the limit
+        node_wait_timeout: Seconds a request waits for a node slot before it is rejected
+        shed_tasks_waiting: Queue length of the executor pool of a route above which its requests are shed, 0 disables shedding
+        retry_after: Seconds sent in `Retry-After` when the wait time is unknown
+        max_buckets: Maximum number of token buckets kept, idle ones are dropped first
+    """
+
+    def __init__(
+        self,
+        classes: Optional[Dict[str, Dict[str, float]]] = None,
+        node_concurrency: int = 4,
+        node_wait_timeout: float = 5,
+        shed_tasks_waiting: int = 64,
+        retry_after: int = 1,
+        max_buckets: int = 10000,
+    ):
+        self.classes = {**DEFAULT_CLASSES, **(classes or {})}
+        self.node_concurrency = int(node_concurrency)
+        self.node_wait_timeout = float(node_wait_timeout)
+        self.shed_tasks_waiting = int(shed_tasks_waiting)
+        self.retry_after = int(retry_after)
+        self.max_buckets = int(max_buckets)
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._nodes: Dict[str, anyio.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "AdmissionController":
+        return cls(**(config or {}))
+
+    def reject(self, name: str, decision: str, detail: str, retry_after: Optional[float] = None):
+        _decisions.inc(route_class=name, decision=decision)
+        seconds = self.retry_after if retry_after is None or math.isinf(retry_after) else max(1, math.ceil(retry_after))
+        raise HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(seconds)})
+
+    @staticmethod
+    def client_key(connection: HTTPConnection) -> str:
+        authorization = connection.headers.get("authorization")
+        if authorization:
+            return hashlib.sha256(authorization.encode()).hexdigest()[:16]
+        return connection.client.host if connection.client else "anonymous"
+
+    def check_load(self, name: str, connection: HTTPConnection):
+        if not self.shed_tasks_waiting:
+            return
+        pools = getattr(connection.app, "executors", None)
+        endpoint = connection.scope.get("endpoint")
+        waiting = pools.tasks_waiting(endpoint) if pools is not None else default_tasks_waiting()
+        if waiting >= self.shed_tasks_waiting:
+            self.reject(name, "shed", "Server is overloaded, retry later")
+
+    def check_rate(self, name: str, client: str):
+        limits = self.classes.get(name)
+        if not limits:
+            return
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get((client, name))
+            if bucket is None:
+                if len(self._buckets) >= self.max_buckets:
+                    self._drop_idle_buckets(now)
+                bucket = self._buckets[(client, name)] = TokenBucket(limits["rate"], limits["burst"], now)
+            wait = bucket.take(now)
+        if wait:
+            self.reject(name, "rate_limited", f"Rate limit exceeded for {name} requests", retry_after=wait)
+
+    def _drop_idle_buckets(self, now: float):
+        # NOTE: A bucket that refilled completely holds no state worth keeping
+        for key, bucket in list(self._buckets.items()):
+            if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.burst:
+                del self._buckets[key]
+        if len(self._buckets) >= self.max_buckets:
+            oldest = sorted(self._buckets, key=lambda key: self._buckets[key].updated)
+            for key in oldest[:len(oldest) // 2]:
+                del self._buckets[key]
+
+    def node_semaphore(self, node: str) -> anyio.Semaphore:
+        semaphore = self._nodes.get(node)
+        if semaphore is None:
+            semaphore = self._nodes.setdefault(node, anyio.Semaphore(self.node_concurrency))
+        return semaphore
+
+    @asynccontextmanager
+    async def admit(self, connection: HTTPConnection) -> AsyncIterator[None]:
+        """Run the checks of a request, the node slot is held until the block exits."""
+        if connection.scope["type"] != "http":
+            yield
+            return
+
+        name = get_route_class(connection.scope)
+        self.check_load(name, connection)
+        self.check_rate(name, self.client_key(connection))
+
+        node = connection.path_params.get("node") or connection.query_params.get("node")
+        if not node or not self.node_concurrency:
+            _decisions.inc(route_class=name, decision="admitted")
+            yield
+            return
+
+        semaphore = self.node_semaphore(node)
+        try:
+            with anyio.fail_after(self.node_wait_timeout):
+                await semaphore.acquire()
+        except TimeoutError:
+            self.reject(name, "node_busy", f"Too many concurrent requests to node {node}")
+
+        _decisions.inc(route_class=name, decision="admitted")
+        _node_inflight.inc(node=node)
+        try:
+            yield
+        finally:
+            _node_inflight.dec(node=node)
+            semaphore.release()
+
+
+async def admission_control(connection: HTTPConnection) -> AsyncIterator[None]:
+    """Router dependency applying the admission controller of the app, if configured."""
+    controller = getattr(connection.app.state, "admission", None)
+    if controller is None:
+        yield
+        return
+    async with controller.admit(connection):
+        yield
@@ -0,0 +1,254 @@
+"""
+Batch endpoint running several API operations in a single HTTP call.
+
+Operations reference routes by their name, which is also the operation id
+set by `API.use_route_names_as_operation_ids`. Every operation is dispatched
+in-process to the router, so it goes through the same validation, dependencies,
+authentication and exception handlers as a direct call, but skips the HTTP
+round trip and the middleware stack.
+
+Example:
+    ```
+    POST /batch
+    {
+        "operations": [
+            {"id": "status", "operation": "get_vm_status", "params": {"node": "pve1", "vmid": 100}},
+            {"id": "config", "operation": "get_vm_config", "params": {"node": "pve1", "vmid": 100}}
+        ]
+    }
+    ```
+
+    The response holds one result per operation, in the order of the request:
+
+    ```
+    [
+        {"id": "status", "operation": "get_vm_status", "status": 200, "headers": {...}, "body": {...}},
+        {"id": "config", "operation": "get_vm_config", "status": 200, "headers": {...}, "body": {...}}
+    ]
+    ```
+
+Operations run concurrently, do not batch writes that depend on each other.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote, urlencode
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute, APIRouter
+from pydantic import BaseModel, Field
+
+from clicx.config import configuration
+from clicx.utils.responses import dumps
+
+_logger = logging.getLogger(__name__)
+
+# Headers of the batch request passed on to every operation
+FORWARDED_HEADERS = {b"authorization", b"cookie", b"accept-language", b"x-request-id"}
+
+# Headers of the operation responses that are not returned
+HIDDEN_HEADERS = {"content-length", "content-type"}
+
+
+class BatchOperation(BaseModel):
+    id: Optional[str] = Field(default=None, description="Client reference, returned with the result")
+    operation: str = Field(..., description="Name of the route to call, e.g. get_vm_status")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Path and query parameters")
+    body: Optional[Any] = Field(default=None, description="JSON body for POST and PUT routes")
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., description="Operations to run")
+
+
+class BatchResult:
+    __slots__ = ('operation', 'status', 'headers', 'body', 'media_type')
+
+    def __init__(self, operation: BatchOperation, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None, media_type: str = "application/json"):
+        self.operation = operation
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.media_type = media_type
+
+    @classmethod
+    def error(cls, operation: BatchOperation, status: int, detail: str) -> "BatchResult":
+        return cls(operation, status, body=dumps({"detail": detail}))
+
+    def encode(self) -> bytes:
+        # NOTE: JSON bodies are embedded as they are, they are never decoded and encoded again
+        if self.media_type.startswith("application/json") and self.body:
+            body = self.body
+        else:
+            body = dumps(self.body.decode("utf-8", errors="replace") if self.body else None)
+        meta = dumps({
+            "id": self.operation.id,
+            "operation": self.operation.operation,
+            "status": self.status,
+            "headers": self.headers,
+        })
+        return meta[:-1] + b',"body":' + body + b"}"
+
+
+class BatchExecutor:
+    """
+    Run batch operations against the routes of an app.
+
+    Args:
+        app: The FastAPI app holding the routes
+        max_operations: Maximum number of operations in one batch
+        concurrency: Maximum number of operations running at the same time
+    """
+
+    def __init__(self, app, max_operations: int = 25, concurrency: int = 8):
+        self.app = app
+        self.max_operations = int(max_operations)
+        self.concurrency = int(concurrency)
+        self._routes: Optional[Dict[str, APIRoute]] = None
+
+    @property
+    def routes(self) -> Dict[str, APIRoute]:
+        # NOTE: Built on first use, all routes are registered by then
+        if self._routes is None:
+            self._routes = {
+                route.name: route
+                for route in self.app.routes
+                if isinstance(route, APIRoute) and route.name != batch.__name__
+            }
+        return self._routes
+
+    async def run(self, request: Request, operations: List[BatchOperation]) -> List[BatchResult]:
+        if len(operations) > self.max_operations:
+            raise HTTPException(status_code=422, detail=f"A batch holds at most {self.max_operations} operations, got {len(operations)}")
+
+        headers = [(key, value) for key, value in request.scope["headers"] if key in FORWARDED_HEADERS]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(operation: BatchOperation) -> BatchResult:
+            async with semaphore:
+                try:
+                    return await self.dispatch(request, operation, headers)
+                except Exception as e:
+                    _logger.error(f"Batch operation {operation.operation} failed: {e}")
+                    return BatchResult.error(operation, 500, f"Failed to run operation: {str(e)}")
+
+        return await asyncio.gather(*(run_one(operation) for operation in operations))
+
+    def build_scope(self, request: Request, route: APIRoute, operation: BatchOperation, headers: list) -> dict:
+        params = dict(operation.params)
+        path_params = {}
+        for name in route.param_convertors:
+            if name not in params:
+                raise KeyError(name)
+            path_params[name] = quote(str(params.pop(name)), safe="")
+        path = route.path_format.format(**path_params)
+
+        method = "GET" if "GET" in route.methods else sorted(route.methods)[0]
+        if operation.body is not None:
+            headers = headers + [(b"content-type", b"application/json")]
+
+        # NOTE: The exception handlers of the app render the errors of the route, e.g. a 422 for an invalid body
+        scope = {
+            key: value
+            for key, value in request.scope.items()
+            if key in (
+                "http_version", "scheme", "server", "client", "root_path", "app", "state", "extensions",
+                "starlette.exception_handlers",
+            )
+        }
+        scope.update({
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "method": method,
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(params, doseq=True).encode(),
+            "headers": headers,
+        })
+        return scope
+
+    async def dispatch(self, request: Request, operation: BatchOperation, headers: list) -> BatchResult:
+        route = self.routes.get(operation.operation)
+        if route is None:
+            return BatchResult.error(operation, 404, f"Unknown operation '{operation.operation}'")
+
+        try:
+            scope = self.build_scope(request, route, operation, headers)
+        except KeyError as e:
+            return BatchResult.error(operation, 422, f"Missing path parameter {e}")
+
+        body = dumps(operation.body) if operation.body is not None else b""
+        finished = asyncio.Event()
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # NOTE: Only disconnect once the response is sent, streaming responses listen for it
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        status = 500
+        response_headers = {}
+        chunks = []
+
+        async def send(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = {
+                    key.decode("latin-1"): value.decode("latin-1")
+                    for key, value in message.get("headers", [])
+                }
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    finished.set()
+
+        try:
+            await self.app.router(scope, receive, send)
+        finally:
+            finished.set()
+
+        media_type = response_headers.get("content-type", "application/json")
+        return BatchResult(
+            operation,
+            status,
+            body=b"".join(chunks),
+            headers={key: value for key, value in response_headers.items() if key not in HIDDEN_HEADERS},
+            media_type=media_type,
+        )
+
+
+router = APIRouter(
+    tags=["Batch"],
+)
+
+
+def get_executor(request: Request) -> BatchExecutor:
+    executor = getattr(request.app.state, "batch_executor", None)
+    if executor is None:
+        executor = BatchExecutor(
+            request.app,
+            max_operations=configuration.env.get('BATCH_MAX_OPERATIONS', 25),
+            concurrency=configuration.env.get('BATCH_CONCURRENCY', 8),
+        )
+        request.app.state.batch_executor = executor
+    return executor
+
+
+@router.post("/batch")
+async def batch(request: Request, batch_request: BatchRequest) -> Response:
+    """
+    Run several operations in one call and return their results in order.
+
+    Every operation gets its own status code, a failing operation does not
+    fail the batch.
+    """
+    results = await get_executor(request).run(request, batch_request.operations)
+    return Response(
+        content=b"[" + b",".join(result.encode() for result in results) + b"]",
+        media_type="application/json",
+    )
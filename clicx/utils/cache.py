@@ -0,0 +1,127 @@
+"""
+Response caching with strong ETags for FastAPI routes.
+
+Rendered responses are memoized per route and query parameters together with
+a validator (a version string). As long as the validator does not change the
+cached body is served, and clients that send a matching `If-None-Match` get an
+empty `304 Not Modified`.
+
+Example:
+    ```python
+    from clicx.utils.cache import ResponseCache
+
+    _cache = ResponseCache()
+
+    @router.get("/", response_class=HTMLResponse)
+    async def root(request: Request):
+        return _cache.respond(request, render=lambda: render("index.html.jinja"), version=VERSION)
+    ```
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from clicx.utils.responses import dumps
+
+
+class CacheEntry:
+    __slots__ = ('version', 'body', 'etag', 'media_type')
+
+    def __init__(self, version: str, body: bytes, media_type: str):
+        self.version = version
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.media_type = media_type
+
+
+class ResponseCache:
+    """
+    LRU cache of rendered responses.
+
+    Args:
+        maxsize: Maximum number of cached responses
+        cache_control: Value of the Cache-Control header sent with every response
+    """
+
+    def __init__(self, maxsize: int = 256, cache_control: str = "no-cache"):
+        self.maxsize = maxsize
+        self.cache_control = cache_control
+        self._entries: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def respond(
+        self,
+        request: Request,
+        render: Callable[[], Any],
+        version: Any,
+        media_type: str = "text/html",
+        key: Optional[Tuple] = None,
+    ) -> Response:
+        """
+        Return the cached response for the request, rendering it on a miss.
+
+        Args:
+            request: The incoming request
+            render: Callable producing the content. HTML and text must return
+                str or bytes, JSON may return anything `jsonable_encoder` accepts.
+            version: Validator of the content, the entry is re-rendered when it changes
+            media_type: Media type of the response
+            key: Override the cache key, defaults to route path and query parameters
+        """
+        key = key or self.key_for(request)
+        version = str(version)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None or entry.version != version:
+            entry = CacheEntry(version, self._encode(render(), media_type), media_type)
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        headers = {"ETag": entry.etag, "Cache-Control": self.cache_control}
+        if self._not_modified(request, entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+    def invalidate(self, key: Optional[Tuple] = None):
+        """Drop one entry, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    @staticmethod
+    def key_for(request: Request) -> Tuple:
+        route = request.scope.get("route")
+        path = getattr(route, "path", request.url.path)
+        return (request.method, path, tuple(sorted(request.query_params.multi_items())))
+
+    @staticmethod
+    def _encode(content: Any, media_type: str) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if media_type == "application/json":
+            return dumps(jsonable_encoder(content))
+        return str(content).encode("utf-8")
+
+    @staticmethod
+    def _not_modified(request: Request, etag: str) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
@@ -0,0 +1,138 @@
+"""
+Request deadlines for long running routes.
+
+A `Deadline` is handed from a route to the service methods it calls. Polling
+loops sleep with `deadline.sleep()` instead of `time.sleep()`, which raises
+`DeadlineExceeded` as soon as the deadline passed or the client disconnected,
+so the worker thread and the upstream are freed early.
+
+The deadline of a request is the `X-Request-Timeout` header (seconds), capped
+by the timeout of the route. The route timeout is set with the
+`route_timeout` decorator and defaults to the `REQUEST_TIMEOUT` setting.
+
+Example:
+    ```python
+    @router.post(path="/install_docker_engine")
+    @route_timeout(900)
+    def install_docker_engine(node: str, vmid: int, deadline: Deadline = Depends(request_deadline)):
+        return pve.software.install_docker_engine(node, vmid, deadline=deadline)
+    ```
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi import Request
+
+from clicx.config import configuration
+
+_logger = logging.getLogger(__name__)
+
+HEADER = "x-request-timeout"
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """
+    Point in time after which a request should stop its work.
+
+    Args:
+        timeout: Seconds from now, None for no time limit
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.expires_at = time.monotonic() + float(timeout) if timeout is not None else None
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def never(cls) -> "Deadline":
+        return cls(None)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, None when there is no time limit."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    def cancel(self, reason: str = "Request cancelled"):
+        """Stop the work of the request, wakes up every `sleep`."""
+        self.reason = reason
+        self._cancelled.set()
+
+    def check(self):
+        """Raise `DeadlineExceeded` if the deadline passed or was cancelled."""
+        if self.cancelled:
+            raise DeadlineExceeded(self.reason)
+        if self.expired:
+            raise DeadlineExceeded("Request deadline exceeded")
+
+    def sleep(self, seconds: float):
+        """Sleep up to `seconds`, raise `DeadlineExceeded` if the deadline is hit first."""
+        self.check()
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            self._cancelled.wait(remaining)
+            self.check()
+            raise DeadlineExceeded("Request deadline exceeded")
+        self._cancelled.wait(seconds)
+        self.check()
+
+
+def route_timeout(seconds: float) -> Callable:
+    """Decorator setting the maximum run time of a route."""
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__timeout__ = seconds
+        return endpoint
+    return decorator
+
+
+def _timeout_of(request: Request) -> float:
+    timeout = getattr(request.scope.get("endpoint"), "__timeout__", None)
+    if timeout is None:
+        timeout = float(configuration.env.get('REQUEST_TIMEOUT', 300))
+
+    requested = request.headers.get(HEADER)
+    if requested:
+        try:
+            timeout = min(timeout, max(0.0, float(requested)))
+        except ValueError:
+            _logger.debug(f"Ignoring invalid {HEADER} header: {requested}")
+    return timeout
+
+
+async def _watch_disconnect(request: Request, deadline: Deadline):
+    # NOTE: Any body was read before the dependencies ran, the only message left is the disconnect
+    while not deadline.expired:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            deadline.cancel("Client disconnected")
+            _logger.info(f"Client disconnected, cancelling {request.url.path}")
+            return
+
+
+async def request_deadline(request: Request) -> AsyncIterator[Deadline]:
+    """
+    Dependency providing the deadline of the request.
+
+    The deadline is cancelled when the client disconnects while the route runs.
+    """
+    deadline = Deadline(_timeout_of(request))
+    watcher = asyncio.create_task(_watch_disconnect(request, deadline))
+    try:
+        yield deadline
+    finally:
+        watcher.cancel()
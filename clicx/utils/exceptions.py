@@ -1,2 +1,6 @@
 class SleepyDeveloperError(ValueError):
-    pass
\ No newline at end of file
+    pass
+
+
+class ConfigurationError(ValueError):
+    pass
@@ -0,0 +1,188 @@
+"""
+Separate thread pools for the sync routes.
+
+FastAPI runs every sync route in anyio's single default threadpool, so a few
+slow routes (e.g. running scripts through the guest agent) can hold every
+thread while quick reads queue behind them. Sync routes are dispatched to the
+pool of their executor class instead:
+
+    fast_read           GET routes by default
+    upstream_write      routes of the other methods by default
+    long_running_agent  routes that wait on the guest agent or on tasks
+
+A router module declares the class of all its routes with a module level
+variable, a single route with the `executor_class` decorator:
+
+    ```python
+    executor = "long_running_agent"
+
+    @router.get(path="/check_apt_writable")
+    @executor_class("long_running_agent")
+    def check_apt_writable(...):
+    ```
+
+Every pool has a maximum number of threads and of queued calls, a call that
+finds the queue full gets a 429 with `Retry-After`. The sizes are read from
+the `executors` section of the configuration:
+
+    ```json
+    "executors": {
+        "fast_read": {"max_workers": 32, "max_queue": 256},
+        "long_running_agent": {"max_workers": 8, "max_queue": 16}
+    }
+    ```
+"""
+import contextvars
+import functools
+import inspect
+from typing import Any, Callable, Dict, Optional
+
+import anyio
+from fastapi import HTTPException
+
+from clicx.utils.metrics import registry
+from clicx.utils.profiler import run_attached
+
+FAST_READ = "fast_read"
+UPSTREAM_WRITE = "upstream_write"
+LONG_RUNNING_AGENT = "long_running_agent"
+
+DEFAULT_POOLS = {
+    FAST_READ: {"max_workers": 32, "max_queue": 256},
+    UPSTREAM_WRITE: {"max_workers": 16, "max_queue": 64},
+    LONG_RUNNING_AGENT: {"max_workers": 8, "max_queue": 16},
+}
+
+
+def default_tasks_waiting() -> int:
+    """Calls waiting for a thread of anyio's default threadpool, 0 outside of an event loop."""
+    try:
+        return anyio.to_thread.current_default_thread_limiter().statistics().tasks_waiting
+    except RuntimeError:
+        return 0
+
+
+def executor_class(name: str) -> Callable:
+    """Decorator setting the executor class of a sync route endpoint."""
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__executor__ = name
+        return endpoint
+    return decorator
+
+
+class ExecutorPool:
+    """
+    Bounded pool of threads running sync route endpoints.
+
+    Args:
+        name: Executor class served by the pool
+        max_workers: Maximum number of calls running at once
+        max_queue: Maximum number of calls waiting for a thread
+        retry_after: Seconds sent in `Retry-After` when the queue is full
+    """
+
+    def __init__(self, name: str, max_workers: int = 16, max_queue: int = 64, retry_after: int = 1):
+        self.name = name
+        self.max_workers = int(max_workers)
+        self.max_queue = int(max_queue)
+        self.retry_after = int(retry_after)
+        self.limiter = anyio.CapacityLimiter(self.max_workers)
+        # NOTE: Counted here, a call only shows up in the limiter statistics once it awaits a thread
+        self._inflight = 0
+
+    @property
+    def busy(self) -> int:
+        return self.limiter.borrowed_tokens
+
+    @property
+    def queued(self) -> int:
+        return max(0, self._inflight - self.max_workers)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        if self._inflight >= self.max_workers + self.max_queue:
+            raise HTTPException(
+                status_code=429,
+                detail=f"The {self.name} executor is saturated, retry later",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, run_attached, func, *args, **kwargs)
+        self._inflight += 1
+        try:
+            return await anyio.to_thread.run_sync(call, limiter=self.limiter)
+        finally:
+            self._inflight -= 1
+
+    def dispatch(self, endpoint: Callable) -> Callable:
+        """Wrap a sync endpoint into an async one running it in this pool."""
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            return await self.run(endpoint, *args, **kwargs)
+
+        wrapper.__executor__ = self.name
+        return wrapper
+
+
+class ExecutorPools:
+    """The executor pools of an app, one per executor class."""
+
+    def __init__(self, pools: Dict[str, ExecutorPool]):
+        self.pools = pools
+        # NOTE: The collectors are replaced, the gauges always report the pools of the latest app
+        registry.gauge(
+            "clicx_executor_busy",
+            "Threads of an executor pool running a call.",
+        ).collect = lambda: {(("pool", name),): pool.busy for name, pool in self.pools.items()}
+        registry.gauge(
+            "clicx_executor_queued",
+            "Calls waiting for a thread of an executor pool.",
+        ).collect = lambda: {(("pool", name),): pool.queued for name, pool in self.pools.items()}
+        registry.gauge(
+            "clicx_threadpool_tasks_waiting",
+            "Calls waiting for a thread, per executor pool and for the default threadpool.",
+        ).collect = lambda: {
+            (("pool", "default"),): default_tasks_waiting(),
+            **{(("pool", name),): pool.queued for name, pool in self.pools.items()},
+        }
+        registry.gauge(
+            "clicx_executor_saturation",
+            "Busy threads of an executor pool divided by its size.",
+        ).collect = lambda: {(("pool", name),): pool.busy / pool.max_workers for name, pool in self.pools.items()}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Dict[str, int]]]) -> "ExecutorPools":
+        config = config or {}
+        return cls({
+            name: ExecutorPool(name, **{**options, **config.get(name, {})})
+            for name, options in {**DEFAULT_POOLS, **config}.items()
+        })
+
+    def __getitem__(self, name: str) -> ExecutorPool:
+        return self.pools[name]
+
+    def tasks_waiting(self, endpoint: Optional[Callable]) -> int:
+        """Calls waiting for a thread of the pool running `endpoint`, of the default threadpool outside of the pools."""
+        pool = self.pools.get(getattr(endpoint, "__executor__", None))
+        return pool.queued if pool is not None else default_tasks_waiting()
+
+    def class_of(self, endpoint: Callable, methods, module=None) -> str:
+        name = getattr(endpoint, "__executor__", None) or getattr(module, "executor", None)
+        if name is None:
+            name = FAST_READ if methods and set(methods) <= {"GET", "HEAD"} else UPSTREAM_WRITE
+        if name not in self.pools:
+            raise ValueError(f"Unknown executor class '{name}', expected one of {', '.join(self.pools)}")
+        return name
+
+    def wrap_router(self, router, module=None):
+        """
+        Dispatch the sync endpoints of a router to their pool.
+
+        Must be called before the router is included, the routes of the app
+        are built from the endpoints of the router.
+        """
+        for route in router.routes:
+            endpoint = getattr(route, "endpoint", None)
+            methods = getattr(route, "methods", None)
+            if endpoint is None or methods is None or inspect.iscoroutinefunction(endpoint):
+                continue
+            route.endpoint = self[self.class_of(endpoint, methods, module)].dispatch(endpoint)
@@ -0,0 +1,112 @@
+"""
+Storage for the responses of idempotent requests.
+
+A request carrying an `Idempotency-Key` header is recorded as `in_progress`
+before it runs and as `completed` with its response once it finished. Records
+live in the shared state backend (`clicx.state`), so every worker process
+sees the same keys.
+
+An `in_progress` record expires after `lock_timeout` seconds, so a key whose
+worker died can be claimed again. It holds a random token, the request only
+completes or releases the key while the record still holds its token, never
+after another request claimed it again. It is never evicted when the backend
+is full. A `completed` record is kept for `ttl` seconds.
+"""
+import json
+import logging
+import secrets
+import time
+from typing import List, Optional, Tuple
+
+from clicx.state import StateBackend, get_backend
+
+_logger = logging.getLogger(__name__)
+
+IN_PROGRESS = 'in_progress'
+COMPLETED = 'completed'
+
+
+class StoredResponse:
+    __slots__ = ('state', 'fingerprint', 'status', 'headers', 'body', 'created', 'token')
+
+    def __init__(self, state: str, fingerprint: str, status: Optional[int] = None, headers: Optional[list] = None, body: bytes = b'', created: float = 0, token: Optional[str] = None):
+        self.state = state
+        self.token = token
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers: List[Tuple[bytes, bytes]] = [
+            (key.encode('latin-1'), value.encode('latin-1')) for key, value in headers or []
+        ]
+        self.body = body
+        self.created = created
+
+    def encode(self) -> bytes:
+        meta = {
+            'state': self.state,
+            'fingerprint': self.fingerprint,
+            'status': self.status,
+            'headers': [(key.decode('latin-1'), value.decode('latin-1')) for key, value in self.headers],
+            'created': self.created,
+            'token': self.token,
+        }
+        return json.dumps(meta).encode() + b'\n' + self.body
+
+    @classmethod
+    def decode(cls, data: bytes) -> "StoredResponse":
+        meta, _, body = data.partition(b'\n')
+        return cls(body=body, **json.loads(meta))
+
+
+class IdempotencyStore:
+    """
+    Store of idempotency keys shared between worker processes.
+
+    Args:
+        backend: State backend, the configured one by default
+        ttl: Seconds a completed request is remembered
+        lock_timeout: Seconds after which an `in_progress` key is considered abandoned
+    """
+
+    prefix = 'idempotency:'
+
+    def __init__(self, backend: StateBackend = None, ttl: float = 86400, lock_timeout: float = 300):
+        self._backend = backend
+        self.ttl = float(ttl)
+        self.lock_timeout = float(lock_timeout)
+
+    @property
+    def backend(self) -> StateBackend:
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
+
+    def begin(self, key: str, fingerprint: str) -> Tuple[Optional[bytes], Optional[StoredResponse]]:
+        """
+        Claim a key for a new request.
+
+        Returns:
+            The claim and None if the key was claimed and the request should
+            run, otherwise None and the stored state of the earlier request
+            with the same key
+        """
+        claim = StoredResponse(IN_PROGRESS, fingerprint, created=time.time(), token=secrets.token_hex(16)).encode()
+        while True:
+            if self.backend.add(self.prefix + key, claim, ttl=self.lock_timeout, evictable=False):
+                return claim, None
+            current = self.backend.get(self.prefix + key)
+            # NOTE: Expired or released between the two calls, try to claim it again
+            if current is not None:
+                return None, StoredResponse.decode(current)
+
+    def complete(self, key: str, claim: bytes, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> bool:
+        """Store the response of a finished request, returns False when its claim was lost."""
+        response = StoredResponse(COMPLETED, StoredResponse.decode(claim).fingerprint, status, created=time.time(), body=body)
+        response.headers = list(headers)
+        if self.backend.cas(self.prefix + key, claim, response.encode(), ttl=self.ttl):
+            return True
+        _logger.warning(f"Idempotency key {key} expired before its request completed, the response is not stored")
+        return False
+
+    def release(self, key: str, claim: bytes) -> bool:
+        """Forget a key so that the request can be retried, unless another request claimed it since."""
+        return self.backend.cas(self.prefix + key, claim, None)
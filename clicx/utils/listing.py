@@ -0,0 +1,164 @@
+"""
+Server side pagination, filtering and field projection for list endpoints.
+
+`ListParams` is a FastAPI dependency adding the standard list parameters to a
+route:
+
+    limit   Maximum number of items to return
+    cursor  Opaque cursor returned in the `X-Next-Cursor` header of the previous page
+    filter  Repeatable `key:value` conditions, all of them must match.
+            `name:` matches a prefix, `tag:` matches one of the semicolon
+            separated tags, any other key is an exact match (`status:running`)
+    fields  Comma separated list of fields to return
+
+Example:
+    ```python
+    @router.get("/list_vms")
+    def list_vms(node: str, response: Response, params: ListParams = Depends()):
+        return params.apply(pve.vm.list_vms(node=node), response, key=("vmid",))
+    ```
+"""
+import base64
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+
+MAX_LIMIT = 1000
+
+
+def _matches_tag(value: Any, tag: str) -> bool:
+    if not value:
+        return False
+    tags = value.replace(',', ';').split(';') if isinstance(value, str) else value
+    return tag in tags
+
+
+def _matches(item: Dict[str, Any], conditions: Sequence[Tuple[str, str]]) -> bool:
+    for key, expected in conditions:
+        if key == 'tag':
+            if not _matches_tag(item.get('tags'), expected):
+                return False
+        elif key == 'name':
+            if not str(item.get('name') or '').startswith(expected):
+                return False
+        elif str(item.get(key, '')) != expected:
+            return False
+    return True
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip('=')
+
+
+def _comparable(value: Any, example: Any) -> bool:
+    if value is None or example is None:
+        return True
+    if isinstance(example, (int, float)):
+        return isinstance(value, (int, float))
+    return type(value) is type(example)
+
+
+def decode_cursor(cursor: str, key: Optional[Sequence[str]] = None, items: Sequence[Dict[str, Any]] = ()) -> List[Any]:
+    """
+    The values of a cursor.
+
+    With `key`, the cursor must hold one value per key field, of the type of
+    that field in `items`, so it can be compared with them.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if key is not None:
+        if len(values) != len(key):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        for field, value in zip(key, values):
+            example = next((item.get(field) for item in items if item.get(field) is not None), None)
+            if not _comparable(value, example):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+class ListParams:
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="Maximum number of items to return."),
+        cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page."),
+        filter: Optional[List[str]] = Query(None, description="key:value condition, e.g. status:running, name:web, tag:prod. Repeat to combine."),
+        fields: Optional[str] = Query(None, description="Comma separated list of fields to return."),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.conditions = self._parse_filters(filter or [])
+        self.fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else []
+
+    @staticmethod
+    def _parse_filters(filters: Iterable[str]) -> List[Tuple[str, str]]:
+        conditions = []
+        for condition in filters:
+            key, sep, value = condition.partition(':')
+            if not sep or not key:
+                raise HTTPException(status_code=422, detail=f"Invalid filter '{condition}', expected key:value")
+            conditions.append((key.strip(), value.strip()))
+        return conditions
+
+    def filter(self, items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self.conditions:
+            return items if isinstance(items, list) else list(items)
+        return [item for item in items if _matches(item, self.conditions)]
+
+    def project(self, items: List[Dict[str, Any]], key: Sequence[str]) -> List[Dict[str, Any]]:
+        if not self.fields:
+            return items
+        # NOTE: The key fields are always returned, they are needed for the next cursor
+        fields = list(dict.fromkeys([*key, *self.fields]))
+        return [{field: item[field] for field in fields if field in item} for item in items]
+
+    def apply(
+        self,
+        items: Iterable[Dict[str, Any]],
+        response: Response,
+        key: Sequence[str] = ("id",),
+        reverse: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter, paginate and project a list of records.
+
+        Args:
+            items: The records to list
+            response: Response of the route, used to set the pagination headers
+            key: Unique fields the records are ordered and paginated by
+            reverse: Order by key descending
+
+        Returns:
+            The requested page of records
+        """
+        items = self.filter(items)
+        response.headers["X-Total-Count"] = str(len(items))
+
+        if self.limit or self.cursor:
+            def sort_key(item):
+                return tuple((item.get(field) is None, item.get(field)) for field in key)
+
+            items = sorted(items, key=sort_key, reverse=reverse)
+
+            start = 0
+            if self.cursor:
+                after = tuple((value is None, value) for value in decode_cursor(self.cursor, key, items))
+                for start, item in enumerate(items):
+                    if (sort_key(item) < after) if reverse else (sort_key(item) > after):
+                        break
+                else:
+                    start = len(items)
+
+            end = start + self.limit if self.limit else len(items)
+            if end < len(items):
+                response.headers["X-Next-Cursor"] = encode_cursor([items[end - 1].get(field) for field in key])
+            items = items[start:end]
+
+        return self.project(items, key)
@@ -0,0 +1,197 @@
+"""
+Non-blocking logging.
+
+With `LOG_MODE=queue` every logger writes its records to a bounded in-memory
+queue, a single writer thread formats them and does the I/O. A request thread
+or the event loop never waits on a slow terminal or disk. When the queue is
+full new records are dropped and counted instead of blocking.
+
+Settings:
+    LOG_MODE            `queue` enables the queue, anything else logs synchronously
+    LOG_FORMAT          `json` writes one JSON object per line, `text` by default
+    LOG_QUEUE_SIZE      Records buffered before new ones are dropped (10000)
+    LOG_MAX_BYTES       Rotate `logs/app.log` when it grows past this size (10 MB)
+    LOG_ROTATE_WHEN     Rotate on time instead, e.g. `midnight` or `H`
+    LOG_BACKUP_COUNT    Number of rotated files kept (5)
+    LOG_DEBUG_SAMPLE    Keep 1 in N debug records of the sampled loggers (1, keep all)
+    LOG_SAMPLED_LOGGERS Comma separated loggers whose debug records are sampled
+
+Rotation happens per process, with several workers give each its own file.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from clicx.utils.metrics import registry
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_dropped = registry.counter(
+    "clicx_log_records_dropped_total",
+    "Log records dropped because the log queue was full.",
+)
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only 1 in `rate` DEBUG records of the given loggers.
+
+    Args:
+        rate: Keep one record out of this many
+        loggers: Logger names to sample, their children are sampled as well
+    """
+
+    def __init__(self, rate: int, loggers: Iterable[str]):
+        super().__init__()
+        self.rate = max(1, int(rate))
+        self.loggers = tuple(loggers)
+        self._counts: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate == 1 or record.levelno > logging.DEBUG:
+            return True
+        if not any(record.name == name or record.name.startswith(name + ".") for name in self.loggers):
+            return True
+        # NOTE: Not locked, an occasional miscount only changes which records are kept
+        count = self._counts.get(record.name, 0)
+        self._counts[record.name] = count + 1
+        return count % self.rate == 0
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # NOTE: Render the message and traceback now, the arguments may change before the writer runs
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            _dropped.inc()
+
+
+def build_handlers(
+    log_level,
+    log_path: Optional[str] = None,
+    json_format: bool = False,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    rotate_when: Optional[str] = None,
+) -> List[logging.Handler]:
+    """Build the console handler and, if `log_path` is set, the rotating file handler."""
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_path:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        if rotate_when:
+            handlers.append(logging.handlers.TimedRotatingFileHandler(
+                log_path, when=rotate_when, backupCount=backup_count, encoding="utf-8",
+            ))
+        else:
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8",
+            ))
+
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.setLevel(log_level)
+    return handlers
+
+
+class QueueLogging:
+    """
+    Route the records of the given loggers through a queue to a writer thread.
+
+    Args:
+        handlers: Handlers run by the writer thread
+        queue_size: Maximum number of queued records
+        sample_rate: Keep 1 in `sample_rate` debug records of `sampled_loggers`
+        sampled_loggers: Loggers whose debug records are sampled
+    """
+
+    def __init__(self, handlers: List[logging.Handler], queue_size: int = 10000, sample_rate: int = 1, sampled_loggers: Iterable[str] = ()):
+        self.queue: queue.Queue = queue.Queue(maxsize=int(queue_size))
+        self.handler = DroppingQueueHandler(self.queue)
+        if int(sample_rate) > 1:
+            self.handler.addFilter(SamplingFilter(sample_rate, sampled_loggers))
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self._lock = threading.Lock()
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+    def install(self, log_level, logger_names: Iterable[str]):
+        """Replace the handlers of the root and the named loggers by the queue handler."""
+        root = logging.getLogger()
+        root.handlers = [self.handler]
+        root.setLevel(log_level)
+        for name in logger_names:
+            logger = logging.getLogger(name)
+            logger.handlers = [self.handler]
+            logger.setLevel(log_level)
+            logger.propagate = False
+
+        self.start()
+        atexit.register(self.stop)
+        # NOTE: The writer thread does not survive a fork, gunicorn workers start their own
+        os.register_at_fork(after_in_child=self._restart)
+        return self
+
+    def start(self):
+        with self._lock:
+            if self.listener._thread is None:
+                self.listener.start()
+
+    def stop(self):
+        with self._lock:
+            if self.listener._thread is not None:
+                self.listener.stop()
+
+    def _restart(self):
+        # NOTE: The parent's queue holds its unwritten records, and its locks may be held by the parent's writer
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self.handler.queue = self.queue
+        self.listener.queue = self.queue
+        self._lock = threading.Lock()
+        self.listener._thread = None
+        self.start()
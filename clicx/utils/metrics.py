@@ -0,0 +1,192 @@
+"""
+Process metrics in the Prometheus text format.
+
+Example:
+    ```python
+    from clicx.utils.metrics import registry
+
+    requests = registry.counter("clicx_admission_total", "Admission decisions.")
+    requests.inc(route_class="read", decision="admitted")
+    ```
+
+The `/metrics` route renders every registered metric. Metrics are kept per
+worker process, each worker reports its own values.
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRouter
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[Tuple[Labels, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def value(self, **labels) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for labels, value in self.samples():
+            lines.append(f"{self.name}{_format_labels(labels)} {value:g}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down.
+
+    Args:
+        collect: Callable returning `{labels: value}` when rendered, for values
+            read from elsewhere (e.g. a queue length) instead of being set
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, collect: Optional[Callable[[], Dict[Labels, float]]] = None):
+        super().__init__(name, documentation)
+        self.collect = collect
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterable[Tuple[Labels, float]]:
+        if self.collect is not None:
+            return list(self.collect().items())
+        return super().samples()
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values, e.g. latencies, in cumulative buckets.
+
+    Args:
+        buckets: Upper bounds of the buckets, `+Inf` is added
+    """
+
+    type = "histogram"
+
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        # NOTE: Per labels, the count of every bucket followed by the sum and the count
+        self._observations: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            observation = self._observations.get(key)
+            if observation is None:
+                observation = self._observations[key] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    observation[index] += 1
+            observation[-2] += value
+            observation[-1] += 1
+
+    def count(self, **labels) -> float:
+        observation = self._observations.get(_labels(labels))
+        return observation[-1] if observation else 0.0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            observations = [(labels, list(observation)) for labels, observation in self._observations.items()]
+        for labels, observation in observations:
+            for bound, count in zip(self.buckets, observation):
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {count:g}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {observation[-1]:g}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {observation[-2]:g}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {observation[-1]:g}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} is already registered as a {existing.type}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter(name, documentation))
+
+    def gauge(self, name: str, documentation: str, collect: Optional[Callable[[], Dict[Labels, float]]] = None) -> Gauge:
+        return self._register(Gauge(name, documentation, collect=collect))
+
+    def histogram(self, name: str, documentation: str, buckets: Iterable[float] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, buckets=buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+router = APIRouter(
+    tags=["Metrics"],
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Metrics of this worker in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,17 +1,307 @@
-from fastapi import Request
+from fastapi.requests import HTTPConnection
+import hashlib
+import hmac
 import logging
+import time
+from urllib.parse import parse_qs
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.responses import JSONResponse
+
+from clicx.utils.idempotency import COMPLETED, IN_PROGRESS, IdempotencyStore
+from clicx.utils.profiler import SamplingProfiler, profile_name
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Get logger with the correct name
 _logger = logging.getLogger(__name__)
 
-async def log_request_info(request: Request):
+async def log_request_info(request: HTTPConnection):
     """
     Dependency function to log request information.
+    Typed as HTTPConnection so it also applies to websocket routes.
     """
+    # NOTE: Called for every request, skip building the message when debug logging is off
+    if not _logger.isEnabledFor(logging.DEBUG):
+        return
     _logger.debug(
-        f"{request.method} request to {request.url} metadata\n"
+        f"{request.scope.get('method', 'WEBSOCKET')} request to {request.url} metadata\n"
         f"\tHeaders: {request.headers}\n"
         f"\tPath Params: {request.path_params}\n"
         f"\tQuery Params: {request.query_params}\n"
         f"\tCookies: {request.cookies}\n"
-    )
\ No newline at end of file
+    )
+
+
+class SamplingProfilerMiddleware:
+    """
+    ASGI middleware that runs a sampling profiler for selected requests.
+
+    A request is profiled when:
+        - it carries the `X-Profile` header or `__profile` query parameter with
+          a value equal to `token`, the profile is always written.
+        - `threshold_ms` is set and the request is still running after that many
+          milliseconds. Sampling only starts once the threshold is breached, so
+          fast requests never pay for more than an idle timer.
+
+    Profiles are written as collapsed stack files to `logs/profiles/`.
+
+    Args:
+        app: The ASGI app to wrap
+        token: Secret that authorizes on demand profiling, disabled if empty
+        threshold_ms: Latency threshold for automatic profiling, disabled if 0
+        interval_ms: Sampling interval in milliseconds
+    """
+
+    header = b"x-profile"
+    query_param = "__profile"
+
+    def __init__(self, app, token: str = "", threshold_ms: float = 0, interval_ms: float = 5):
+        self.app = app
+        self.token = token or ""
+        self.threshold = float(threshold_ms or 0) / 1000
+        self.interval = float(interval_ms or 5) / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (self.token or self.threshold):
+            await self.app(scope, receive, send)
+            return
+
+        forced = self._is_requested(scope)
+        if not forced and not self.threshold:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(
+            interval=self.interval,
+            delay=0 if forced else self.threshold,
+        ).start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            duration = time.perf_counter() - start
+            if forced or duration >= self.threshold:
+                self._write(profiler, scope, duration)
+
+    def _is_requested(self, scope) -> bool:
+        if not self.token:
+            return False
+
+        value = None
+        for key, header_value in scope.get("headers", []):
+            if key == self.header:
+                value = header_value.decode("latin-1")
+                break
+
+        if value is None and scope.get("query_string"):
+            values = parse_qs(scope["query_string"].decode("latin-1")).get(self.query_param)
+            value = values[0] if values else None
+
+        return value is not None and hmac.compare_digest(value, self.token)
+
+    def _write(self, profiler: SamplingProfiler, scope, duration: float):
+        try:
+            path = profiler.write(profile_name(scope["method"], scope["path"], duration))
+            if path:
+                _logger.info(
+                    f"Profiled {scope['method']} {scope['path']} in {duration * 1000:.0f} ms "
+                    f"({profiler.sample_count} samples): {path}"
+                )
+        except OSError as e:
+            _logger.error(f"Failed to write profile for {scope['path']}: {e}")
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int = 4):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        if more_body:
+            return data + self.compressor.flush()
+        return data + self.compressor.finish()
+
+
+class FlushingGZipResponder(GZipResponder):
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            # NOTE: Z_SYNC_FLUSH, the client can decode each chunk of a stream as it arrives
+            self.gzip_file.write(body)
+            self.gzip_file.flush()
+            body = self.gzip_buffer.getvalue()
+            self.gzip_buffer.seek(0)
+            self.gzip_buffer.truncate()
+            return body
+        return super().apply_compression(body, more_body=more_body)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses larger than `minimum_size` bytes.
+
+    Brotli is preferred when the `brotli` package is installed and the client
+    accepts it, otherwise gzip is used. Small responses and responses that
+    already carry a Content-Encoding are sent untouched. Streamed responses,
+    such as the NDJSON exports, are flushed after every chunk so the client
+    receives each chunk as it is sent instead of when a compressor block fills.
+
+    Args:
+        app: The ASGI app to wrap
+        minimum_size: Responses smaller than this are not compressed
+        gzip_level: Gzip compression level (1-9)
+        brotli_quality: Brotli quality (0-11)
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = int(minimum_size)
+        self.gzip_level = int(gzip_level)
+        self.brotli_quality = int(brotli_quality)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and "br" in accept_encoding:
+            responder = BrotliResponder(self.app, self.minimum_size, quality=self.brotli_quality)
+        elif "gzip" in accept_encoding:
+            responder = FlushingGZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+
+        await responder(scope, receive, send)
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware honouring the `Idempotency-Key` header on mutating requests.
+
+    The first request with a key runs normally and its response is stored.
+    A retry with the same key gets the stored response back, with an
+    `Idempotent-Replayed: true` header, without running the route again:
+
+        - while the first request is still running the retry gets a 409 with
+          `Retry-After`.
+        - a key reused for a different method, path, query or body gets a 422.
+        - responses with a 5xx or 429 status are not stored, the request can be
+          retried: a 429 is sent by the admission control before the route runs.
+
+    Keys are scoped by the Authorization header, two clients never share a key.
+
+    Args:
+        app: The ASGI app to wrap
+        store: Store shared between the workers
+        retry_after: Seconds sent in `Retry-After` while a request is in progress
+        max_key_length: Longest accepted key
+    """
+
+    header = b"idempotency-key"
+    methods = {"POST", "PUT", "PATCH", "DELETE"}
+
+    def __init__(self, app, store: IdempotencyStore = None, retry_after: int = 1, max_key_length: int = 255):
+        self.app = app
+        self.store = store or IdempotencyStore()
+        self.retry_after = int(retry_after)
+        self.max_key_length = int(max_key_length)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get(self.header.decode())
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not key or len(key) > self.max_key_length:
+            await JSONResponse({"detail": f"Idempotency-Key must be 1 to {self.max_key_length} characters"}, status_code=400)(scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        fingerprint = hashlib.sha256(
+            b"\0".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+        store_key = hashlib.sha256(f"{headers.get('authorization', '')}\0{key}".encode()).hexdigest()
+
+        claim, stored = await anyio.to_thread.run_sync(self.store.begin, store_key, fingerprint)
+        if stored is not None:
+            await self._respond_stored(stored, fingerprint, scope, receive, send)
+            return
+
+        status = None
+        response_headers = []
+        chunks = []
+
+        async def replay_receive():
+            nonlocal body
+            if body is not None:
+                message = {"type": "http.request", "body": body, "more_body": False}
+                body = None
+                return message
+            return await receive()
+
+        async def capture_send(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await anyio.to_thread.run_sync(self.store.release, store_key, claim)
+            raise
+
+        # NOTE: A 429 comes from the admission control or a saturated executor, the route did not run
+        if status is None or status >= 500 or status == 429:
+            await anyio.to_thread.run_sync(self.store.release, store_key, claim)
+        else:
+            await anyio.to_thread.run_sync(self.store.complete, store_key, claim, status, response_headers, b"".join(chunks))
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
+
+    async def _respond_stored(self, stored, fingerprint: str, scope, receive, send):
+        if stored.fingerprint != fingerprint:
+            response = JSONResponse({"detail": "Idempotency-Key was already used for a different request"}, status_code=422)
+        elif stored.state == IN_PROGRESS:
+            response = JSONResponse(
+                {"detail": "A request with this Idempotency-Key is still in progress"},
+                status_code=409,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        elif stored.state == COMPLETED:
+            await send({
+                "type": "http.response.start",
+                "status": stored.status,
+                "headers": stored.headers + [(b"idempotent-replayed", b"true")],
+            })
+            await send({"type": "http.response.body", "body": stored.body})
+            return
+        else:
+            response = JSONResponse({"detail": f"Unknown idempotency state {stored.state}"}, status_code=500)
+        await response(scope, receive, send)
@@ -0,0 +1,248 @@
+"""
+Low-overhead sampling profiler used for per-request profiling.
+
+One background thread periodically snapshots the stacks of the profiled
+requests and counts identical stacks. A request is sampled on the event loop
+while one of its tasks is running, and in the threads of the executor pools
+while they run one of its sync calls (`run_attached`), so the concurrent
+requests do not show up in its profile. Time spent awaiting is not sampled.
+
+The result is written in the "collapsed stack" format understood by
+flamegraph.pl, speedscope and inferno:
+
+    thread;module:function:line;module:function:line 42
+
+Profiles are stored in `logs/profiles/` and can be inspected with
+`clicx profile list` and `clicx profile summary <file>`.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from clicx import project_root
+
+profiles_dir: Path = Path(project_root, 'logs', 'profiles')
+
+# Frames from these files are noise in every sample, so they are dropped
+_IGNORED_FILES = (threading.__file__, __file__)
+
+# The profiler of the request the current task or thread works for
+_current: ContextVar[Optional["SamplingProfiler"]] = ContextVar("clicx_profiler", default=None)
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the request it was started in, until stopped.
+
+    Must be started and stopped from the task of the request, the tasks it
+    spawns afterwards are sampled as well.
+
+    Args:
+        interval: Seconds between two samples
+        delay: Seconds to wait before the first sample is taken. Used to only
+            profile the part of a request that runs past a latency threshold.
+        max_depth: Maximum number of frames recorded per stack
+    """
+
+    def __init__(self, interval: float = 0.005, delay: float = 0.0, max_depth: int = 128):
+        self.interval = interval
+        self.delay = delay
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.threads: Set[int] = set()
+        self.next_sample = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._token = None
+
+    def start(self) -> "SamplingProfiler":
+        try:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+            self._loop_thread = threading.get_ident()
+        except RuntimeError:
+            # NOTE: Outside of a loop only the attached threads are sampled
+            self._loop = None
+        self._token = _current.set(self)
+        self.next_sample = time.monotonic() + self.delay
+        _sampler.add(self)
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        _sampler.remove(self)
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        return self
+
+    def sample(self, frames: Dict[int, object], names: Dict[int, str]):
+        """Record the stacks of the request among the `frames` of all threads."""
+        idents = set(self.threads)
+        if self._loop is not None and self._runs_on_loop():
+            idents.add(self._loop_thread)
+        for ident in idents:
+            frame = frames.get(ident)
+            stack = self._collapse(frame) if frame is not None else None
+            if stack:
+                self.samples[f"{names.get(ident, ident)};{stack}"] += 1
+        self.sample_count += 1
+
+    def _runs_on_loop(self) -> bool:
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            return False
+        if task is self._task:
+            return True
+        # NOTE: Task.get_context is Python 3.12+, before only the request's own task is recognised
+        get_context = getattr(task, 'get_context', None)
+        return get_context is not None and get_context().get(_current) is self
+
+    def _collapse(self, frame) -> str:
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            if code.co_filename not in _IGNORED_FILES:
+                module = frame.f_globals.get('__name__', os.path.basename(code.co_filename))
+                frames.append(f"{module}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        frames.reverse()
+        return ";".join(frames)
+
+    def write(self, name: str, directory: Path = profiles_dir) -> Optional[Path]:
+        """
+        Write the collected samples as a collapsed stack file.
+
+        Returns:
+            Path of the written file or None if no samples were taken
+        """
+        if not self.samples:
+            return None
+
+        os.makedirs(directory, exist_ok=True)
+        path = Path(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}.collapsed")
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class _Sampler:
+    """The thread sampling every running profiler, started on first use."""
+
+    def __init__(self):
+        self._profilers: Set[SamplingProfiler] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profiler: SamplingProfiler):
+        with self._lock:
+            self._profilers.add(profiler)
+            # NOTE: Also restarts the thread in a forked worker, threads don't survive a fork
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="clicx-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def remove(self, profiler: SamplingProfiler):
+        with self._lock:
+            self._profilers.discard(profiler)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                profilers = list(self._profilers)
+            if not profilers:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            now = time.monotonic()
+            due = [profiler for profiler in profilers if profiler.next_sample <= now]
+            if due:
+                frames = sys._current_frames()
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for profiler in due:
+                    profiler.sample(frames, names)
+                    profiler.next_sample = max(profiler.next_sample + profiler.interval, now)
+                # NOTE: Drop the references to the frames of the other threads before waiting
+                del frames
+
+            timeout = min(profiler.next_sample for profiler in profilers) - time.monotonic()
+            if timeout > 0:
+                self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+
+_sampler = _Sampler()
+
+
+def run_attached(func, *args, **kwargs):
+    """Call `func` in this thread, sampled by the profiler of the request it runs for, if any."""
+    profiler = _current.get()
+    if profiler is None:
+        return func(*args, **kwargs)
+
+    ident = threading.get_ident()
+    profiler.threads.add(ident)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.threads.discard(ident)
+
+
+def profile_name(method: str, path: str, duration: float) -> str:
+    """Build a filesystem safe profile name from a request."""
+    slug = path.strip('/').replace('/', '.') or 'root'
+    slug = "".join(c if c.isalnum() or c in '._-' else '_' for c in slug)
+    return f"{method.lower()}-{slug}-{int(duration * 1000)}ms"
+
+
+def list_profiles(directory: Path = profiles_dir) -> List[Path]:
+    """List captured profiles, newest first."""
+    if not directory.exists():
+        return []
+    return sorted(directory.glob('*.collapsed'), key=lambda p: p.stat().st_mtime, reverse=True)
+
+
+def read_profile(path: Path) -> Dict[str, int]:
+    """Read a collapsed stack file into a {stack: count} mapping."""
+    stacks = {}
+    with open(path, 'r') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] = stacks.get(stack, 0) + int(count)
+    return stacks
+
+
+def summarize(stacks: Dict[str, int], top: int = 20) -> Tuple[int, List[Tuple[str, int, int]]]:
+    """
+    Summarize a profile by function.
+
+    Returns:
+        Total sample count and a list of (frame, self samples, inclusive samples)
+        sorted by inclusive samples
+    """
+    total = sum(stacks.values())
+    own = Counter()
+    inclusive = Counter()
+
+    for stack, count in stacks.items():
+        frames = stack.split(';')[1:]
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+
+    rows = [(frame, own[frame], count) for frame, count in inclusive.most_common(top)]
+    return total, rows
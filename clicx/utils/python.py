@@ -10,4 +10,37 @@ def deep_merge(dict1, dict2) -> dict:
             result[key] = deep_merge(result[key], value)
         else:
             result[key] = value
-    return result
\ No newline at end of file
+    return result
+
+class FrozenDict(dict):
+    """
+    Read-only dict, every method that would change it raises a TypeError.
+
+    Still a dict, so it is accepted by the JSON encoders and by `isinstance` checks.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.items())))
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def copy(self) -> dict:
+        return dict(self)
+
+
+def freeze(value):
+    """
+    Recursively turn dicts into `FrozenDict` and lists into tuples.
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
@@ -0,0 +1,29 @@
+"""
+Response classes used by the API.
+
+`FastJSONResponse` is the default response class of the `API`. It serializes
+with orjson when it is installed and falls back to a compact `json.dumps`.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize already JSON compatible content to bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson if available."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,160 @@
+"""
+Streaming helpers for large listings.
+
+`ConcurrentIterator` runs several producers in threads and yields their items
+as soon as they arrive. Producers write into a bounded queue, so a slow
+consumer (e.g. a slow HTTP client) blocks the producers instead of letting
+records pile up in memory.
+
+Example:
+    ```python
+    source = ConcurrentIterator([partial(fetch, node) for node in nodes])
+    return StreamingResponse(stream_ndjson(source), media_type=NDJSON_MEDIA_TYPE)
+    ```
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, List, Optional
+
+from starlette.concurrency import iterate_in_threadpool
+
+from clicx.utils.responses import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+class ConcurrentIterator:
+    """
+    Iterate over the items of several producers concurrently.
+
+    Args:
+        producers: Callables returning an iterable of items
+        max_workers: Maximum number of producers running at the same time
+        buffer_size: Maximum number of items waiting to be consumed
+        poll_interval: Seconds between checks for cancellation while blocked
+    """
+
+    def __init__(
+        self,
+        producers: Iterable[Callable[[], Iterable[Any]]],
+        max_workers: int = 8,
+        buffer_size: int = 256,
+        poll_interval: float = 0.1,
+    ):
+        self.producers = list(producers)
+        self.max_workers = max(1, min(max_workers, len(self.producers) or 1))
+        self.poll_interval = poll_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=buffer_size)
+        self._stopped = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = len(self.producers)
+
+    def _put(self, item) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=self.poll_interval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, producer: Callable[[], Iterable[Any]]):
+        try:
+            for item in producer():
+                if not self._put(item):
+                    return
+        except BaseException as e:
+            self._put(_Failure(e))
+        finally:
+            self._put(_DONE)
+
+    def _start(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="clicx-stream")
+            for producer in self.producers:
+                self._executor.submit(self._produce, producer)
+
+    def _get(self, block: bool = True):
+        while not self._stopped.is_set():
+            try:
+                return self._queue.get(block=block, timeout=self.poll_interval if block else None)
+            except queue.Empty:
+                if not block:
+                    raise
+        raise queue.Empty
+
+    def _unwrap(self, item) -> bool:
+        """Return True for a real item, False for a finished producer."""
+        if item is _DONE:
+            self._pending -= 1
+            return False
+        if isinstance(item, _Failure):
+            self.close()
+            raise item.exception
+        return True
+
+    def __iter__(self) -> Iterator[Any]:
+        for batch in self.batches(max_batch=1):
+            yield from batch
+
+    def batches(self, max_batch: int = 500) -> Iterator[List[Any]]:
+        """
+        Yield lists of the items that are available right now.
+
+        Blocks for the first item of a batch only, so items are emitted as
+        they arrive while keeping the number of chunks low.
+        """
+        self._start()
+        try:
+            while self._pending > 0:
+                batch = []
+                try:
+                    item = self._get()
+                    if self._unwrap(item):
+                        batch.append(item)
+                    while len(batch) < max_batch and self._pending > 0:
+                        item = self._get(block=False)
+                        if self._unwrap(item):
+                            batch.append(item)
+                except queue.Empty:
+                    if self._stopped.is_set():
+                        return
+                if batch:
+                    yield batch
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop all producers, unblocking the ones waiting on a full buffer."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def ndjson_lines(records: Iterable[Any]) -> Iterator[bytes]:
+    """Encode records as newline delimited JSON, one line per record."""
+    for record in records:
+        yield dumps(record) + b"\n"
+
+
+async def stream_ndjson(source: ConcurrentIterator, max_batch: int = 500) -> AsyncIterator[bytes]:
+    """
+    Stream the items of a ConcurrentIterator as NDJSON chunks.
+
+    The source is closed when the client disconnects, which stops the producers.
+    """
+    try:
+        async for batch in iterate_in_threadpool(source.batches(max_batch=max_batch)):
+            yield b"".join(dumps(record) + b"\n" for record in batch)
+    finally:
+        source.close()
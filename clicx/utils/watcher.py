@@ -0,0 +1,118 @@
+"""
+Watch the files of a directory and call back when they change.
+
+Uses `watchfiles` (inotify on Linux) when it is installed. Otherwise the
+modification time of the known files and of their directories is polled, a
+file added next to a known one changes the mtime of its directory.
+
+Example:
+    ```python
+    watcher = FileWatcher(addons, suffixes=(".json", ".env"), callback=configuration.reload)
+    watcher.start()
+    ```
+"""
+import atexit
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - optional dependency
+    watchfiles = None
+
+_logger = logging.getLogger(__name__)
+
+
+class FileWatcher:
+    """
+    Run `callback` in a background thread when a watched file changes.
+
+    Args:
+        directory: Directory watched recursively
+        suffixes: Only files ending with one of these are watched
+        callback: Called without arguments after a change
+        files: Files to poll when `watchfiles` is not available
+        interval: Seconds between two polls
+        debounce_ms: Changes within this window are reported once
+    """
+
+    def __init__(
+        self,
+        directory,
+        suffixes: Tuple[str, ...],
+        callback: Callable[[], None],
+        files: Optional[Callable[[], Iterable[str]]] = None,
+        interval: float = 2.0,
+        debounce_ms: int = 500,
+    ):
+        self.directory = str(directory)
+        self.suffixes = tuple(suffixes)
+        self.callback = callback
+        self.files = files or (lambda: ())
+        self.interval = float(interval)
+        self.debounce_ms = int(debounce_ms)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "FileWatcher":
+        if self.running or not os.path.isdir(self.directory):
+            return self
+        self._stop.clear()
+        target = self._watch if watchfiles is not None else self._poll
+        self._thread = threading.Thread(target=target, name="clicx-file-watcher", daemon=True)
+        self._thread.start()
+        # NOTE: A daemon thread still inside watchfiles when the interpreter shuts down crashes it
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        atexit.unregister(self.stop)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _notify(self):
+        try:
+            self.callback()
+        except Exception as e:
+            _logger.error(f"File watcher callback failed: {e}")
+
+    def _watch(self):
+        _logger.debug(f"Watching {self.directory} for changes with watchfiles")
+        changes = watchfiles.watch(
+            self.directory,
+            watch_filter=lambda change, path: path.endswith(self.suffixes),
+            debounce=self.debounce_ms,
+            stop_event=self._stop,
+            yield_on_timeout=False,
+        )
+        for _ in changes:
+            self._notify()
+
+    def _signature(self) -> Dict[str, Tuple[int, int]]:
+        signature = {}
+        paths = set(self.files())
+        paths.update({os.path.dirname(path) for path in paths})
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature[path] = (stat.st_mtime_ns, stat.st_size)
+        return signature
+
+    def _poll(self):
+        _logger.debug(f"Polling {self.directory} for changes every {self.interval}s")
+        signature = self._signature()
+        while not self._stop.wait(self.interval):
+            current = self._signature()
+            if current != signature:
+                signature = current
+                self._notify()
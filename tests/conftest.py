@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+# NOTE: Set before clicx is imported, the settings are read once at import
+os.environ.setdefault('DB_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='clicx-tests-'), 'clicx.db')}")
+
+import pytest
+
+from clicx.database.base import Base
+from clicx.database.connection import DatabaseConnection
+from clicx.database.registry import ModelRegistry
+
+
+@pytest.fixture(scope="session")
+def create_tables():
+    """Create the tables of the given models, with the relationships between the models resolved."""
+    def create(*models):
+        ModelRegistry.resolve_relationships()
+        Base.metadata.create_all(DatabaseConnection().engine, tables=[model.__table__ for model in models])
+    return create
@@ -0,0 +1,14 @@
+import pytest
+from fastapi import HTTPException
+
+from clicx.utils.admission import AdmissionController
+
+
+def test_a_new_bucket_admits_its_burst():
+    controller = AdmissionController(classes={"clone": {"rate": 0.2, "burst": 1}})
+    controller.check_rate("clone", "client")
+    with pytest.raises(HTTPException) as rejected:
+        controller.check_rate("clone", "client")
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers == {"Retry-After": "5"}
+    controller.check_rate("clone", "other client")
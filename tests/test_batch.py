@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from clicx.utils import batch
+from clicx.utils.executors import ExecutorPool
+
+
+class CloneRequest(BaseModel):
+    name: str
+    cores: int
+
+
+saturated = ExecutorPool("saturated", max_workers=1, max_queue=0)
+# NOTE: One call in flight fills a pool without queue
+saturated._inflight = 1
+
+
+def reject_admission():
+    raise HTTPException(status_code=429, detail="Too many requests", headers={"Retry-After": "1"})
+
+
+router = APIRouter()
+
+
+@router.get("/vm/{vmid}")
+def get_vm(vmid: int):
+    if vmid != 100:
+        raise HTTPException(status_code=404, detail=f"VM {vmid} not found")
+    return {"vmid": vmid}
+
+
+@router.post("/clone")
+def clone_vm(request: CloneRequest):
+    return {"name": request.name}
+
+
+@router.get("/limited", dependencies=[Depends(reject_admission)])
+def limited():
+    return {}
+
+
+@router.get("/pooled")
+async def pooled():
+    return await saturated.run(lambda: {})
+
+
+@router.get("/broken")
+def broken():
+    raise RuntimeError("boom")
+
+
+def run(operations):
+    app = FastAPI()
+    app.include_router(router)
+    app.include_router(batch.router)
+    with TestClient(app, raise_server_exceptions=False) as client:
+        response = client.post("/batch", json={"operations": operations})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_batch_runs_operations_in_order():
+    results = run([
+        {"id": "a", "operation": "get_vm", "params": {"vmid": 100}},
+        {"id": "b", "operation": "clone_vm", "body": {"name": "web", "cores": 2}},
+    ])
+    assert [(result["id"], result["status"], result["body"]) for result in results] == [
+        ("a", 200, {"vmid": 100}),
+        ("b", 200, {"name": "web"}),
+    ]
+
+
+def test_batch_returns_validation_errors_as_422():
+    [body, params] = run([
+        {"operation": "clone_vm", "body": {"name": "web", "cores": "many"}},
+        {"operation": "get_vm", "params": {"vmid": "abc"}},
+    ])
+    assert body["status"] == 422
+    assert body["body"]["detail"][0]["loc"] == ["body", "cores"]
+    assert params["status"] == 422
+    assert params["body"]["detail"][0]["loc"] == ["path", "vmid"]
+
+
+def test_batch_returns_http_exceptions_with_their_status():
+    [missing] = run([{"operation": "get_vm", "params": {"vmid": 101}}])
+    assert (missing["status"], missing["body"]) == (404, {"detail": "VM 101 not found"})
+
+
+def test_batch_returns_admission_rejections_as_429():
+    [limited] = run([{"operation": "limited"}])
+    assert limited["status"] == 429
+    assert limited["headers"]["retry-after"] == "1"
+
+
+def test_batch_returns_saturated_executor_as_429():
+    [pooled] = run([{"operation": "pooled"}])
+    assert pooled["status"] == 429
+    assert pooled["body"] == {"detail": "The saturated executor is saturated, retry later"}
+
+
+def test_batch_reports_unknown_operations_and_unexpected_errors():
+    unknown, broken = run([{"operation": "nope"}, {"operation": "broken"}])
+    assert unknown["status"] == 404
+    assert broken["status"] == 500
@@ -0,0 +1,17 @@
+import os
+
+from clicx.config import Configuration
+
+
+def test_reload_drops_keys_removed_from_the_env_files(tmp_path, monkeypatch):
+    # NOTE: The values of the env files are exported to the process environment
+    monkeypatch.setattr(os, "environ", {**os.environ, "CLICX_TEST_PROCESS": "process"})
+    env_file = tmp_path / "test.env"
+    env_file.write_text("CLICX_TEST_TOKEN=secret\nCLICX_TEST_PROCESS=file\n")
+    config = Configuration(str(tmp_path))
+    assert (config.env["CLICX_TEST_TOKEN"], config.env["CLICX_TEST_PROCESS"]) == ("secret", "file")
+
+    env_file.write_text("CLICX_TEST_OTHER=1\n")
+    assert config.reload()
+    assert "CLICX_TEST_TOKEN" not in config.env
+    assert (config.env["CLICX_TEST_OTHER"], config.env["CLICX_TEST_PROCESS"]) == ("1", "process")
@@ -0,0 +1,8 @@
+import logging
+
+from clicx.database.connection import DatabaseConnection
+
+
+def test_pool_debug_messages_are_not_logged_by_default():
+    engine = DatabaseConnection().engine
+    assert engine.pool.logger.getEffectiveLevel() == logging.WARNING
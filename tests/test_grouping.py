@@ -0,0 +1,37 @@
+import pytest
+
+from clicx.database import fields
+from clicx.database.base import BaseModel
+from clicx.database.grouping import InvalidGroupBy
+
+
+class Disk(BaseModel):
+    _name = 'test.grouping.disk'
+
+    node = fields.Char()
+    size = fields.Integer()
+
+
+@pytest.fixture(scope="module")
+def disks(create_tables):
+    create_tables(Disk)
+    return Disk.create([{'node': f'node {i % 2}', 'size': i} for i in range(10)])
+
+
+def test_read_group_aggregates_under_distinct_names(disks):
+    groups = Disk.read_group([], ['size:sum', 'largest:max(size)'], ['node'])
+    assert groups == [
+        {'node': 'node 0', 'size': 20, 'largest': 8, '__count': 5},
+        {'node': 'node 1', 'size': 25, 'largest': 9, '__count': 5},
+    ]
+
+
+@pytest.mark.parametrize("fields, groupby", [
+    (['size:sum', 'size:max'], ['node']),
+    (['node:count'], ['node']),
+    (['__count:sum(size)'], ['node']),
+    (['size:sum'], ['node', 'node']),
+])
+def test_read_group_rejects_colliding_names(disks, fields, groupby):
+    with pytest.raises(InvalidGroupBy):
+        Disk.read_group([], fields, groupby)
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from clicx.state.memory import MemoryBackend
+from clicx.utils.admission import AdmissionController, admission_control
+from clicx.utils.idempotency import IdempotencyStore
+from clicx.utils.middleware import IdempotencyMiddleware
+
+router = APIRouter(dependencies=[Depends(admission_control)])
+clones = []
+
+
+@router.post("/clone")
+def clone_vm():
+    clones.append(len(clones))
+    return {"clone": len(clones)}
+
+
+def make_app():
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(IdempotencyMiddleware, store=IdempotencyStore(MemoryBackend()))
+    app.state.admission = AdmissionController(classes={"write": {"rate": 0.001, "burst": 1}})
+    return app
+
+
+def test_completed_requests_are_replayed():
+    clones.clear()
+    with TestClient(make_app()) as client:
+        first = client.post("/clone", headers={"Idempotency-Key": "k0"})
+        replayed = client.post("/clone", headers={"Idempotency-Key": "k0"})
+    assert (first.status_code, first.json()) == (200, {"clone": 1})
+    assert (replayed.status_code, replayed.json()) == (200, {"clone": 1})
+    assert replayed.headers["idempotent-replayed"] == "true"
+    assert clones == [0]
+
+
+def test_rate_limited_requests_can_be_retried_with_the_same_key():
+    clones.clear()
+    app = make_app()
+    with TestClient(app) as client:
+        assert client.post("/clone", headers={"Idempotency-Key": "k0"}).status_code == 200
+        limited = client.post("/clone", headers={"Idempotency-Key": "k1"})
+        app.state.admission = AdmissionController()
+        retried = client.post("/clone", headers={"Idempotency-Key": "k1"})
+    assert limited.status_code == 429
+    assert (retried.status_code, retried.json()) == (200, {"clone": 2})
+    assert "idempotent-replayed" not in retried.headers
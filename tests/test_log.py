@@ -0,0 +1,29 @@
+import logging
+
+from clicx.utils.log import QueueLogging
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_restart_after_fork_drops_the_records_of_the_parent():
+    handler = ListHandler()
+    logging_queue = QueueLogging([handler])
+    logger = logging.getLogger("clicx.tests.log")
+    logger.addHandler(logging_queue.handler)
+    logger.propagate = False
+    try:
+        logger.warning("queued by the parent")
+        logging_queue._restart()
+        logger.warning("logged by the child")
+        logging_queue.stop()
+    finally:
+        logger.removeHandler(logging_queue.handler)
+    assert handler.messages == ["logged by the child"]
+    assert logging_queue.listener.queue is logging_queue.handler.queue is logging_queue.queue
@@ -0,0 +1,53 @@
+import pytest
+
+from clicx.database import fields
+from clicx.database.base import BaseModel
+
+
+class Score(BaseModel):
+    _name = 'test.ordering.score'
+
+    name = fields.Char(required=True)
+    score = fields.Integer()
+
+
+@pytest.fixture(scope="module")
+def scores(create_tables):
+    create_tables(Score)
+    # NOTE: One record in ten has no score
+    return Score.create([
+        {'name': f'score {i % 7}', 'score': None if i % 10 == 0 else i % 13}
+        for i in range(100)
+    ])
+
+
+def paginate(order, limit=7):
+    records = []
+    page = Score.search([], order=order, limit=limit)
+    while page:
+        records.extend(page)
+        page = Score.search([], order=order, limit=limit, after=page[-1])
+    return records
+
+
+@pytest.mark.parametrize("order, descending", [
+    ('score', False),
+    ('score desc', True),
+    ('score, id desc', False),
+    ('name, score desc', False),
+])
+def test_keyset_pagination_returns_null_order_values(scores, order, descending):
+    records = paginate(order)
+    assert [record.id for record in records] == [record.id for record in Score.search([], order=order)]
+    assert len(records) == len(scores)
+    nulls = [record.score is None for record in records]
+    if order.startswith('score'):
+        # NOTE: NULL sorts as the largest value
+        assert nulls == sorted(nulls, reverse=descending)
+
+
+def test_keyset_continues_after_a_null_cursor(scores):
+    after = Score.search([('score', '=', None)], order='id', limit=1)[0]
+    records = Score.search([], order='score, id', after=after)
+    assert records
+    assert all(record.score is None and record.id > after.id for record in records)
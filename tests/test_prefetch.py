@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import event
+
+from clicx.database import fields
+from clicx.database.base import BaseModel
+from clicx.database.connection import DatabaseConnection
+
+
+class Country(BaseModel):
+    _name = 'test.prefetch.country'
+
+    code = fields.Char()
+
+
+class Partner(BaseModel):
+    _name = 'test.prefetch.partner'
+
+    name = fields.Char()
+    children = fields.One2many('test.prefetch.contact', 'parent')
+
+
+class Contact(BaseModel):
+    _name = 'test.prefetch.contact'
+
+    name = fields.Char()
+    country = fields.Many2one('test.prefetch.country')
+    parent = fields.Many2one('test.prefetch.partner')
+
+
+@pytest.fixture(scope="module")
+def queries(create_tables):
+    create_tables(Country, Partner, Contact)
+
+    countries = Country.create([{'code': code} for code in ('DK', 'SE', 'NO')])
+    parents = Partner.create([{'name': f'parent {i}'} for i in range(10)])
+    Contact.create([
+        {'name': f'child {i}', 'parent': parents[i % 10], 'country': countries[i % 3]}
+        for i in range(100)
+    ])
+
+    engine = DatabaseConnection().engine
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', listener)
+
+
+def count(queries, func):
+    queries.clear()
+    result = func()
+    return result, len(queries)
+
+
+def test_relations_are_prefetched_for_the_record_set(queries):
+    parents, searched = count(queries, lambda: Partner.search([]))
+    assert searched == 1
+    codes, read = count(queries, lambda: [child.country.code for parent in parents for child in parent.children])
+    assert len(codes) == 100
+    # One query for the children of every parent, one for the countries of every child
+    assert read == 2
+
+
+def test_relations_of_records_loaded_by_search_prefetch(queries):
+    parents, searched = count(queries, lambda: Partner.search([], prefetch=['children']))
+    assert searched == 2
+    codes, read = count(queries, lambda: [child.country.code for parent in parents for child in parent.children])
+    assert len(codes) == 100
+    assert read == 1
+
+
+def test_relations_of_records_loaded_by_search_iter_prefetch(queries):
+    def read():
+        return [
+            child.country.code
+            for parent in Partner.search_iter([], batch_size=5, prefetch=['children'])
+            for child in parent.children
+        ]
+
+    codes, total = count(queries, read)
+    assert len(codes) == 100
+    # Per batch of 5 parents: the children with the parents, then the countries of the children
+    assert total == 1 + 2 * 2
+